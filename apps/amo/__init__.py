@@ -18,7 +18,7 @@ from mkt.versions.compare import version_re
 
 from .log import (LOG, LOG_BY_ID, LOG_ADMINS, LOG_EDITORS,
                   LOG_HIDE_DEVELOPER, LOG_KEEP, LOG_REVIEW_QUEUE,
-                  LOG_REVIEW_EMAIL_USER, log)
+                  LOG_REVIEW_EMAIL_USER, log, log_deferred, log_many)
 
 
 logger_log = commonware.log.getLogger('z.amo')
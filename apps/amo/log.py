@@ -1,9 +1,14 @@
+import threading
+from collections import OrderedDict
 from inspect import isclass
 
 from django.conf import settings
 from django.core.files.storage import get_storage_class
+from django.core.signals import got_request_exception, request_finished
+from django.db import transaction
 
 from celery.datastructures import AttributeDict
+from celery.signals import task_postrun
 from tower import ugettext_lazy as _
 
 __all__ = ('LOG', 'LOG_BY_ID', 'LOG_KEEP',)
@@ -699,6 +704,24 @@ def log(action, *args, **kw):
     e.g. amo.log(amo.LOG.CREATE_ADDON, []),
          amo.log(amo.LOG.ADD_FILE_TO_VERSION, file, version)
     """
+    return log_many([(action, args, kw)])[0]
+
+
+def log_many(entries):
+    """
+    Log several actions at once, e.g.
+
+        amo.log_many([(amo.LOG.CREATE_ADDON, [app], {}),
+                      (amo.LOG.ADD_VERSION, [version, app], {'user': user})])
+
+    Each entry is an `(action, args, kw)` tuple taking the same arguments as
+    `amo.log`. The activity logs are saved one by one since their ids are
+    needed, but each of the index tables is written with a single
+    `bulk_create` for all the entries.
+
+    Returns the list of activity logs, with None for the entries that had no
+    user.
+    """
     from amo import get_user, logger_log
     from mkt.developers.models import (ActivityLog, ActivityLogAttachment,
                                        AppLog, CommentLog, GroupLog, UserLog,
@@ -708,63 +731,132 @@ def log(action, *args, **kw):
     from mkt.users.models import UserProfile
     from mkt.versions.models import Version
 
-    user = kw.get('user', get_user())
-
-    if not user:
-        logger_log.warning('Activity log called with no user: %s' % action.id)
-        return
+    logs = []
+    rows = OrderedDict()
+    add_row = lambda row: rows.setdefault(row.__class__, []).append(row)
 
-    al = ActivityLog(user=user, action=action.id)
-    al.arguments = args
-    if 'details' in kw:
-        al.details = kw['details']
-    al.save()
+    for action, args, kw in entries:
+        user = kw.get('user', get_user())
 
-    if 'details' in kw and 'comments' in al.details:
-        CommentLog(comments=al.details['comments'], activity_log=al).save()
+        if not user:
+            logger_log.warning('Activity log called with no user: %s'
+                               % action.id)
+            logs.append(None)
+            continue
 
-    # TODO(davedash): post-remora this may not be necessary.
-    if 'created' in kw:
-        al.created = kw['created']
-        # Double save necessary since django resets the created date on save.
+        al = ActivityLog(user=user, action=action.id)
+        al.arguments = args
+        if 'details' in kw:
+            al.details = kw['details']
         al.save()
+        logs.append(al)
+
+        if 'details' in kw and 'comments' in al.details:
+            add_row(CommentLog(comments=al.details['comments'],
+                               activity_log=al))
+
+        # TODO(davedash): post-remora this may not be necessary.
+        if 'created' in kw:
+            al.created = kw['created']
+            # Double save necessary since django resets the created date on
+            # save.
+            al.save()
+
+        if 'attachments' in kw:
+            formset = kw['attachments']
+            storage = get_storage_class()()
+            for form in formset:
+                data = form.cleaned_data
+                if 'attachment' in data:
+                    attachment = data['attachment']
+                    storage.save('%s/%s' % (settings.REVIEWER_ATTACHMENTS_PATH,
+                                            attachment.name), attachment)
+                    add_row(ActivityLogAttachment(
+                        activity_log=al, description=data['description'],
+                        mimetype=attachment.content_type,
+                        filepath=attachment.name))
+
+        for arg in args:
+            if isinstance(arg, tuple):
+                if arg[0] == Webapp:
+                    add_row(AppLog(addon_id=arg[1], activity_log=al))
+                elif arg[0] == Version:
+                    add_row(VersionLog(version_id=arg[1], activity_log=al))
+                elif arg[0] == UserProfile:
+                    add_row(UserLog(user_id=arg[1], activity_log=al))
+                elif arg[0] == Group:
+                    add_row(GroupLog(group_id=arg[1], activity_log=al))
+
+            # Webapp first since Webapp subclasses Addon.
+            if isinstance(arg, Webapp):
+                add_row(AppLog(addon=arg, activity_log=al))
+            elif isinstance(arg, Version):
+                add_row(VersionLog(version=arg, activity_log=al))
+            elif isinstance(arg, UserProfile):
+                # Index by any user who is mentioned as an argument.
+                add_row(UserLog(activity_log=al, user=arg))
+            elif isinstance(arg, Group):
+                add_row(GroupLog(group=arg, activity_log=al))
+
+        # Index by every user
+        add_row(UserLog(activity_log=al, user=user))
+
+    for model, objs in rows.items():
+        model.objects.bulk_create(objs)
+
+    return logs
+
+
+_locals = threading.local()
+
+
+def _get_deferred_logs():
+    """Returns the calling thread's deferred logs."""
+    return _locals.__dict__.setdefault('deferred_logs', [])
+
+
+def log_deferred(action, *args, **kw):
+    """
+    Same as `amo.log`, but the action is only logged when the request (or
+    the task) finishes, with all the other deferred logs of the request in a
+    single transaction. The logs are discarded if the request fails.
+    """
+    from amo import get_user
+
+    # Use the current user, it won't be set anymore when the logs are saved.
+    kw.setdefault('user', get_user())
+    _get_deferred_logs().append((action, args, kw))
+
 
-    if 'attachments' in kw:
-        formset = kw['attachments']
-        storage = get_storage_class()()
-        for form in formset:
-            data = form.cleaned_data
-            if 'attachment' in data:
-                attachment = data['attachment']
-                storage.save('%s/%s' % (settings.REVIEWER_ATTACHMENTS_PATH,
-                                        attachment.name), attachment)
-                ActivityLogAttachment(activity_log=al,
-                                      description=data['description'],
-                                      mimetype=attachment.content_type,
-                                      filepath=attachment.name).save()
-
-    for arg in args:
-        if isinstance(arg, tuple):
-            if arg[0] == Webapp:
-                AppLog(addon_id=arg[1], activity_log=al).save()
-            elif arg[0] == Version:
-                VersionLog(version_id=arg[1], activity_log=al).save()
-            elif arg[0] == UserProfile:
-                UserLog(user_id=arg[1], activity_log=al).save()
-            elif arg[0] == Group:
-                GroupLog(group_id=arg[1], activity_log=al).save()
-
-        # Webapp first since Webapp subclasses Addon.
-        if isinstance(arg, Webapp):
-            AppLog(addon=arg, activity_log=al).save()
-        elif isinstance(arg, Version):
-            VersionLog(version=arg, activity_log=al).save()
-        elif isinstance(arg, UserProfile):
-            # Index by any user who is mentioned as an argument.
-            UserLog(activity_log=al, user=arg).save()
-        elif isinstance(arg, Group):
-            GroupLog(group=arg, activity_log=al).save()
-
-    # Index by every user
-    UserLog(activity_log=al, user=user).save()
-    return al
+def flush_deferred_logs(**kwargs):
+    """
+    Saves all the deferred logs. A failure is logged rather than raised from
+    the signal handler.
+    """
+    from amo import logger_log
+
+    entries = _get_deferred_logs()
+    if not entries:
+        return
+    # Take the logs off the thread first, so that they aren't saved again by
+    # the next request or task of the thread if saving them fails.
+    pending = entries[:]
+    entries[:] = []
+    try:
+        with transaction.atomic():
+            log_many(pending)
+    except Exception:
+        logger_log.error('Could not save %s deferred activity logs.'
+                         % len(pending), exc_info=True)
+
+
+def discard_deferred_logs(**kwargs):
+    """Discards all the deferred logs."""
+    _get_deferred_logs()[:] = []
+
+
+request_finished.connect(flush_deferred_logs,
+                         dispatch_uid='request_finished_logs')
+task_postrun.connect(flush_deferred_logs, dispatch_uid='task_finished_logs')
+got_request_exception.connect(discard_deferred_logs,
+                              dispatch_uid='request_exception_logs')
@@ -1,18 +1,22 @@
 """Tests for the activitylog."""
 from datetime import datetime
 
+from django.core.signals import got_request_exception, request_finished
+
+from mock import patch
 from nose.tools import eq_
 
 import amo
 import amo.tests
-from mkt.webapps.models import Addon
+from mkt.developers.models import ActivityLog, AppLog, CommentLog, UserLog
+from mkt.webapps.models import Addon, Webapp
 from mkt.users.models import UserProfile
 
 
 class LogTest(amo.tests.TestCase):
     def setUp(self):
-        u = UserProfile.objects.create(username='foo')
-        amo.set_user(u)
+        self.user = UserProfile.objects.create(username='foo')
+        amo.set_user(self.user)
 
     def test_details(self):
         """
@@ -34,3 +38,66 @@ class LogTest(amo.tests.TestCase):
         al = amo.log(amo.LOG.CUSTOM_TEXT, 'hi', created=datetime(2009, 1, 1))
 
         eq_(al.created, datetime(2009, 1, 1))
+
+    def test_index_rows(self):
+        app = Webapp.objects.create(name='app', type=amo.ADDON_WEBAPP)
+        other = UserProfile.objects.create(username='bar')
+        al = amo.log(amo.LOG.APPROVE_VERSION, app, other,
+                     details={'comments': 'yo'})
+        eq_(AppLog.objects.get().activity_log, al)
+        eq_(CommentLog.objects.get().comments, 'yo')
+        eq_(sorted(UserLog.objects.values_list('user', flat=True)),
+            sorted([self.user.pk, other.pk]))
+
+    def test_log_many(self):
+        app = Webapp.objects.create(name='app', type=amo.ADDON_WEBAPP)
+        # 1 insert per activity log, 1 for the app logs, 1 for the user logs.
+        with self.assertNumQueries(4):
+            logs = amo.log_many([
+                (amo.LOG.CREATE_ADDON, [app], {}),
+                (amo.LOG.EDIT_PROPERTIES, [app], {}),
+            ])
+        eq_([l.action for l in logs],
+            [amo.LOG.CREATE_ADDON.id, amo.LOG.EDIT_PROPERTIES.id])
+        eq_(AppLog.objects.filter(addon=app).count(), 2)
+        eq_(UserLog.objects.filter(user=self.user).count(), 2)
+
+    def test_log_many_no_user(self):
+        amo.set_user(None)
+        eq_(amo.log_many([(amo.LOG.CUSTOM_TEXT, ['hi'], {})]), [None])
+        eq_(ActivityLog.objects.count(), 0)
+
+    def test_log_deferred(self):
+        app = Webapp.objects.create(name='app', type=amo.ADDON_WEBAPP)
+        amo.log_deferred(amo.LOG.INSTALL_ADDON, app)
+        eq_(ActivityLog.objects.count(), 0)
+
+        # The user of the call is kept.
+        amo.set_user(None)
+        request_finished.send(sender=self)
+        al = ActivityLog.objects.get()
+        eq_(al.action, amo.LOG.INSTALL_ADDON.id)
+        eq_(al.user, self.user)
+        eq_(AppLog.objects.get().addon_id, app.pk)
+
+        # Nothing left to flush.
+        request_finished.send(sender=self)
+        eq_(ActivityLog.objects.count(), 1)
+
+    def test_log_deferred_discarded(self):
+        amo.log_deferred(amo.LOG.CUSTOM_TEXT, 'hi')
+        got_request_exception.send(sender=self)
+        request_finished.send(sender=self)
+        eq_(ActivityLog.objects.count(), 0)
+
+    def test_log_deferred_failure(self):
+        amo.log_deferred(amo.LOG.CUSTOM_TEXT, 'hi')
+        with patch('amo.log.log_many') as log_many:
+            log_many.side_effect = ValueError
+            request_finished.send(sender=self)
+        eq_(log_many.call_count, 1)
+
+        # The failed logs are not saved again by the next request.
+        amo.log_deferred(amo.LOG.CUSTOM_TEXT, 'there')
+        request_finished.send(sender=self)
+        eq_(ActivityLog.objects.count(), 1)
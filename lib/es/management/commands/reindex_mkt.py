@@ -1,16 +1,18 @@
 """
 Marketplace ElasticSearch Indexer.
 
-Currently creates the indexes and re-indexes apps and feed elements.
+Currently creates the indexes and re-indexes apps, feed elements and users.
 """
 import logging
+import math
 import os
 import sys
 import time
+from multiprocessing.pool import ThreadPool
 from optparse import make_option
 
 import elasticsearch
-from celery import task
+from celery import chord, task
 
 from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
@@ -18,6 +20,8 @@ from django.core.management.base import BaseCommand, CommandError
 import mkt.feed.indexers as f_indexers
 from amo.utils import chunked, timestamp_index
 from lib.es.models import Reindexing
+from mkt.search.utils import invalidate_search_cache
+from mkt.users.indexers import UserIndexer
 from mkt.webapps.indexers import WebappIndexer
 
 
@@ -43,6 +47,8 @@ INDEXES = (
     (ES_INDEXES['mkt_feed_shelf'], f_indexers.FeedShelfIndexer, 500),
     # Currently using 1000 since FeedItem documents are pretty small.
     (ES_INDEXES['mkt_feed_item'], f_indexers.FeedItemIndexer, 1000),
+    # User documents are small too, and there are a lot of them.
+    (ES_INDEXES['users'], UserIndexer, 1000),
 )
 
 INDEX_DICT = {
@@ -50,6 +56,7 @@ INDEX_DICT = {
     'apps': [INDEXES[0]],
     'feed': [INDEXES[1], INDEXES[2], INDEXES[3], INDEXES[4], INDEXES[5]],
     'feeditems': [INDEXES[5]],
+    'users': [INDEXES[6]],
 }
 
 ES = elasticsearch.Elasticsearch(hosts=settings.ES_HOSTS)
@@ -58,6 +65,11 @@ ES = elasticsearch.Elasticsearch(hosts=settings.ES_HOSTS)
 job = 'lib.es.management.commands.reindex_mkt.run_indexing'
 time_limits = settings.CELERY_TIME_LIMITS[job]
 
+# Number of times a chunk is retried before giving up on the reindexation,
+# and the countdown before retrying (multiplied by the attempt number).
+CHUNK_RETRIES = 3
+CHUNK_RETRY_DELAY = 10
+
 
 @task
 def delete_index(old_index):
@@ -105,8 +117,7 @@ def run_indexing(index, indexer, chunk_size):
     Note: Our ES doc sizes are about 5k in size. Chunking by 100 sends ~500kb
     of data to ES at a time.
 
-    TODO: Use celery chords here to parallelize these indexing chunks. This
-          requires celery 3 (bug 825938).
+    See `parallel_indexing` to spread the chunks over several workers.
 
     """
     sys.stdout.write('Indexing apps into index: %s\n' % index)
@@ -116,6 +127,80 @@ def run_indexing(index, indexer, chunk_size):
         indexer.run_indexing(ids, ES, index=index)
 
 
+# The results of the slices are needed by the chord, which wouldn't run its
+# callback if they were ignored like CELERY_IGNORE_RESULT does by default.
+@task(time_limit=time_limits['hard'], soft_time_limit=time_limits['soft'],
+      ignore_result=False)
+def run_indexing_slice(index, indexer, ids, chunk_size):
+    """Index a slice of the objects, one chunk at a time.
+
+    When a chunk fails the task is retried with the objects left to index, up
+    to CHUNK_RETRIES times. If it still fails the task fails, which prevents
+    the chord from updating the alias.
+
+    """
+    sys.stdout.write('Indexing %s objects into index: %s\n'
+                     % (len(ids), index))
+    for offset in range(0, len(ids), chunk_size):
+        chunk = ids[offset:offset + chunk_size]
+        try:
+            indexer.run_indexing(chunk, ES, index=index)
+        except Exception as e:
+            retries = run_indexing_slice.request.retries
+            sys.stdout.write('Indexing chunk %s-%s failed (%s), retrying.\n'
+                             % (chunk[0], chunk[-1], e))
+            return run_indexing_slice.retry(
+                args=[index, indexer, ids[offset:], chunk_size], exc=e,
+                countdown=CHUNK_RETRY_DELAY * (retries + 1),
+                max_retries=CHUNK_RETRIES)
+
+
+@task(time_limit=time_limits['hard'], soft_time_limit=time_limits['soft'])
+def run_indexing_local(index, indexer, slices, chunk_size):
+    """Index the slices of objects in a local pool of threads.
+
+    Used when tasks are run eagerly, since a celery group would then index
+    the slices one after the other.
+
+    """
+    pool = ThreadPool(len(slices))
+    try:
+        # Using map_async().get() instead of map() so that KeyboardInterrupt
+        # isn't swallowed by the pool. The slices are applied rather than
+        # called so that failing chunks are retried.
+        pool.map_async(
+            lambda ids: run_indexing_slice.apply(
+                args=[index, indexer, ids, chunk_size]).get(),
+            slices).get(time_limits['hard'])
+    finally:
+        pool.close()
+        pool.join()
+
+
+def parallel_indexing(index, indexer, chunk_size, concurrency, callback):
+    """Returns the signature indexing all the objects in `concurrency`
+    parallel slices, then running `callback`.
+
+    The slices are the header of a chord, so `callback` (updating the alias)
+    only runs once every slice has succeeded.
+
+    """
+    ids = list(indexer.get_indexable().values_list('id', flat=True))
+    if not ids:
+        return run_indexing.si(index, indexer, chunk_size) | callback
+
+    slice_size = int(math.ceil(len(ids) / float(concurrency)))
+    # Keep the slices aligned on chunks.
+    slice_size = int(math.ceil(slice_size / float(chunk_size))) * chunk_size
+    slices = list(chunked(ids, slice_size))
+
+    if settings.CELERY_ALWAYS_EAGER:
+        return (run_indexing_local.si(index, indexer, slices, chunk_size) |
+                callback)
+    return chord((run_indexing_slice.si(index, indexer, ids, chunk_size)
+                  for ids in slices), callback)
+
+
 @task
 def flag_database(new_index, old_index, alias):
     """Flags the database to indicate that the reindexing has started."""
@@ -143,6 +228,9 @@ def update_alias(new_index, old_index, alias, settings):
         2. Update settings to reset number of replicas.
         3. Point the alias to this new index.
 
+    Then the cached search responses, which came from the old index, are
+    invalidated.
+
     """
     sys.stdout.write('Optimizing, updating settings and aliases.\n')
 
@@ -162,6 +250,8 @@ def update_alias(new_index, old_index, alias, settings):
         )
     ES.indices.update_aliases(body=dict(actions=actions))
 
+    invalidate_search_cache()
+
 
 @task
 def output_summary():
@@ -186,6 +276,14 @@ class Command(BaseCommand):
                     help=('Bypass the database flag that says '
                           'another indexation is ongoing'),
                     default=False),
+        make_option('--parallel', action='store_true',
+                    help=('Index chunks in parallel, swapping the alias '
+                          'once they have all been indexed'),
+                    default=False),
+        make_option('--concurrency', action='store', type='int',
+                    help=('Number of parallel indexing tasks per index, '
+                          'used with --parallel'),
+                    default=settings.ES_REINDEX_CONCURRENCY),
     )
 
     def handle(self, *args, **kwargs):
@@ -199,6 +297,8 @@ class Command(BaseCommand):
         index_choice = kwargs.get('index', None)
         prefix = kwargs.get('prefix', '')
         force = kwargs.get('force', False)
+        parallel = kwargs.get('parallel', False)
+        concurrency = max(kwargs.get('concurrency') or 1, 1)
 
         if index_choice:
             # If we only want to reindex a subset of indexes.
@@ -254,14 +354,19 @@ class Command(BaseCommand):
                 'store.compress.tv': True, 'store.compress.stored': True,
                 'refresh_interval': '-1'})
 
-            # Index all the things!
-            chain |= run_indexing.si(new_index, INDEXER, CHUNK_SIZE)
-
             # After indexing we optimize the index, adjust settings, and point
             # alias to the new index.
-            chain |= update_alias.si(new_index, old_index, ALIAS, {
+            alias = update_alias.si(new_index, old_index, ALIAS, {
                 'number_of_replicas': num_replicas, 'refresh_interval': '5s'})
 
+            # Index all the things!
+            if parallel:
+                chain |= parallel_indexing(new_index, INDEXER, CHUNK_SIZE,
+                                           concurrency, alias)
+            else:
+                chain |= run_indexing.si(new_index, INDEXER, CHUNK_SIZE)
+                chain |= alias
+
         # Unflag the database to mark as done indexing.
         chain |= unflag_database.si()
 
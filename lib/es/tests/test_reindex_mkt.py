@@ -0,0 +1,62 @@
+import mock
+from celery.canvas import chord
+from nose.tools import eq_
+
+import amo.tests
+from lib.es.management.commands import reindex_mkt
+
+
+class TestParallelIndexing(amo.tests.TestCase):
+
+    def setUp(self):
+        self.calls = []
+        self.indexer = mock.Mock()
+        self.indexer.get_indexable.return_value.values_list.return_value = (
+            range(1, 9))
+        self.indexer.run_indexing.side_effect = (
+            lambda ids, es, index: self.calls.append(('index', list(ids))))
+        es = mock.patch.object(reindex_mkt, 'ES')
+        self.es = es.start()
+        self.addCleanup(es.stop)
+        self.es.indices.update_aliases.side_effect = (
+            lambda body: self.calls.append(('alias',)))
+
+    def alias(self):
+        return reindex_mkt.update_alias.si('new', 'old', 'alias', {})
+
+    def test_chord(self):
+        with mock.patch.object(reindex_mkt.settings, 'CELERY_ALWAYS_EAGER',
+                               False):
+            sig = reindex_mkt.parallel_indexing('new', self.indexer, 2, 2,
+                                                self.alias())
+        assert isinstance(sig, chord)
+        eq_([list(t.args[2]) for t in sig.tasks], [[1, 2, 3, 4],
+                                                   [5, 6, 7, 8]])
+        eq_(sig.body.task, reindex_mkt.update_alias.name)
+        # The chord needs the results of its header to run the callback.
+        assert not reindex_mkt.run_indexing_slice.ignore_result
+
+    def test_alias_after_slices(self):
+        reindex_mkt.parallel_indexing('new', self.indexer, 2, 2,
+                                      self.alias()).apply()
+        eq_(sorted(self.calls[:-1]), [('index', [1, 2]), ('index', [3, 4]),
+                                      ('index', [5, 6]), ('index', [7, 8])])
+        eq_(self.calls[-1], ('alias',))
+
+    @mock.patch.object(reindex_mkt, 'CHUNK_RETRY_DELAY', 0)
+    def test_retry_chunk(self):
+        self.indexer.run_indexing.side_effect = [None, Exception, None]
+        reindex_mkt.run_indexing_slice.apply(
+            args=['new', self.indexer, [1, 2, 3, 4], 2])
+        eq_([c[0][0] for c in self.indexer.run_indexing.call_args_list],
+            [[1, 2], [3, 4], [3, 4]])
+
+    @mock.patch.object(reindex_mkt, 'CHUNK_RETRY_DELAY', 0)
+    def test_no_alias_on_failure(self):
+        self.indexer.run_indexing.side_effect = Exception
+        with self.assertRaises(Exception):
+            reindex_mkt.parallel_indexing('new', self.indexer, 2, 2,
+                                          self.alias()).apply()
+        eq_(self.indexer.run_indexing.call_count,
+            2 * (reindex_mkt.CHUNK_RETRIES + 1))
+        assert not self.es.indices.update_aliases.called
@@ -1,8 +1,16 @@
+import bisect
 import logging
+import mmap
+import os
+import socket
+import struct
+
+from django.core.cache import cache
 
 import requests
 from django_statsd.clients import statsd
 
+from lib.utils import LRUCache
 from mkt import regions
 
 log = logging.getLogger('z.geoip')
@@ -25,14 +33,107 @@ def is_public(ip):
     return True
 
 
+def ip_prefix(ip):
+    """Return the /24 prefix of an IPv4 address, used as the cache key."""
+    return ip.rsplit('.', 1)[0]
+
+
+class RangeDatabase(object):
+    """
+    An offline IPv4 to country database, memory-mapped from a file of
+    fixed-size records sorted by start address, each being:
+
+        start (uint32) | end (uint32) | country code (2 bytes, lowercase)
+
+    The file is built from a CSV of ranges with `build_geoip_db`.
+    """
+    record = struct.Struct('>II2s')
+
+    def __init__(self, path):
+        with open(path, 'rb') as fd:
+            self.data = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+        self.length = len(self.data) / self.record.size
+        self.starts = [self.record.unpack_from(self.data,
+                                               i * self.record.size)[0]
+                       for i in range(self.length)]
+
+    def lookup(self, address):
+        """Return the country code for `address` or None if not found."""
+        try:
+            ip = struct.unpack('>I', socket.inet_aton(address))[0]
+        except socket.error:
+            return None
+        i = bisect.bisect_right(self.starts, ip) - 1
+        if i < 0:
+            return None
+        start, end, country = self.record.unpack_from(
+            self.data, i * self.record.size)
+        if start <= ip <= end:
+            return country.strip()
+        return None
+
+    @classmethod
+    def build(cls, ranges, path):
+        """Write the (start, end, country code) `ranges` to `path`, with the
+        addresses either as dotted strings or integers."""
+        def to_int(ip):
+            if isinstance(ip, basestring) and '.' in ip:
+                return struct.unpack('>I', socket.inet_aton(ip))[0]
+            return int(ip)
+
+        records = sorted((to_int(start), to_int(end), country.lower())
+                         for start, end, country in ranges)
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as fd:
+            for start, end, country in records:
+                fd.write(cls.record.pack(start, end, str(country)))
+        # Atomically replace any previous database.
+        os.rename(tmp, path)
+        return len(records)
+
+
 class GeoIP:
-    """Call to geodude server to resolve an IP to Geo Info block."""
+    """
+    Resolve an IP to a country code.
+
+    Lookups go through an in-process LRU cache keyed on the /24 prefix of the
+    address, then the optional memcache tier, then the optional offline
+    database, and only then to the geodude server.
+    """
+    # Shared by all the instances, each process has one.
+    _lru = None
+    _db = {}
 
     def __init__(self, settings):
         self.timeout = float(getattr(settings, 'GEOIP_DEFAULT_TIMEOUT', .2))
         self.url = getattr(settings, 'GEOIP_URL', '')
         self.default_val = getattr(settings, 'GEOIP_DEFAULT_VAL',
                                    regions.RESTOFWORLD.slug).lower()
+        self.cache_ttl = getattr(settings, 'GEOIP_CACHE_TTL', 0)
+        self.negative_ttl = getattr(settings, 'GEOIP_NEGATIVE_CACHE_TTL', 0)
+        self.memcache_ttl = getattr(settings, 'GEOIP_MEMCACHE_TTL', 0)
+        self.db_path = getattr(settings, 'GEOIP_OFFLINE_DB', '')
+
+        if self.cache_ttl and GeoIP._lru is None:
+            GeoIP._lru = LRUCache(getattr(settings, 'GEOIP_CACHE_SIZE', 10000),
+                                  self.cache_ttl)
+
+    @property
+    def lru(self):
+        return GeoIP._lru if self.cache_ttl else None
+
+    @property
+    def db(self):
+        if not self.db_path:
+            return None
+        if self.db_path not in GeoIP._db:
+            try:
+                GeoIP._db[self.db_path] = RangeDatabase(self.db_path)
+            except (IOError, ValueError) as e:
+                log.error('Could not load GeoIP database {0}: {1}'
+                          .format(self.db_path, e))
+                GeoIP._db[self.db_path] = None
+        return GeoIP._db[self.db_path]
 
     def lookup(self, address):
         """Resolve an IP address to a block of geo information.
@@ -42,29 +143,36 @@ class GeoIP:
 
         """
         public_ip = is_public(address)
-        if self.url and public_ip:
-            with statsd.timer('z.geoip'):
-                res = None
-                try:
-                    res = requests.post('{0}/country.json'.format(self.url),
-                                        timeout=self.timeout,
-                                        data={'ip': address})
-                except requests.Timeout:
-                    statsd.incr('z.geoip.timeout')
-                    log.error(('Geodude timed out looking up: {0}'
-                               .format(address)))
-                except requests.RequestException as e:
-                    statsd.incr('z.geoip.error')
-                    log.error('Geodude connection error: {0}'.format(str(e)))
-                if res and res.status_code == 200:
-                    statsd.incr('z.geoip.success')
-                    country_code = res.json().get('country_code',
-                        self.default_val).lower()
-                    log.info(('Geodude lookup for {0} returned {1}'
-                              .format(address, country_code)))
+        if public_ip and (self.url or self.db):
+            prefix = ip_prefix(address)
+            key = 'geoip:%s' % prefix
+
+            if self.lru:
+                country_code = self.lru.get(prefix)
+                if country_code:
+                    statsd.incr('z.geoip.cache.hit')
                     return country_code
-                    log.info('Geodude lookup returned non-200 response: {0}'
-                             .format(res.status_code))
+
+            if self.memcache_ttl:
+                country_code = cache.get(key)
+                if country_code:
+                    statsd.incr('z.geoip.memcache.hit')
+                    if self.lru:
+                        self.lru.set(prefix, country_code)
+                    return country_code
+
+            statsd.incr('z.geoip.cache.miss')
+            country_code, ttl = self._lookup(address)
+            if country_code is None:
+                # Negative caching: don't hit a slow or failing geodude again
+                # for every request from the same network.
+                country_code, ttl = self.default_val, self.negative_ttl
+            if ttl:
+                if self.lru:
+                    self.lru.set(prefix, country_code, ttl)
+                if self.memcache_ttl:
+                    cache.set(key, country_code, min(ttl, self.memcache_ttl))
+            return country_code
         else:
             if public_ip:
                 log.info('Geodude lookup skipped for public IP: {0}'
@@ -73,3 +181,44 @@ class GeoIP:
                 log.info('Geodude lookup skipped for private IP: {0}'
                          .format(address))
         return self.default_val
+
+    def _lookup(self, address):
+        """
+        Look the address up in the offline database then geodude.
+
+        Returns a tuple of the country code, or None if the lookup failed,
+        and how long the result should be cached for.
+        """
+        if self.db:
+            country_code = self.db.lookup(address)
+            if country_code:
+                statsd.incr('z.geoip.offline')
+                return country_code, self.cache_ttl
+
+        if not self.url:
+            return self.default_val, self.cache_ttl
+
+        with statsd.timer('z.geoip'):
+            res = None
+            try:
+                res = requests.post('{0}/country.json'.format(self.url),
+                                    timeout=self.timeout,
+                                    data={'ip': address})
+            except requests.Timeout:
+                statsd.incr('z.geoip.timeout')
+                log.error(('Geodude timed out looking up: {0}'
+                           .format(address)))
+            except requests.RequestException as e:
+                statsd.incr('z.geoip.error')
+                log.error('Geodude connection error: {0}'.format(str(e)))
+            if res and res.status_code == 200:
+                statsd.incr('z.geoip.success')
+                country_code = res.json().get('country_code',
+                    self.default_val).lower()
+                log.info(('Geodude lookup for {0} returned {1}'
+                          .format(address, country_code)))
+                return country_code, self.cache_ttl
+            if res is not None:
+                log.info('Geodude lookup returned non-200 response: {0}'
+                         .format(res.status_code))
+        return None, None
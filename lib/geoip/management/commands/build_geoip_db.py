@@ -0,0 +1,43 @@
+"""
+Build the offline GeoIP database used when GEOIP_OFFLINE_DB is set.
+
+Call like:
+
+    ./manage.py build_geoip_db ranges.csv /path/to/geoip.db
+
+The CSV has one range per line: start IP, end IP and country code. The IPs
+can be dotted addresses or integers. Lines with more columns, like the
+GeoLite country CSV, use the last two integer columns and the country code:
+
+    "1.0.0.0","1.0.0.255","16777216","16777471","AU","Australia"
+
+"""
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from lib.geoip import RangeDatabase
+
+
+def parse_ranges(fd):
+    for row in csv.reader(fd):
+        if not row or row[0].startswith('#'):
+            continue
+        if len(row) >= 5:
+            yield row[2], row[3], row[4]
+        else:
+            yield row[0], row[1], row[2]
+
+
+class Command(BaseCommand):
+    args = '<csv file> <database file>'
+    help = __doc__
+
+    def handle(self, *args, **kw):
+        if len(args) != 2:
+            raise CommandError('Usage: build_geoip_db %s' % self.args)
+
+        source, target = args
+        with open(source) as fd:
+            count = RangeDatabase.build(parse_ranges(fd), target)
+        self.stdout.write('Wrote %s ranges to %s\n' % (count, target))
@@ -1,3 +1,5 @@
+import os
+import tempfile
 from random import randint
 
 import mock
@@ -6,16 +8,23 @@ from nose.tools import eq_
 
 import amo.tests
 
-from lib.geoip import GeoIP
+from lib.geoip import GeoIP, LRUCache, RangeDatabase
 
 
-def generate_settings(url='', default='restofworld', timeout=0.2):
+def generate_settings(url='', default='restofworld', timeout=0.2,
+                      cache_ttl=0, negative_ttl=0, memcache_ttl=0, db=''):
     return mock.Mock(GEOIP_URL=url, GEOIP_DEFAULT_VAL=default,
-                     GEOIP_DEFAULT_TIMEOUT=timeout)
+                     GEOIP_DEFAULT_TIMEOUT=timeout, GEOIP_CACHE_TTL=cache_ttl,
+                     GEOIP_CACHE_SIZE=10,
+                     GEOIP_NEGATIVE_CACHE_TTL=negative_ttl,
+                     GEOIP_MEMCACHE_TTL=memcache_ttl, GEOIP_OFFLINE_DB=db)
 
 
 class GeoIPTest(amo.tests.TestCase):
 
+    def setUp(self):
+        GeoIP._lru = None
+
     @mock.patch('requests.post')
     def test_lookup(self, mock_post):
         url = 'localhost'
@@ -86,3 +95,86 @@ class GeoIPTest(amo.tests.TestCase):
             result = geoip.lookup(ip)
             assert not mock_post.called
             eq_(result, 'restofworld')
+
+    @mock.patch('requests.post')
+    def test_cache(self, mock_post):
+        geoip = GeoIP(generate_settings(url='localhost', cache_ttl=60))
+        mock_post.return_value = mock.Mock(status_code=200, json=lambda: {
+            'country_code': 'US',
+        })
+        eq_(geoip.lookup('1.1.1.1'), 'us')
+        # Same /24, served from the cache.
+        eq_(geoip.lookup('1.1.1.2'), 'us')
+        eq_(mock_post.call_count, 1)
+        geoip.lookup('1.1.2.1')
+        eq_(mock_post.call_count, 2)
+
+    @mock.patch('requests.post')
+    def test_memcache(self, mock_post):
+        geoip = GeoIP(generate_settings(url='localhost', cache_ttl=60,
+                                        memcache_ttl=60))
+        mock_post.return_value = mock.Mock(status_code=200, json=lambda: {
+            'country_code': 'US',
+        })
+        eq_(geoip.lookup('1.1.1.1'), 'us')
+        GeoIP._lru.clear()
+        eq_(geoip.lookup('1.1.1.1'), 'us')
+        eq_(mock_post.call_count, 1)
+
+    @mock.patch('requests.post')
+    def test_negative_cache(self, mock_post):
+        geoip = GeoIP(generate_settings(url='localhost', cache_ttl=60,
+                                        negative_ttl=10))
+        mock_post.side_effect = requests.Timeout
+        eq_(geoip.lookup('3.3.3.3'), 'restofworld')
+        eq_(geoip.lookup('3.3.3.3'), 'restofworld')
+        eq_(mock_post.call_count, 1)
+
+    @mock.patch('requests.post')
+    def test_no_negative_cache(self, mock_post):
+        geoip = GeoIP(generate_settings(url='localhost', cache_ttl=60))
+        mock_post.side_effect = requests.Timeout
+        geoip.lookup('3.3.3.3')
+        geoip.lookup('3.3.3.3')
+        eq_(mock_post.call_count, 2)
+
+    @mock.patch('requests.post')
+    def test_offline_db(self, mock_post):
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        RangeDatabase.build([('1.0.0.0', '1.0.0.255', 'AU'),
+                             (33554432, 33554687, 'FR')], path)
+
+        geoip = GeoIP(generate_settings(url='localhost', db=path))
+        GeoIP._db.clear()
+        mock_post.return_value = mock.Mock(status_code=200, json=lambda: {
+            'country_code': 'US',
+        })
+        eq_(geoip.lookup('1.0.0.12'), 'au')
+        eq_(geoip.lookup('2.0.0.1'), 'fr')
+        assert not mock_post.called
+        # Not in the database, fall back to the server.
+        eq_(geoip.lookup('4.4.4.4'), 'us')
+        eq_(mock_post.call_count, 1)
+
+
+class LRUCacheTest(amo.tests.TestCase):
+
+    def test_eviction(self):
+        lru = LRUCache(2, 60)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        eq_(lru.get('a'), 1)
+        eq_(lru.get('b'), None)
+        eq_(lru.get('c'), 3)
+
+    @mock.patch('lib.utils.time.time')
+    def test_expiry(self, time_mock):
+        time_mock.return_value = 1000
+        lru = LRUCache(2, 60)
+        lru.set('a', 1)
+        time_mock.return_value = 1061
+        eq_(lru.get('a'), None)
@@ -1,3 +1,6 @@
+import threading
+import time
+from collections import OrderedDict
 from urlparse import urljoin
 
 from django.conf import settings
@@ -47,3 +50,36 @@ def static_url(url):
         value = '/' + value if not value.startswith('/') else value
         return urljoin(prefix[url], '/tmp' + value)
     return urljoin(prefix[url], value)
+
+
+class LRUCache(object):
+    """A thread-safe, bounded, in-process cache whose entries expire."""
+
+    def __init__(self, size, ttl):
+        self.size = size
+        self.ttl = ttl
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            try:
+                value, expires = self.data.pop(key)
+            except KeyError:
+                return None
+            if expires < time.time():
+                return None
+            # Re-insert to mark it as the most recently used.
+            self.data[key] = (value, expires)
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self.lock:
+            self.data.pop(key, None)
+            self.data[key] = (value, time.time() + (ttl or self.ttl))
+            while len(self.data) > self.size:
+                self.data.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
@@ -0,0 +1,4 @@
+INSERT INTO waffle_switch (name, active, note, created, modified)
+    VALUES ('monolith-batch-queries', 0,
+            'Query Monolith for whole chunks of apps at once in the trending '
+            'and downloads crons.', NOW(), NOW());
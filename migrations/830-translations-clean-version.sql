@@ -0,0 +1,5 @@
+ALTER TABLE translations
+    ADD COLUMN clean_version smallint(5) unsigned NOT NULL DEFAULT 0;
+
+-- The strings cleaned so far are up to date with the first cleaner version.
+UPDATE translations SET clean_version=1 WHERE localized_string_clean IS NOT NULL;
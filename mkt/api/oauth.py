@@ -1,11 +1,15 @@
+import hashlib
 import string
 from urllib import urlencode
 
+from django.conf import settings
+from django.core.cache import cache
 from django.http import HttpResponse, HttpResponseRedirect
 from django.shortcuts import render
 from django.views.decorators.csrf import csrf_exempt
 
 import commonware.log
+from django_statsd.clients import statsd
 from oauthlib import oauth1
 from oauthlib.common import safe_string_equals
 
@@ -68,6 +72,36 @@ class MarketplaceOAuthRequestValidator(oauth1.RequestValidator):
     def validate_timestamp_and_nonce(self, client_key, timestamp, nonce,
                                      request, request_token=None,
                                      access_token=None):
+        args = (client_key, timestamp, nonce, request_token, access_token)
+        if settings.OAUTH_NONCE_BACKEND == 'cache':
+            created = self.add_nonce_to_cache(*args)
+            if created is not None:
+                return created
+            statsd.incr('z.api.oauth.nonce.cache_fallback')
+        return self.add_nonce_to_db(*args)
+
+    def add_nonce_to_cache(self, client_key, timestamp, nonce, request_token,
+                           access_token):
+        """
+        Store the nonce in the cache with an atomic add(), returning whether
+        it was created or None if the cache looks unavailable.
+
+        The nonce is kept long enough to cover any timestamp oauthlib accepts,
+        which is +/- `timestamp_lifetime` seconds.
+        """
+        key = 'oauth:nonce:%s' % hashlib.sha1(u':'.join(
+            map(unicode, (client_key, timestamp, nonce, request_token,
+                          access_token))).encode('utf8')).hexdigest()
+        if cache.add(key, 1, self.timestamp_lifetime * 2):
+            return True
+        if cache.get(key) is not None:
+            # The nonce has already been used.
+            return False
+        # Neither add() nor get() worked, the cache must be down.
+        return None
+
+    def add_nonce_to_db(self, client_key, timestamp, nonce, request_token,
+                        access_token):
         n, created = Nonce.objects.safer_get_or_create(
             defaults={'client_key': client_key},
             nonce=nonce, timestamp=timestamp,
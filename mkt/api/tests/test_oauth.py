@@ -9,6 +9,7 @@ from django.core.urlresolvers import reverse
 from django.test.client import FakePayload
 from django.utils.encoding import iri_to_uri, smart_str
 
+import mock
 from django_browserid.tests import mock_browserid
 from nose.tools import eq_, ok_
 from oauthlib import oauth1
@@ -20,7 +21,9 @@ from amo.helpers import absolutify, urlparams
 from amo.tests import JSONClient, TestCase
 from mkt.api import authentication
 from mkt.api.middleware import RestOAuthMiddleware
-from mkt.api.models import Access, ACCESS_TOKEN, generate, REQUEST_TOKEN, Token
+from mkt.api.models import (Access, ACCESS_TOKEN, generate, Nonce,
+                            REQUEST_TOKEN, Token)
+from mkt.api.oauth import MarketplaceOAuthRequestValidator
 from mkt.api.tests import BaseAPI
 from mkt.site.fixtures import fixture
 from mkt.users.models import UserProfile
@@ -375,3 +378,39 @@ class Test2LeggedOAuthFlow(TestCase):
         RestOAuthMiddleware().process_request(req)
         ok_(not auth.authenticate(Request(req)))
         ok_(not req.user.is_authenticated())
+
+
+class TestNonce(TestCase):
+
+    def setUp(self):
+        self.validator = MarketplaceOAuthRequestValidator()
+        self.args = ('client', 12345, 'nonce', None, None)
+
+    def validate(self, *args):
+        client_key, timestamp, nonce, request_token, access_token = (
+            args or self.args)
+        return self.validator.validate_timestamp_and_nonce(
+            client_key, timestamp, nonce, None, request_token=request_token,
+            access_token=access_token)
+
+    def test_cache(self):
+        with self.settings(OAUTH_NONCE_BACKEND='cache'):
+            ok_(self.validate())
+            ok_(not self.validate())
+            ok_(self.validate('client', 12345, 'other', None, None))
+        eq_(Nonce.objects.count(), 0)
+
+    @mock.patch('mkt.api.oauth.cache')
+    def test_cache_unavailable(self, cache):
+        cache.add.return_value = False
+        cache.get.return_value = None
+        with self.settings(OAUTH_NONCE_BACKEND='cache'):
+            ok_(self.validate())
+            ok_(not self.validate())
+        eq_(Nonce.objects.count(), 1)
+
+    def test_db(self):
+        with self.settings(OAUTH_NONCE_BACKEND='db'):
+            ok_(self.validate())
+            ok_(not self.validate())
+        eq_(Nonce.objects.count(), 1)
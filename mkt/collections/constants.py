@@ -10,3 +10,7 @@ COLLECTION_TYPES = (
     (COLLECTIONS_TYPE_FEATURED, _lazy(u'Featured App List')),
     (COLLECTIONS_TYPE_OPERATOR, _lazy(u'Operator Shelf')),
 )
+
+# The collections resolved for the featured search are cached under this
+# namespace, incremented when collections change.
+FEATURED_CACHE_NAMESPACE = 'collections:featured'
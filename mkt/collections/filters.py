@@ -1,11 +1,17 @@
+import hashlib
+
 from django import forms
+from django.conf import settings
+from django.core.cache import cache
 from django.core.validators import EMPTY_VALUES
 
 from django_filters.filters import ChoiceFilter, ModelChoiceFilter
 from django_filters.filterset import FilterSet
 
 import mkt
+from amo.utils import cache_ns_key
 from mkt.api.forms import SluggableModelChoiceField
+from mkt.collections.constants import FEATURED_CACHE_NAMESPACE
 from mkt.collections.models import Collection
 from mkt.constants.categories import CATEGORY_CHOICES
 
@@ -14,6 +20,12 @@ class ChoiceFilter(ChoiceFilter):
     """
     Like ChoiceFilter, but considering '' as None.
     """
+    def get_value(self, value):
+        """Return the value of the field matching the cleaned `value`."""
+        if value == '':
+            return None
+        return value
+
     def filter(self, qs, value):
         if value == '' or value is None:
             return qs.filter(**{self.name: None})
@@ -30,16 +42,19 @@ class SlugChoiceFilter(ChoiceFilter):
 
         return super(SlugChoiceFilter, self).__init__(*args, **kwargs)
 
-    def filter(self, qs, value):
+    def get_value(self, value):
+        """Return the id matching the cleaned slug or id `value`."""
         if value == '' or value is None:
-            value = None
+            return None
         elif not value.isdigit():
             # We are passed a slug, get the id by looking at the choices
             # dict, defaulting to None if no corresponding value is found.
             value = self.choices_dict.get(value, None)
-            if value is not None:
-                value = value.id
-        return qs.filter(**{self.name: value})
+            return value.id if value is not None else None
+        return int(value)
+
+    def filter(self, qs, value):
+        return qs.filter(**{self.name: self.get_value(value)})
 
 
 class SlugModelChoiceFilter(ModelChoiceFilter):
@@ -192,3 +207,70 @@ class CollectionFilterSetWithFallback(CollectionFilterSet):
         self._qs = qs
         self._qs.filter_fallback = self.fields_to_null
         return self._qs
+
+
+def resolve_collections(data, collection_types, limit=1):
+    """
+    Return a dict of {collection type: (ids, fallback)} with the ids of the
+    first `limit` public collections of each of `collection_types` matching
+    the filters in `data`, and the filters that had to be dropped to find
+    them, like CollectionFilterSetWithFallback does for one type.
+
+    The candidates of all the types are fetched in one query and filtered in
+    memory. The result is cached until a collection changes.
+    """
+    filterset = CollectionFilterSet(data, queryset=Collection.public.none())
+    form = filterset.form
+    valid = form.is_valid()
+    if not valid and filterset.strict:
+        return dict((type_, ([], None)) for type_ in collection_types)
+
+    # {filter name: (field name, value)}, picked like get_queryset() does.
+    conditions = {}
+    for name, filter_ in filterset.filters.items():
+        if valid:
+            if name not in form.data:
+                continue
+            value = form.cleaned_data[name]
+        else:
+            try:
+                value = form.fields[name].clean(form[name].value())
+            except forms.ValidationError:
+                continue
+        conditions[name] = (filter_.name, filter_.get_value(value))
+
+    timeout = settings.COLLECTIONS_FEATURED_CACHE_TIMEOUT
+    key = '%s:%s' % (cache_ns_key(FEATURED_CACHE_NAMESPACE), hashlib.md5(
+        repr((sorted(conditions.items()), sorted(collection_types),
+              limit))).hexdigest())
+    resolved = cache.get(key) if timeout else None
+    if resolved is not None:
+        return resolved
+
+    fields = [field for field, expected in conditions.values()]
+    candidates = list(Collection.public
+                      .filter(collection_type__in=collection_types)
+                      .values('id', 'collection_type', *fields))
+
+    def matching(type_, fields_to_null):
+        return [c['id'] for c in candidates
+                if c['collection_type'] == type_ and
+                all(c[field] == (None if name in fields_to_null else expected)
+                    for name, (field, expected) in conditions.items())]
+
+    resolved = {}
+    for type_ in collection_types:
+        fallback = None
+        ids = matching(type_, ())
+        fallbacks = iter(CollectionFilterSetWithFallback.fields_fallback_order)
+        while not ids:
+            try:
+                fallback = next(fallbacks)
+            except StopIteration:
+                break
+            ids = matching(type_, fallback)
+        resolved[type_] = (ids[:limit], fallback)
+
+    if timeout:
+        cache.set(key, resolved, timeout)
+    return resolved
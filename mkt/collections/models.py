@@ -8,13 +8,14 @@ import mkt.carriers
 import mkt.regions
 from amo.decorators import use_master
 from amo.models import SlugField
-from amo.utils import to_language
+from amo.utils import cache_ns_key, to_language
 from mkt.constants.categories import CATEGORY_CHOICES
+from mkt.search.utils import invalidate_search_cache
 from mkt.translations.fields import PurifiedField, save_signal
 from mkt.webapps.models import Addon, clean_slug, Webapp
 from mkt.webapps.tasks import index_webapps
 
-from .constants import COLLECTION_TYPES
+from .constants import COLLECTION_TYPES, FEATURED_CACHE_NAMESPACE
 from .fields import ColorField
 from .managers import PublicCollectionsManager
 
@@ -177,6 +178,13 @@ class CollectionMembership(amo.models.ModelBase):
         ordering = ('order',)
 
 
+def invalidate_featured_search(*args, **kwargs):
+    # Featured search responses include collections, resolved by
+    # mkt.collections.filters.resolve_collections().
+    cache_ns_key(FEATURED_CACHE_NAMESPACE, increment=True)
+    invalidate_search_cache()
+
+
 def remove_deleted_apps(*args, **kwargs):
     instance = kwargs.get('instance')
     CollectionMembership.objects.filter(app_id=instance.pk).delete()
@@ -190,3 +198,18 @@ models.signals.pre_save.connect(save_signal, sender=Collection,
 # not Webapp, because that's the real model underneath).
 models.signals.post_delete.connect(remove_deleted_apps, sender=Addon,
                                    dispatch_uid='apps_collections_cleanup')
+
+# Invalidate the cached featured collections and search responses when a
+# collection or its apps change.
+models.signals.post_save.connect(invalidate_featured_search,
+                                 sender=Collection,
+                                 dispatch_uid='collection_search_cache')
+models.signals.post_delete.connect(invalidate_featured_search,
+                                   sender=Collection,
+                                   dispatch_uid='collection_search_cache')
+models.signals.post_save.connect(invalidate_featured_search,
+                                 sender=CollectionMembership,
+                                 dispatch_uid='membership_search_cache')
+models.signals.post_delete.connect(invalidate_featured_search,
+                                   sender=CollectionMembership,
+                                   dispatch_uid='membership_search_cache')
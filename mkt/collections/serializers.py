@@ -3,6 +3,7 @@ import hashlib
 import os
 import uuid
 
+from elasticsearch_dsl import F
 from rest_framework import serializers
 from rest_framework.fields import get_component
 from rest_framework.reverse import reverse
@@ -110,8 +111,9 @@ class CollectionMembershipField(serializers.RelatedField):
         if device and device != amo.DEVICE_DESKTOP:
             qs = qs.filter('term', device=device.id)
         if profile:
-            for k, v in profile.to_kwargs(prefix='features.has_').items():
-                qs = qs.filter('term', **{k: v})
+            # Exclude the apps requiring any feature the profile doesn't have.
+            qs = qs.filter(~F('terms', required_features=sorted(
+                profile.to_kwargs().keys())))
         qs = qs.sort({
             'collection.order': {
                 'order': 'asc',
@@ -0,0 +1,97 @@
+from django.test.utils import override_settings
+
+from nose.tools import eq_
+
+import amo.tests
+import mkt
+from mkt.collections.constants import (COLLECTIONS_TYPE_BASIC,
+                                       COLLECTIONS_TYPE_FEATURED,
+                                       COLLECTIONS_TYPE_OPERATOR)
+from mkt.collections.filters import (CollectionFilterSetWithFallback,
+                                     resolve_collections)
+from mkt.collections.models import Collection
+
+
+TYPES = [COLLECTIONS_TYPE_BASIC, COLLECTIONS_TYPE_FEATURED,
+         COLLECTIONS_TYPE_OPERATOR]
+
+
+class TestResolveCollections(amo.tests.TestCase):
+
+    def setUp(self):
+        self.us = self.create(region=mkt.regions.US.id)
+        self.us_books = self.create(region=mkt.regions.US.id,
+                                    category='books')
+        self.worldwide = self.create()
+        self.carrier = self.create(
+            collection_type=COLLECTIONS_TYPE_OPERATOR,
+            carrier=mkt.carriers.TELEFONICA.id)
+
+    def create(self, **kwargs):
+        kwargs.setdefault('collection_type', COLLECTIONS_TYPE_BASIC)
+        return Collection.objects.create(is_public=True, **kwargs)
+
+    def check(self, data):
+        """Compare with CollectionFilterSetWithFallback, type by type."""
+        resolved = resolve_collections(data, TYPES)
+        for collection_type in TYPES:
+            qs = CollectionFilterSetWithFallback(
+                data, queryset=Collection.public.filter(
+                    collection_type=collection_type)).qs
+            eq_(resolved[collection_type],
+                ([c.pk for c in qs[:1]], getattr(qs, 'filter_fallback',
+                                                 None)))
+        return resolved
+
+    def test_region(self):
+        resolved = self.check({'region': 'us', 'cat': ''})
+        eq_(resolved[COLLECTIONS_TYPE_BASIC], ([self.us.pk], None))
+
+    def test_category(self):
+        resolved = self.check({'region': 'us', 'cat': 'books'})
+        eq_(resolved[COLLECTIONS_TYPE_BASIC], ([self.us_books.pk], None))
+
+    def test_region_fallback(self):
+        resolved = self.check({'region': 'br', 'cat': ''})
+        eq_(resolved[COLLECTIONS_TYPE_BASIC],
+            ([self.worldwide.pk], ('region',)))
+
+    def test_carrier(self):
+        self.check({'region': 'br', 'carrier': 'telefonica'})
+        self.check({'region': 'br', 'carrier': 'unknown'})
+
+    def test_no_filters(self):
+        resolved = self.check({})
+        eq_(resolved[COLLECTIONS_TYPE_BASIC], ([self.worldwide.pk], None))
+
+    def test_region_id(self):
+        self.check({'region': str(mkt.regions.US.id)})
+
+    def test_invalid(self):
+        self.check({'region': 'neverland'})
+
+    def test_not_public(self):
+        self.us.update(is_public=False)
+        self.check({'region': 'us', 'cat': ''})
+
+    def test_limit(self):
+        resolved = resolve_collections({'region': 'us'}, TYPES, limit=2)
+        eq_(resolved[COLLECTIONS_TYPE_BASIC],
+            ([self.us_books.pk, self.us.pk], None))
+
+    def test_one_query(self):
+        with self.assertNumQueries(1):
+            resolve_collections({'region': 'us', 'cat': ''}, TYPES)
+
+    @override_settings(COLLECTIONS_FEATURED_CACHE_TIMEOUT=60)
+    def test_cached(self):
+        data = {'region': 'us', 'cat': ''}
+        resolve_collections(data, TYPES)
+        with self.assertNumQueries(0):
+            eq_(resolve_collections(data, TYPES)[COLLECTIONS_TYPE_BASIC],
+                ([self.us.pk], None))
+
+        # Changing a collection invalidates the cache.
+        self.us.update(is_public=False)
+        eq_(resolve_collections(data, TYPES)[COLLECTIONS_TYPE_BASIC],
+            ([self.worldwide.pk], ('region',)))
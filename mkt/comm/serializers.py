@@ -7,7 +7,7 @@ from rest_framework.serializers import ModelSerializer, SerializerMethodField
 
 from amo.helpers import absolutify
 from mkt.comm.models import (CommAttachment, CommunicationNote,
-                             CommunicationThread)
+                             CommunicationNoteRead, CommunicationThread)
 from mkt.versions.models import Version
 from mkt.webapps.models import Addon
 from mkt.users.models import UserProfile
@@ -45,6 +45,9 @@ class NoteSerializer(ModelSerializer):
     attachments = AttachmentSerializer(source='attachments', read_only=True)
 
     def is_read_by_user(self, obj):
+        read_notes = self.context.get('read_notes')
+        if read_notes is not None:
+            return obj.id in read_notes
         return obj.read_by_users.filter(
             pk=self.context['request'].user.id).exists()
 
@@ -86,24 +89,100 @@ class ThreadSerializer(ModelSerializer):
                   'version_is_obsolete')
         view_name = 'comm-thread-detail'
 
+    @property
+    def data(self):
+        if self._data is None and self.many:
+            self.object = list(self.object)
+            self.prefetch(self.object)
+        return super(ThreadSerializer, self).data
+
+    def field_to_native(self, obj, field_name):
+        # Paginated threads, prefetch the whole page before serializing it.
+        if hasattr(obj, 'object_list'):
+            threads = list(obj.object_list)
+            self.prefetch(threads)
+            return [self.to_native(thread) for thread in threads]
+        return super(ThreadSerializer, self).field_to_native(obj, field_name)
+
+    def prefetch(self, threads):
+        """
+        Load what the fields need for a list of threads at once, in a fixed
+        number of queries: the add-ons, versions, notes the user can read,
+        and the authors, attachments and read markers of the recent notes.
+        """
+        self._prefetched = {}
+        if not threads:
+            return
+        user = self.get_request().user
+
+        addons = Addon.objects.in_bulk(
+            set(thread.addon_id for thread in threads))
+        for thread in threads:
+            if thread.addon_id in addons:
+                thread.addon = addons[thread.addon_id]
+
+        versions = dict(
+            (pk, (version, deleted)) for pk, version, deleted in
+            Version.with_deleted.filter(
+                id__in=set(thread.version_id for thread in threads))
+            .values_list('id', 'version', 'deleted'))
+
+        notes = CommunicationNote.objects.with_perms_by_thread(user, threads)
+        recent = dict((thread_id, sorted(thread_notes, reverse=True,
+                                         key=lambda note: note.created)[:5])
+                      for thread_id, thread_notes in notes.items())
+        recent_ids = [note.id for thread_notes in recent.values()
+                      for note in thread_notes]
+        full_notes = (CommunicationNote.objects.select_related('author')
+                      .prefetch_related('attachments').in_bulk(recent_ids))
+        self._read_notes = set(CommunicationNoteRead.objects.filter(
+            user=user, note__in=recent_ids).values_list('note', flat=True))
+
+        for thread in threads:
+            self._prefetched[thread.id] = {
+                'notes_count': len(notes[thread.id]),
+                'recent_notes': [full_notes[note.id]
+                                 for note in recent[thread.id]],
+                'version': versions.get(thread.version_id),
+            }
+
+    def get_prefetched(self, obj):
+        """Return what was prefetched for the thread, if anything."""
+        return getattr(self, '_prefetched', {}).get(obj.id)
+
     def get_recent_notes(self, obj):
-        notes = (obj.notes.with_perms(self.get_request().user, obj)
-                          .order_by('-created')[:5])
-        return NoteSerializer(
-            notes, many=True, context={'request': self.get_request()}).data
+        prefetched = self.get_prefetched(obj)
+        context = {'request': self.get_request()}
+        if prefetched:
+            notes = prefetched['recent_notes']
+            context['read_notes'] = self._read_notes
+        else:
+            notes = (obj.notes.with_perms(self.get_request().user, obj)
+                              .order_by('-created')[:5])
+        return NoteSerializer(notes, many=True, context=context).data
 
     def get_notes_count(self, obj):
+        prefetched = self.get_prefetched(obj)
+        if prefetched:
+            return prefetched['notes_count']
         return (obj.notes.with_perms(self.get_request().user, obj)
                          .count())
 
-    def get_version_number(self, obj):
+    def get_version_data(self, obj):
+        """Return the version number and deleted flag of the thread."""
+        prefetched = self.get_prefetched(obj)
+        if prefetched:
+            return prefetched['version']
         try:
-            return Version.with_deleted.get(id=obj.version_id).version
+            version = Version.with_deleted.get(id=obj.version_id)
         except Version.DoesNotExist:
-            return ''
+            return None
+        return version.version, version.deleted
+
+    def get_version_number(self, obj):
+        version = self.get_version_data(obj)
+        return version[0] if version else ''
 
     def get_version_is_obsolete(self, obj):
-        try:
-            return Version.with_deleted.get(id=obj.version_id).deleted
-        except Version.DoesNotExist:
-            return True
+        version = self.get_version_data(obj)
+        return version[1] if version else True
@@ -38,6 +38,10 @@ class PermissionTestMixin(object):
     def _eq_obj_perm(self, val):
         if self.type == 'note':
             eq_(user_has_perm_note(self.obj, self.user), val)
+            notes = CommunicationNote.objects.with_perms_by_thread(
+                self.user, [self.thread])
+            eq_(self.obj.id in [note.id for note in notes[self.thread.id]],
+                val)
         else:
             eq_(user_has_perm_thread(self.obj, self.user), val)
 
@@ -95,6 +99,16 @@ class TestCommunicationNote(PermissionTestMixin, amo.tests.TestCase):
         eq_(CommunicationNote.objects.with_perms(self.user,
                                                  self.thread).count(), 1)
 
+    def test_manager_by_thread(self):
+        other = CommunicationThread.objects.create(
+            addon=self.addon, version=self.addon.current_version)
+        CommunicationNote.objects.create(thread=other, author=self.user,
+                                         note_type=0, body='xyz')
+        notes = CommunicationNote.objects.with_perms_by_thread(
+            self.user, [self.thread, other])
+        eq_(notes[self.thread.id], [])
+        eq_(len(notes[other.id]), 1)
+
 
 class TestCommunicationThread(PermissionTestMixin, amo.tests.TestCase):
 
@@ -1,11 +1,13 @@
 import json
 import os
+from datetime import datetime, timedelta
 
 from django.conf import settings
 from django.core import mail
 from django.core.urlresolvers import reverse
+from django.db import connection
 from django.test.client import MULTIPART_CONTENT
-from django.test.utils import override_settings
+from django.test.utils import CaptureQueriesContext, override_settings
 
 import mock
 from nose.exc import SkipTest
@@ -295,6 +297,58 @@ class TestThreadList(RestOAuth, CommTestMixin):
             [{'id': thread2.id, 'version__version': version2.version},
              {'id': thread1.id, 'version__version': version1.version}])
 
+    def _threads_factory(self, num):
+        """
+        Create `num` threads the user is CC'd on, with notes the user can and
+        can't read, some of them read.
+        """
+        other = user_factory()
+        for x in xrange(num):
+            version = version_factory(
+                addon=self.addon,
+                version='2.%s' % self.addon.versions.count())
+            thread = self._thread_factory(version=version)
+            CommunicationThreadCC.objects.create(user=self.profile,
+                                                 thread=thread)
+            notes = [
+                self._note_factory(thread),
+                self._note_factory(thread, author=other, perms=['developer']),
+                self._note_factory(thread, author=other,
+                                   no_perms=['developer']),
+                self._note_factory(thread, author=other, perms=['public'])]
+            for days, note in enumerate(notes):
+                note.update(created=datetime.now() - timedelta(days=days))
+            notes[1].mark_read(self.profile)
+
+    def _list_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(self.list_url)
+        eq_(res.status_code, 200)
+        return len(queries)
+
+    def test_list_queries(self):
+        self.addon.addonuser_set.create(user=self.profile)
+        self._threads_factory(1)
+        num_queries = self._list_queries()
+        self._threads_factory(4)
+        # The queries don't depend on the number of threads.
+        ok_(self._list_queries() <= num_queries)
+
+    def test_list_same_as_detail(self):
+        self.addon.addonuser_set.create(user=self.profile)
+        self._threads_factory(3)
+        res = self.client.get(self.list_url)
+        eq_(res.status_code, 200)
+        eq_(len(res.json['objects']), 3)
+        for thread in res.json['objects']:
+            detail = self.client.get(
+                reverse('comm-thread-detail', kwargs={'pk': thread['id']}))
+            eq_(detail.status_code, 200)
+            data = detail.json
+            del data['app_threads']
+            eq_(thread, data)
+            eq_(thread['notes_count'], 3)
+
     def test_create(self):
         self.create_switch('comm-dashboard')
         version_factory(addon=self.addon, version='1.1')
@@ -1,3 +1,4 @@
+import collections
 import imghdr
 import json
 import os.path
@@ -8,8 +9,10 @@ from copy import copy
 from datetime import datetime
 
 from django.conf import settings
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from django.db import models
+from django.utils import translation
 from django.utils.safestring import mark_safe
 
 import bleach
@@ -278,6 +281,10 @@ class GroupLog(amo.models.ModelBase):
 
 class ActivityLogManager(amo.models.ManagerBase):
 
+    def get_query_set(self):
+        qs = super(ActivityLogManager, self).get_query_set()
+        return qs.transform(ActivityLog.transformer)
+
     def for_apps(self, apps):
         vals = (AppLog.objects.filter(addon__in=apps)
                 .values_list('activity_log', flat=True))
@@ -383,33 +390,74 @@ class ActivityLog(amo.models.ModelBase):
         # SafeFormatter escapes everything so this is safe.
         return jinja2.Markup(self.formatter.format(*args, **kw))
 
-    @property
-    def arguments(self):
-
-        try:
-            # d is a structure:
-            # ``d = [{'addons.addon':12}, {'addons.addon':1}, ... ]``
-            d = json.loads(self._arguments)
-        except:
-            log.debug('unserializing data from addon_log failed: %s' % self.id)
-            return None
+    @staticmethod
+    def transformer(logs):
+        """
+        Make the arguments of all the `logs` resolved together, with one query
+        per model referenced, the first time the arguments of any of them are
+        needed.
+        """
+        for al in logs:
+            al._arguments_batch = logs
 
-        objs = []
-        for item in d:
-            # item has only one element.
-            model_name, pk = item.items()[0]
-            if model_name in ('str', 'int', 'null'):
-                objs.append(pk)
-            else:
-                (app_label, model_name) = model_name.split('.')
-                model = models.loading.get_model(app_label, model_name)
-                # Cope with soft deleted models.
-                if hasattr(model, 'with_deleted'):
-                    objs.extend(model.with_deleted.filter(pk=pk))
-                else:
-                    objs.extend(model.objects.filter(pk=pk))
+    @staticmethod
+    def resolve_arguments(logs):
+        """
+        Resolve and attach the arguments of all the `logs`, fetching the
+        referenced objects of each model in a single query. The authors of
+        the logs are fetched along.
+        """
+        parsed = []
+        pks = collections.defaultdict(set)
+        for al in logs:
+            try:
+                # d is a structure:
+                # ``d = [{'addons.addon':12}, {'addons.addon':1}, ... ]``
+                d = json.loads(al._arguments)
+            except:
+                log.debug('unserializing data from addon_log failed: %s'
+                          % al.id)
+                d = None
+            parsed.append((al, d))
+            for item in d or []:
+                # item has only one element.
+                model_name, pk = item.items()[0]
+                if model_name not in ('str', 'int', 'null'):
+                    pks[model_name].add(pk)
+
+        objects = {}
+        for model_name, model_pks in pks.items():
+            (app_label, name) = model_name.split('.')
+            model = models.loading.get_model(app_label, name)
+            # Cope with soft deleted models.
+            manager = getattr(model, 'with_deleted', model.objects)
+            for pk, obj in manager.in_bulk(model_pks).items():
+                objects[model_name, pk] = obj
+
+        users = UserProfile.objects.in_bulk(
+            set(al.user_id for al in logs if al.user_id and
+                not hasattr(al, '_user_cache')))
+
+        for al, d in parsed:
+            if al.user_id in users:
+                al._user_cache = users[al.user_id]
+            if d is None:
+                al._arguments_cache = None
+                continue
+            objs = []
+            for item in d:
+                model_name, pk = item.items()[0]
+                if model_name in ('str', 'int', 'null'):
+                    objs.append(pk)
+                elif (model_name, pk) in objects:
+                    objs.append(objects[model_name, pk])
+            al._arguments_cache = objs
 
-        return objs
+    @property
+    def arguments(self):
+        if not hasattr(self, '_arguments_cache'):
+            self.resolve_arguments(getattr(self, '_arguments_batch', [self]))
+        return self._arguments_cache
 
     @arguments.setter
     def arguments(self, args=[]):
@@ -438,6 +486,7 @@ class ActivityLog(amo.models.ModelBase):
                 serialize_me.append(dict(((unicode(arg._meta), arg.pk),)))
 
         self._arguments = json.dumps(serialize_me)
+        self.__dict__.pop('_arguments_cache', None)
 
     @property
     def details(self):
@@ -453,6 +502,25 @@ class ActivityLog(amo.models.ModelBase):
         return amo.LOG_BY_ID[self.action]
 
     def to_string(self, type_=None):
+        """
+        Render the log, for the `type_` format if given. The output is cached
+        for `settings.ACTIVITY_LOG_STRING_CACHE_TIMEOUT` seconds so pages
+        listing logs don't need to resolve their arguments.
+        """
+        timeout = settings.ACTIVITY_LOG_STRING_CACHE_TIMEOUT
+        if not timeout or not self.pk:
+            return self._to_string(type_)
+
+        key = '%s:activitylog:%s:%s:%s' % (settings.CACHE_PREFIX, self.pk,
+                                           type_ or '',
+                                           translation.get_language())
+        rendered = cache.get(key)
+        if rendered is None:
+            rendered = self._to_string(type_)
+            cache.set(key, rendered, timeout)
+        return rendered
+
+    def _to_string(self, type_=None):
         log_type = amo.LOG_BY_ID[self.action]
         if type_ and hasattr(log_type, '%s_format' % type_):
             format = getattr(log_type, '%s_format' % type_)
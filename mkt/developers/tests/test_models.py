@@ -1,8 +1,10 @@
+import json
 from datetime import datetime, timedelta
 from os import path
 
 from django.core.urlresolvers import NoReverseMatch
-from django.test.utils import override_settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
 
 from mock import Mock, patch
 from nose.tools import eq_, ok_
@@ -89,6 +91,60 @@ class TestActivityLogCount(amo.tests.TestCase):
         eq_(len(ActivityLog.objects.for_developer()), 1)
 
 
+class TestActivityLogArguments(amo.tests.TestCase):
+    fixtures = fixture('webapp_337141', 'user_2519')
+
+    def setUp(self):
+        self.user = UserProfile.objects.get(pk=2519)
+        amo.set_user(self.user)
+        self.app = Webapp.objects.get(pk=337141)
+
+    def tearDown(self):
+        amo.set_user(None)
+
+    def test_arguments(self):
+        al = amo.log(amo.LOG.ADD_VERSION, self.app.current_version, self.app,
+                     'foo')
+        al = ActivityLog.objects.get(pk=al.pk)
+        eq_(al.arguments, [self.app.current_version, self.app, 'foo'])
+
+    def _resolve_all(self):
+        logs = list(ActivityLog.objects.no_cache().all())
+        with CaptureQueriesContext(connection) as queries:
+            for al in logs:
+                eq_(al.arguments, [self.app.current_version, self.app])
+                eq_(al.user, self.user)
+        return len(queries)
+
+    def test_arguments_bulk(self):
+        amo.log(amo.LOG.ADD_VERSION, self.app.current_version, self.app)
+        num_queries = self._resolve_all()
+        for x in range(4):
+            amo.log(amo.LOG.ADD_VERSION, self.app.current_version, self.app)
+        # The queries don't depend on the number of logs.
+        eq_(self._resolve_all(), num_queries)
+
+    def test_arguments_deleted(self):
+        al = amo.log(amo.LOG.EDIT_VERSION, self.app)
+        al.update(_arguments=json.dumps([{'webapps.webapp': self.app.pk},
+                                         {'webapps.webapp': 12345}]))
+        eq_(ActivityLog.objects.get(pk=al.pk).arguments, [self.app])
+
+    def test_arguments_garbage(self):
+        al = amo.log(amo.LOG.CUSTOM_TEXT, 'hi')
+        al.update(_arguments='garbage')
+        eq_(ActivityLog.objects.get(pk=al.pk).arguments, None)
+
+    def test_to_string_cached(self):
+        al = amo.log(amo.LOG.EDIT_VERSION, self.app)
+        al = ActivityLog.objects.get(pk=al.pk)
+        with self.settings(ACTIVITY_LOG_STRING_CACHE_TIMEOUT=60):
+            rendered = al.to_string()
+            al = ActivityLog.objects.get(pk=al.pk)
+            with self.assertNumQueries(0):
+                eq_(al.to_string(), rendered)
+
+
 class TestPaymentAccount(Patcher, amo.tests.TestCase):
     fixtures = fixture('webapp_337141', 'user_999')
 
@@ -23,7 +23,19 @@ def get_slug_multifield():
     }
 
 
-class FeedAppIndexer(BaseIndexer):
+class BaseFeedIndexer(BaseIndexer):
+    @classmethod
+    def indexed(cls, ids):
+        """
+        Feed elements changed: make them searchable right away, then
+        invalidate the cached feeds.
+        """
+        from mkt.feed.utils import invalidate_feed_cache
+        cls.refresh_index()
+        invalidate_feed_cache()
+
+
+class FeedAppIndexer(BaseFeedIndexer):
     @classmethod
     def get_model(cls):
         """Returns the Django model this MappingType relates to"""
@@ -96,7 +108,7 @@ class FeedAppIndexer(BaseIndexer):
         return doc
 
 
-class FeedBrandIndexer(BaseIndexer):
+class FeedBrandIndexer(BaseFeedIndexer):
     @classmethod
     def get_model(cls):
         from mkt.feed.models import FeedBrand
@@ -136,7 +148,7 @@ class FeedBrandIndexer(BaseIndexer):
         }
 
 
-class FeedCollectionIndexer(BaseIndexer):
+class FeedCollectionIndexer(BaseFeedIndexer):
     @classmethod
     def get_model(cls):
         from mkt.feed.models import FeedCollection
@@ -212,7 +224,7 @@ class FeedCollectionIndexer(BaseIndexer):
         return doc
 
 
-class FeedShelfIndexer(BaseIndexer):
+class FeedShelfIndexer(BaseFeedIndexer):
     @classmethod
     def get_model(cls):
         from mkt.feed.models import FeedShelf
@@ -273,7 +285,7 @@ class FeedShelfIndexer(BaseIndexer):
         return doc
 
 
-class FeedItemIndexer(BaseIndexer):
+class FeedItemIndexer(BaseFeedIndexer):
     @classmethod
     def get_model(cls):
         from mkt.feed.models import FeedItem
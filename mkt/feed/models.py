@@ -35,6 +35,7 @@ from mkt.webapps.tasks import index_webapps
 from .constants import (BRAND_LAYOUT_CHOICES, BRAND_TYPE_CHOICES,
                         COLLECTION_TYPE_CHOICES,
                         FEEDAPP_TYPE_CHOICES, FEED_COLOR_CHOICES)
+from .utils import invalidate_feed_cache
 
 
 class BaseFeedCollection(amo.models.ModelBase):
@@ -436,6 +437,7 @@ def update_search_index(sender, instance, **kw):
           dispatch_uid='feeditem.search.unindex')
 def delete_search_index(sender, instance, **kw):
     instance.get_indexer().unindex(instance.id)
+    invalidate_feed_cache()
 
 
 # Save translations when saving instance with translated fields.
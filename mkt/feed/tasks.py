@@ -0,0 +1,35 @@
+import logging
+
+from django.contrib.auth.models import AnonymousUser
+from django.utils import translation
+
+from celeryutils import task
+from rest_framework.request import Request
+from test_utils import RequestFactory
+
+import mkt
+
+from .utils import unlock_feed_refresh
+
+
+task_log = logging.getLogger('z.task')
+
+
+@task
+def refresh_feed_cache(key, path, region, api_version, lang, **kw):
+    """Render the feed at `path` again and cache it under `key`."""
+    from mkt.feed.views import FeedView
+
+    task_log.info('Refreshing the cached feed at %s for region %s.'
+                  % (path, region))
+    request = RequestFactory().get(path)
+    request.API = True
+    request.API_VERSION = api_version
+    request.REGION = mkt.regions.REGION_LOOKUP[region]
+    request.user = AnonymousUser()
+    mkt.regions.set_region(request.REGION)
+    try:
+        with translation.override(lang):
+            FeedView().render_and_cache(Request(request), key)
+    finally:
+        unlock_feed_refresh(key)
@@ -17,6 +17,7 @@ from mkt.api.tests.test_oauth import RestOAuth
 from mkt.feed.models import (FeedApp, FeedBrand, FeedCollection, FeedItem,
                              FeedShelf)
 from mkt.feed.tests.test_models import FeedAppMixin, FeedTestMixin
+from mkt.feed.utils import invalidate_feed_cache
 from mkt.feed.views import FeedView
 from mkt.webapps.models import Preview, Webapp
 
@@ -1198,6 +1199,60 @@ class TestFeedView(BaseTestFeedESView, BaseTestFeedItemViewSet):
             eq_(data['objects'][i]['id'], feed_item.id)
 
 
+class TestFeedViewCache(amo.tests.TestCase):
+
+    def setUp(self):
+        self.url = reverse('api-v2:feed.get')
+        patcher = mock.patch.object(FeedView, 'render_feed')
+        self.render_feed = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.render_feed.return_value = ({'objects': [{'id': 1}]}, 200, [42])
+
+    def _get(self, **kwargs):
+        with self.settings(FEED_CACHE_TIMEOUT=60):
+            res = self.client.get(self.url, kwargs)
+        eq_(res.status_code, 200)
+        eq_(json.loads(res.content), {'objects': [{'id': 1}]})
+        return res
+
+    def test_cached(self):
+        self._get()
+        self._get()
+        eq_(self.render_feed.call_count, 1)
+
+    def test_cache_key(self):
+        self._get(region='us')
+        self._get(region='br')
+        self._get(region='br', carrier='telefonica')
+        self._get(region='br', carrier='telefonica', lang='fr')
+        eq_(self.render_feed.call_count, 4)
+
+    @mock.patch('mkt.feed.views.refresh_feed_cache')
+    def test_invalidated_serves_stale(self, refresh_feed_cache):
+        self._get()
+        invalidate_feed_cache()
+        self._get()
+        self._get()
+        eq_(self.render_feed.call_count, 1)
+        # Only one refresh is queued at a time.
+        eq_(refresh_feed_cache.delay.call_count, 1)
+
+    @mock.patch('mkt.feed.views.refresh_feed_cache')
+    def test_invalidate_apps(self, refresh_feed_cache):
+        self._get()
+        invalidate_feed_cache(app_ids=[1])
+        self._get()
+        assert not refresh_feed_cache.delay.called
+        invalidate_feed_cache(app_ids=[42])
+        self._get()
+        assert refresh_feed_cache.delay.called
+
+    def test_disabled(self):
+        self.client.get(self.url)
+        self.client.get(self.url)
+        eq_(self.render_feed.call_count, 2)
+
+
 class TestFeedViewQueries(BaseTestFeedItemViewSet, amo.tests.TestCase):
     fixtures = BaseTestFeedItemViewSet.fixtures + FeedTestMixin.fixtures
 
@@ -0,0 +1,95 @@
+"""
+Cache of the rendered feed.
+
+The feed only changes when curators publish or when one of its apps is
+reindexed, so FeedView stores each rendered feed (per region, carrier, API
+version, language and query string) in the cache under the `feed`
+namespace, which is incremented to invalidate every feed at once.
+
+A copy of each rendered feed is also kept outside of the namespace for
+FEED_CACHE_STALE_TIMEOUT seconds. Once the fresh copy has expired or has been
+invalidated, the stale copy is served while a task renders the feed again, so
+that only the very first request for a given feed waits on ES.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+import commonware.log
+
+from amo.utils import cache_ns_key
+
+
+log = commonware.log.getLogger('z.feed')
+
+NAMESPACE = 'feed'
+
+
+def feed_cache_key(region, carrier, api_version, lang, params):
+    """
+    Return the key identifying a feed, without the namespace. `params` is
+    the dict of query string parameters.
+    """
+    params = sorted((k, v) for k, v in params.items()
+                    if k not in ('carrier', 'region'))
+    return hashlib.md5(repr((region, carrier, api_version, lang,
+                             params))).hexdigest()
+
+
+def get_feed_cache(key):
+    """
+    Return a tuple of the cached (data, status) of the feed and whether it
+    is stale, or (None, None) if it isn't cached at all.
+    """
+    cached = cache.get('%s:%s' % (cache_ns_key(NAMESPACE), key))
+    if cached is not None:
+        return cached, False
+    cached = cache.get('feed:stale:%s' % key)
+    if cached is not None:
+        return cached, True
+    return None, None
+
+
+def set_feed_cache(key, data, app_ids=()):
+    """
+    Cache a rendered feed and remember which apps are in it, so that
+    reindexing any of those apps invalidates the feeds.
+    """
+    ns_key = cache_ns_key(NAMESPACE)
+    cache.set('%s:%s' % (ns_key, key), data, settings.FEED_CACHE_TIMEOUT)
+    cache.set('feed:stale:%s' % key, data, settings.FEED_CACHE_STALE_TIMEOUT)
+
+    if app_ids:
+        apps_key = '%s:app_ids' % ns_key
+        cached_ids = cache.get(apps_key) or set()
+        if not cached_ids.issuperset(app_ids):
+            cache.set(apps_key, cached_ids | set(app_ids),
+                      settings.FEED_CACHE_TIMEOUT)
+
+
+def lock_feed_refresh(key):
+    """
+    Return True if the caller should refresh the feed, False if another
+    refresh of the same feed is already under way.
+    """
+    return cache.add('feed:refresh:%s' % key, time.time(),
+                     settings.FEED_CACHE_REFRESH_TIMEOUT)
+
+
+def unlock_feed_refresh(key):
+    cache.delete('feed:refresh:%s' % key)
+
+
+def invalidate_feed_cache(app_ids=None):
+    """
+    Invalidate every cached feed. If `app_ids` are passed, only invalidate
+    if one of those apps is in a cached feed.
+    """
+    if app_ids is not None:
+        apps_key = '%s:app_ids' % cache_ns_key(NAMESPACE)
+        if not (cache.get(apps_key) or set()).intersection(app_ids):
+            return
+    log.info('Invalidating the feed cache.')
+    cache_ns_key(NAMESPACE, increment=True)
@@ -1,5 +1,6 @@
 from django.conf import settings
 from django.db.models import Q
+from django.utils import translation
 
 from django_statsd.clients import statsd
 from elasticsearch_dsl import filter as es_filter
@@ -32,6 +33,9 @@ from .serializers import (FeedAppESSerializer, FeedAppSerializer,
                           FeedCollectionESSerializer, FeedCollectionSerializer,
                           FeedItemESSerializer, FeedItemSerializer,
                           FeedShelfESSerializer, FeedShelfSerializer)
+from .tasks import refresh_feed_cache
+from .utils import (feed_cache_key, get_feed_cache, lock_feed_refresh,
+                    set_feed_cache)
 
 
 class BaseFeedCollectionViewSet(CORSMixin, SlugOrIdMixin, MarketplaceView,
@@ -463,7 +467,18 @@ class FeedView(BaseFeedESView):
 
         return sq.filter(es_filter.Bool(should=filters))
 
-    def _get(self, request, *args, **kwargs):
+    def get_cache_key(self, request):
+        carrier = request.QUERY_PARAMS.get('carrier')
+        return feed_cache_key(request.REGION.id, carrier,
+                              getattr(request, 'API_VERSION', None),
+                              translation.get_language(),
+                              request.QUERY_PARAMS)
+
+    def render_feed(self, request):
+        """
+        Render the feed, returning a tuple of the response data, status code
+        and ids of the apps in the feed.
+        """
         es = FeedItemIndexer.get_es()
 
         # Parse carrier and region.
@@ -482,8 +497,7 @@ class FeedView(BaseFeedESView):
             sq = self.get_es_feed_query(FeedItemIndexer.search(using=es))
             feed_items = sq.execute().hits
             if not feed_items:
-                return response.Response({'objects': []},
-                                         status=status.HTTP_404_NOT_FOUND)
+                return {'objects': []}, status.HTTP_404_NOT_FOUND, []
 
         # Set up serializer context.
         feed_element_map = {
@@ -513,8 +527,38 @@ class FeedView(BaseFeedESView):
             'request': request
         }).data
 
-        return response.Response({'objects': feed_items},
-                                 status=status.HTTP_200_OK)
+        return {'objects': feed_items}, status.HTTP_200_OK, apps
+
+    def render_and_cache(self, request, key):
+        """Render the feed and cache it, returns (data, status code)."""
+        data, status_code, app_ids = self.render_feed(request)
+        set_feed_cache(key, (data, status_code), app_ids)
+        return data, status_code
+
+    def _get(self, request, *args, **kwargs):
+        if not settings.FEED_CACHE_TIMEOUT:
+            data, status_code, app_ids = self.render_feed(request)
+            return response.Response(data, status=status_code)
+
+        key = self.get_cache_key(request)
+        cached, stale = get_feed_cache(key)
+        if cached is None:
+            # Nothing to serve, not even a stale copy.
+            statsd.incr('mkt.feed.cache.miss')
+            cached = self.render_and_cache(request, key)
+        elif stale:
+            # Serve the stale copy while a task refreshes it.
+            statsd.incr('mkt.feed.cache.stale')
+            if lock_feed_refresh(key):
+                refresh_feed_cache.delay(
+                    key, request.get_full_path(), request.REGION.slug,
+                    getattr(request, 'API_VERSION', None),
+                    translation.get_language())
+        else:
+            statsd.incr('mkt.feed.cache.hit')
+
+        data, status_code = cached
+        return response.Response(data, status=status_code)
 
     def get(self, request, *args, **kwargs):
         with statsd.timer('mkt.feed.view'):
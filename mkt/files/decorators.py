@@ -50,7 +50,7 @@ def last_modified(request, obj, key=None, **kw):
 
 
 def etag(request, obj, key=None, **kw):
-    return _get_value(obj, key, 'md5')
+    return _get_value(obj, key, 'crc32')
 
 
 def webapp_file_view(func, **kwargs):
@@ -67,7 +67,7 @@ def webapp_file_view(func, **kwargs):
 
         response = func(request, obj, *args, **kw)
         if obj.selected:
-            response['ETag'] = '"%s"' % obj.selected.get('md5')
+            response['ETag'] = '"%s"' % obj.selected.get('crc32')
             response['Last-Modified'] = http_date(obj.selected.get('modified'))
         return response
     return wrapper
@@ -89,7 +89,7 @@ def compare_webapp_file_view(func, **kwargs):
 
         response = func(request, obj, *args, **kw)
         if obj.left.selected:
-            response['ETag'] = '"%s"' % obj.left.selected.get('md5')
+            response['ETag'] = '"%s"' % obj.left.selected.get('crc32')
             response['Last-Modified'] = http_date(obj.left.selected
                                                           .get('modified'))
         return response
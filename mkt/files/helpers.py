@@ -1,10 +1,14 @@
 import codecs
+import contextlib
+import difflib
+import hashlib
 import json
 import mimetypes
 import os
-import stat
+import time
 
 from django.conf import settings
+from django.core.cache import cache
 from django.core.files.storage import default_storage as storage
 from django.core.urlresolvers import reverse
 from django.template.defaultfilters import filesizeformat
@@ -13,15 +17,14 @@ from django.utils.encoding import smart_unicode
 
 import commonware.log
 import jinja2
-from cache_nuggets.lib import memoize, Message
+from cache_nuggets.lib import Message
 from jingo import env, register
 from tower import ugettext as _
 from validator.testcases.packagelayout import (blacklisted_extensions,
                                                blacklisted_magic_numbers)
 
 import amo
-from amo.utils import rm_local_tmp_dir
-from mkt.files.utils import extract_xpi, get_md5
+from mkt.files.utils import SafeUnzip
 
 
 # Allow files with a shebang through.
@@ -31,6 +34,16 @@ blacklisted_extensions = [
     b for b in list(blacklisted_extensions) if b != 'sh']
 task_log = commonware.log.getLogger('z.task')
 
+# How the files of the left zip file compare to the right one in a diff.
+DIFF_ADDED = 'added'
+DIFF_REMOVED = 'removed'
+DIFF_CHANGED = 'changed'
+DIFF_UNCHANGED = 'unchanged'
+
+# Entries of the listing cached under each key, so that the listing of big
+# packages doesn't go over the memcached item size limit.
+LISTING_CHUNK_SIZE = 500
+
 
 @register.function
 def file_viewer_class(value, key):
@@ -64,9 +77,10 @@ def file_tree(files, selected):
 
 class FileViewer(object):
     """
-    Provide access to a storage-managed file by copying it locally and
-    extracting info from it. `src` is a storage-managed path and `dest` is a
-    local temp path.
+    Provide access to a storage-managed zip file without extracting it. The
+    listing is built from the zip central directory and cached under the file
+    hash, the files themselves are only read when they are selected. `src` is
+    a storage-managed path.
     """
 
     def __init__(self, file_obj):
@@ -75,9 +89,7 @@ class FileViewer(object):
         self.src = (file_obj.guarded_file_path
                     if file_obj.status == amo.STATUS_DISABLED
                     else file_obj.file_path)
-        self.dest = os.path.join(settings.TMP_PATH, 'file_viewer',
-                                 str(file_obj.pk))
-        self._files, self.selected = None, None
+        self._files, self._listing, self.selected = None, None, None
 
     def __str__(self):
         return str(self.file.id)
@@ -86,42 +98,90 @@ class FileViewer(object):
         return ('%s:file-viewer:extraction-in-progress:%s' %
                 (settings.CACHE_PREFIX, self.file.id))
 
-    def extract(self):
+    def _content_id(self):
+        # The listing only depends on the contents of the zip file, so it is
+        # shared by every file with the same hash.
+        return self.file.hash or self.file.id
+
+    def _listing_cache_key(self, chunk=None):
+        key = 'file-viewer:listing:%s' % self._content_id()
+        return key if chunk is None else '%s:%s' % (key, chunk)
+
+    def _cache_listing(self):
         """
-        Will make all the directories and expand the files.
-        Raises error on nasty files.
+        Caches the listing in chunks of LISTING_CHUNK_SIZE entries. The number
+        of chunks is stored last, under its own key.
         """
-        try:
-            os.makedirs(os.path.dirname(self.dest))
-        except OSError, err:
-            pass
+        timeout = settings.FILE_VIEWER_CACHE_TIMEOUT
+        chunks = [self._listing[i:i + LISTING_CHUNK_SIZE]
+                  for i in range(0, len(self._listing), LISTING_CHUNK_SIZE)]
+        cache.set_many(dict((self._listing_cache_key(i), chunk)
+                            for i, chunk in enumerate(chunks)), timeout)
+        cache.set(self._listing_cache_key(), len(chunks), timeout)
+
+    def _get_cached_listing(self):
+        """The cached listing, or None if it or any of its chunks is gone."""
+        count = cache.get(self._listing_cache_key())
+        if count is None:
+            return None
+        keys = [self._listing_cache_key(i) for i in range(count)]
+        chunks = cache.get_many(keys)
+        if len(chunks) != count:
+            return None
+        return [entry for key in keys for entry in chunks[key]]
+
+    @contextlib.contextmanager
+    def _open(self):
+        """Open the zip file, once its central directory has been checked."""
+        with storage.open(self.src, 'rb') as fobj:
+            zip = SafeUnzip(fobj)
+            zip.is_valid()
+            yield zip.zip
 
-        # This is called `extract_xpi` but it unzips like a zip file.
+    def extract(self):
+        """
+        Will read the listing from the zip central directory and cache it,
+        nothing is written to disk. Raises error on nasty files.
+        """
         try:
-            extract_xpi(self.src, self.dest, expand=True)
+            with self._open() as zip:
+                self._listing = self._get_listing(zip.infolist())
         except Exception, err:
-            task_log.error('Error (%s) extracting %s' % (err, self.src))
+            task_log.error('Error (%s) reading %s' % (err, self.src))
             raise
+        self._cache_listing()
+        if self._get_cached_listing() is None:
+            # Only this viewer will have the listing, the next requests will
+            # read the zip file again.
+            task_log.error('Could not cache the listing of %s (%s entries).'
+                           % (self.src, len(self._listing)))
 
     def cleanup(self):
-        if os.path.exists(self.dest):
-            rm_local_tmp_dir(self.dest)
+        count = cache.get(self._listing_cache_key()) or 0
+        cache.delete_many([self._listing_cache_key(i) for i in range(count)] +
+                          [self._listing_cache_key()])
+        self._files, self._listing = None, None
 
     def is_extracted(self):
-        """If the file has been extracted or not."""
-        return (os.path.exists(self.dest) and not
-                Message(self._extraction_cache_key()).get())
+        """If the listing has been read or not."""
+        if Message(self._extraction_cache_key()).get():
+            return False
+        if self._listing is None:
+            self._listing = self._get_cached_listing()
+        return self._listing is not None
 
-    def _is_binary(self, mimetype, path):
-        """Uses the filename to see if the file can be shown in HTML or not."""
+    def _is_binary(self, mimetype, path, head=None):
+        """
+        Uses the filename, and the first bytes of the file if given, to see
+        if the file can be shown in HTML or not.
+        """
         # Re-use the blacklisted data from amo-validator to spot binaries.
         ext = os.path.splitext(path)[1][1:]
         if ext in blacklisted_extensions:
             return True
 
-        if os.path.exists(path) and not os.path.isdir(path):
-            with storage.open(path, 'r') as rfile:
-                bytes = tuple(map(ord, rfile.read(4)))
+        if head:
+            bytes = tuple(map(ord, head[:4]))
             if any(bytes[:len(x)] == x for x in blacklisted_magic_numbers):
                 return True
 
@@ -132,6 +192,21 @@ class FileViewer(object):
 
         return False
 
+    def read_member(self, selected, size=-1):
+        """Reads `size` bytes, or all of them, of a file of the listing."""
+        with self._open() as zip:
+            return zip.open(selected['member']).read(size)
+
+    def iter_member(self, selected, chunk_size=64 * 1024):
+        """Yields the content of a file of the listing, chunk by chunk."""
+        with self._open() as zip:
+            member = zip.open(selected['member'])
+            while True:
+                chunk = member.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
     def read_file(self, allow_empty=False):
         """
         Reads the file. Imposes a file limit and tries to cope with
@@ -147,7 +222,7 @@ class FileViewer(object):
                 file_data = self._process_manifest(file_data)
 
             return file_data
-        except (IOError, OSError):
+        except (IOError, OSError, KeyError):
             self.selected['msg'] = _('That file no longer exists.')
             return ''
 
@@ -162,17 +237,16 @@ class FileViewer(object):
             self.selected['msg'] = msg
             return ''
 
-        with storage.open(self.selected['full'], 'r') as opened:
-            cont = opened.read()
-            codec = 'utf-16' if cont.startswith(codecs.BOM_UTF16) else 'utf-8'
-            try:
-                return cont.decode(codec)
-            except UnicodeDecodeError:
-                cont = cont.decode(codec, 'ignore')
-                #L10n: {0} is the filename.
-                self.selected['msg'] = (
-                    _('Problems decoding {0}.').format(codec))
-                return cont
+        cont = self.read_member(self.selected)
+        codec = 'utf-16' if cont.startswith(codecs.BOM_UTF16) else 'utf-8'
+        try:
+            return cont.decode(codec)
+        except UnicodeDecodeError:
+            cont = cont.decode(codec, 'ignore')
+            #L10n: {0} is the filename.
+            self.selected['msg'] = (
+                _('Problems decoding {0}.').format(codec))
+            return cont
 
     def _process_manifest(self, data):
         """
@@ -204,6 +278,17 @@ class FileViewer(object):
 
     def select(self, file_):
         self.selected = self.get_files().get(file_)
+        selected = self.selected
+        if (selected and not selected['directory'] and
+            selected['binary'] is not True):
+            # Only the filename is used when building the listing, look at
+            # the first bytes of the selected file too.
+            try:
+                head = self.read_member(selected, 4)
+            except (IOError, OSError, KeyError):
+                return
+            selected['binary'] = self._is_binary(selected['mimetype'],
+                                                 selected['short'], head)
 
     def is_binary(self):
         if self.selected:
@@ -238,13 +323,19 @@ class FileViewer(object):
 
         if not self.is_extracted():
             return {}
-        # In case a cron job comes along and deletes the files
-        # mid tree building.
-        try:
-            self._files = self._get_files()
-            return self._files
-        except (OSError, IOError):
-            return {}
+
+        self._files = SortedDict()
+        for short, value in self._listing:
+            value = dict(value)
+            value.update({
+                'url': reverse('mkt.files.list',
+                               args=[self.file.id, 'file', short]),
+                'url_serve': reverse('mkt.files.redirect',
+                                     args=[self.file.id, short]),
+                'version': self.file.version.version,
+            })
+            self._files[short] = value
+        return self._files
 
     def truncate(self, filename, pre_length=15, post_length=10,
                  ellipsis=u'..'):
@@ -283,51 +374,54 @@ class FileViewer(object):
                 return short
         return 'plain'
 
-    @memoize(prefix='file-viewer', time=60 * 60)
-    def _get_files(self):
-        all_files, res = [], SortedDict()
-        # Not using os.path.walk so we get just the right order.
-
-        def iterate(path):
-            path_dirs, path_files = storage.listdir(path)
-            for dirname in sorted(path_dirs):
-                full = os.path.join(path, dirname)
-                all_files.append(full)
-                iterate(full)
-
-            for filename in sorted(path_files):
-                full = os.path.join(path, filename)
-                all_files.append(full)
-
-        iterate(self.dest)
-
-        for path in all_files:
-            filename = smart_unicode(os.path.basename(path), errors='replace')
-            short = smart_unicode(path[len(self.dest) + 1:], errors='replace')
+    def _get_listing(self, infolist):
+        """
+        Returns a list of (short, value) pairs built from the zip central
+        directory. Directories come first, each followed by its contents, then
+        the files, like when walking the extracted zip file.
+        """
+        entries = {}
+        for info in infolist:
+            name = info.filename.rstrip('/')
+            if not name:
+                continue
+            directory = info.filename.endswith('/')
+            parts = name.split('/')
+            # Parent directories don't have to be in the zip file.
+            for depth in range(1, len(parts)):
+                entries.setdefault('/'.join(parts[:depth]),
+                                   (None, info, True))
+            entries[name] = (None if directory else name, info, directory)
+
+        def order(name):
+            parts = smart_unicode(name, errors='replace').split('/')
+            return ([(0, part) for part in parts[:-1]] +
+                    [(int(not entries[name][2]), parts[-1])])
+
+        res = []
+        for name in sorted(entries, key=order):
+            member, info, directory = entries[name]
+            short = smart_unicode(name, errors='replace')
+            filename = short.split('/')[-1]
             mime, encoding = mimetypes.guess_type(filename)
             if not mime and filename == 'manifest.webapp':
                 mime = 'application/x-web-app-manifest+json'
-            directory = os.path.isdir(path)
 
-            res[short] = {
-                'binary': self._is_binary(mime, path),
-                'depth': short.count(os.sep),
+            res.append((short, {
+                'binary': False if directory else self._is_binary(mime,
+                                                                  filename),
+                'crc32': '' if directory else '%08x' % info.CRC,
+                'depth': short.count('/'),
                 'directory': directory,
                 'filename': filename,
-                'full': path,
-                'md5': get_md5(path) if not directory else '',
+                'member': member,
                 'mimetype': mime or 'application/octet-stream',
                 'syntax': self.get_syntax(filename),
-                'modified': os.stat(path)[stat.ST_MTIME],
+                'modified': int(time.mktime(info.date_time + (0, 0, -1))),
                 'short': short,
-                'size': os.stat(path)[stat.ST_SIZE],
+                'size': 0 if directory else info.file_size,
                 'truncated': self.truncate(filename),
-                'url': reverse('mkt.files.list',
-                               args=[self.file.id, 'file', short]),
-                'url_serve': reverse('mkt.files.redirect',
-                                     args=[self.file.id, short]),
-                'version': self.file.version.version,
-            }
+            }))
 
         return res
 
@@ -339,6 +433,7 @@ class DiffHelper(object):
         self.right = FileViewer(right)
         self.addon = self.left.addon
         self.key = None
+        self._index = None
 
     def __str__(self):
         return '%s:%s' % (self.left, self.right)
@@ -358,7 +453,66 @@ class DiffHelper(object):
                        args=[self.left.file.id, self.right.file.id,
                              'file', short])
 
-    #@memoize(prefix='file-viewer-get-files', time=60 * 60)
+    def get_diff_index(self):
+        """
+        Returns a SortedDict of the files, directories aside, of both zip files
+        to DIFF_ADDED, DIFF_REMOVED, DIFF_CHANGED or DIFF_UNCHANGED. The left
+        file is compared to the right one using the size and CRC32 of the
+        listings, so nothing is read from the zip files.
+        """
+        if self._index is not None:
+            return self._index
+
+        left_files = self.left.get_files()
+        right_files = self.right.get_files()
+        digest = lambda file: (None if not file or file['directory']
+                               else (file['crc32'], file['size']))
+        self._index = SortedDict()
+        for key, file in left_files.items():
+            if file['directory']:
+                continue
+            right = digest(right_files.get(key))
+            if right is None:
+                self._index[key] = DIFF_ADDED
+            elif right != digest(file):
+                self._index[key] = DIFF_CHANGED
+            else:
+                self._index[key] = DIFF_UNCHANGED
+        for key, file in right_files.items():
+            if not file['directory'] and digest(left_files.get(key)) is None:
+                self._index[key] = DIFF_REMOVED
+        return self._index
+
+    def _diff_cache_key(self):
+        key = hashlib.md5(repr((self.left._content_id(),
+                                self.right._content_id(), self.key)))
+        return 'file-viewer:diff:%s' % key.hexdigest()
+
+    def get_unified_diff(self):
+        """
+        Returns the unified diff from the right selected file to the left one,
+        or None if they are not changed text files. Diffs are cached under
+        the hashes of both zip files.
+        """
+        if (self.get_diff_index().get(self.key) != DIFF_CHANGED or
+            not self.is_diffable()):
+            return None
+
+        limit = settings.FILE_VIEWER_SIZE_LIMIT
+        if (self.left.selected['size'] > limit or
+            self.right.selected['size'] > limit):
+            return None
+
+        key = self._diff_cache_key()
+        diff = cache.get(key)
+        if diff is None:
+            left, right = self.read_file()
+            diff = u''.join(difflib.unified_diff(
+                right.splitlines(True), left.splitlines(True),
+                u'a/%s' % self.key, u'b/%s' % self.key))
+            cache.set(key, diff, settings.FILE_VIEWER_CACHE_TIMEOUT)
+        return diff
+
     def get_files(self):
         """
         Get the files from the primary and:
@@ -367,10 +521,14 @@ class DiffHelper(object):
         """
         left_files = self.left.get_files()
         right_files = self.right.get_files()
+        index = self.get_diff_index()
         different = []
         for key, file in left_files.items():
             file['url'] = self.get_url(file['short'])
-            diff = file['md5'] != right_files.get(key, {}).get('md5')
+            if file['directory']:
+                diff = key not in right_files
+            else:
+                diff = index[key] != DIFF_UNCHANGED
             file['diff'] = diff
             if diff:
                 different.append(file)
@@ -384,7 +542,6 @@ class DiffHelper(object):
 
         return left_files
 
-    #@memoize(prefix='file-viewer-get-deleted-files', time=60 * 60)
     def get_deleted_files(self):
         """
         Get files that exist in right, but not in left. These
@@ -17,7 +17,7 @@ def extract_file(viewer, **kw):
     msg.delete()
     # This flag is so that we can signal when the extraction is completed.
     flag = Message(viewer._extraction_cache_key())
-    task_log.debug('[1@%s] Unzipping %s for file viewer.' % (
+    task_log.debug('[1@%s] Reading %s for file viewer.' % (
         extract_file.rate_limit, viewer))
 
     try:
@@ -29,8 +29,8 @@ def extract_file(viewer, **kw):
                      % (viewer, err))
         else:
             msg.save(_('There was an error accessing file %s.') % viewer)
-        task_log.error('[1@%s] Error unzipping: %s' % (extract_file.rate_limit,
-                                                       err))
+        task_log.error('[1@%s] Error reading: %s' % (extract_file.rate_limit,
+                                                     err))
     finally:
         # Always delete the flag so the file never gets into a bad state.
         flag.delete()
@@ -1,17 +1,22 @@
 # -*- coding: utf-8 -*-
 import os
+import pickle
+import time
 import zipfile
 
 from django import forms
 from django.conf import settings
 from django.core.cache import cache
+from django.core.files.storage import default_storage as storage
 from django.core.urlresolvers import reverse
 
+from cache_nuggets.lib import Message
 from mock import Mock, patch
 from nose.tools import eq_
 
 import amo.tests
-from mkt.files.helpers import FileViewer, DiffHelper
+from mkt.files.helpers import (DIFF_ADDED, DIFF_CHANGED, DIFF_REMOVED,
+                               DIFF_UNCHANGED, DiffHelper, FileViewer)
 from mkt.files.utils import SafeUnzip
 
 
@@ -22,6 +27,7 @@ get_file = lambda x: '%s/%s' % (root, x)
 def make_file(pk, file_path, **kwargs):
     obj = Mock()
     obj.id = pk
+    obj.hash = ''
     for k, v in kwargs.items():
         setattr(obj, k, v)
     obj.file_path = file_path
@@ -31,15 +37,36 @@ def make_file(pk, file_path, **kwargs):
     return obj
 
 
+def make_zip(dest, files, src=None, remove=()):
+    """
+    Write a zip file to `dest` with the `files` dict of names to contents,
+    and the files of the zip file `src` that are not in `remove`.
+    """
+    tmp = dest + '.tmp'
+    with zipfile.ZipFile(tmp, 'w') as new:
+        if src:
+            with zipfile.ZipFile(src) as old:
+                for info in old.infolist():
+                    if (info.filename not in remove and
+                        info.filename not in files):
+                        new.writestr(info, old.read(info))
+        for name, contents in files.items():
+            new.writestr(name, contents)
+    os.rename(tmp, dest)
+
+
 # TODO: It'd be nice if these used packaged app examples but these addons still
 # flex the code so it wasn't converted.
 class TestFileHelper(amo.tests.TestCase):
 
     def setUp(self):
         self.viewer = FileViewer(make_file(1, get_file('dictionary-test.xpi')))
+        self.tmp = os.path.join(settings.TMP_PATH, 'test_file_viewer.zip')
 
     def tearDown(self):
         self.viewer.cleanup()
+        if os.path.exists(self.tmp):
+            os.remove(self.tmp)
 
     def test_files_not_extracted(self):
         eq_(self.viewer.is_extracted(), False)
@@ -54,20 +81,77 @@ class TestFileHelper(amo.tests.TestCase):
         eq_(self.viewer.is_extracted(), True)
 
     def test_recurse_contents(self):
+        # Nested zip files are listed as files, they are not expanded.
         self.viewer.src = get_file('recurse.xpi')
         self.viewer.extract()
         files = self.viewer.get_files()
-        nm = ['recurse/recurse.xpi/chrome/test-root.txt',
-              'recurse/somejar.jar/recurse/recurse.xpi/chrome/test.jar',
-              'recurse/somejar.jar/recurse/recurse.xpi/chrome/test.jar/test']
-        for name in nm:
-            eq_(name in files, True, 'File %r not extracted' % name)
+        assert 'recurse/chrome/test-root.txt' in files
+        eq_(files['recurse/somejar.jar']['directory'], False)
+        assert 'recurse/somejar.jar/recurse' not in files
 
     def test_cleanup(self):
         self.viewer.extract()
         self.viewer.cleanup()
         eq_(self.viewer.is_extracted(), False)
 
+    def test_extract_nothing_written(self):
+        with patch.object(storage, 'save') as save:
+            self.viewer.extract()
+        assert not save.called
+        assert not os.path.exists(os.path.join(settings.TMP_PATH,
+                                               'file_viewer', '1'))
+
+    def test_listing_shared_by_hash(self):
+        self.viewer.file.hash = 'sha256:foo'
+        self.viewer.extract()
+        other = FileViewer(make_file(2, get_file('dictionary-test.xpi'),
+                                     hash='sha256:foo'))
+        with patch.object(FileViewer, '_open') as _open:
+            eq_(other.is_extracted(), True)
+            files = other.get_files()
+        assert not _open.called
+        eq_(files.keys(), self.viewer.get_files().keys())
+        url = reverse('mkt.files.list', args=[2, 'file', 'install.js'])
+        assert files['install.js']['url'].endswith(url)
+
+    def test_listing_not_shared(self):
+        self.viewer.extract()
+        other = FileViewer(make_file(2, get_file('dictionary-test.xpi')))
+        eq_(other.is_extracted(), False)
+
+    def test_big_listing(self):
+        make_zip(self.tmp, dict(('file-%s.txt' % i, '') for i in range(8000)))
+        self.viewer.src = self.tmp
+        limit = 1024 * 1024
+        fits = lambda value: len(pickle.dumps(value, -1)) <= limit
+        set_, set_many = cache.set, cache.set_many
+
+        # Like memcached, don't store values over the item size limit.
+        def check_set(key, value, *args):
+            if fits(value):
+                set_(key, value, *args)
+
+        def check_set_many(data, *args):
+            set_many(dict((k, v) for k, v in data.items() if fits(v)), *args)
+
+        with patch.object(cache, 'set', check_set), \
+                patch.object(cache, 'set_many', check_set_many):
+            self.viewer.extract()
+        assert not fits(self.viewer._listing)
+        other = FileViewer(self.viewer.file)
+        eq_(other.is_extracted(), True)
+        eq_(len(other.get_files()), 8000)
+
+    def test_listing_chunk_evicted(self):
+        self.viewer.extract()
+        cache.delete(self.viewer._listing_cache_key(0))
+        eq_(FileViewer(self.viewer.file).is_extracted(), False)
+
+    def test_extraction_in_progress(self):
+        self.viewer.extract()
+        Message(self.viewer._extraction_cache_key()).save('extracting')
+        eq_(FileViewer(self.viewer.file).is_extracted(), False)
+
     def test_truncate(self):
         truncate = self.viewer.truncate
         for x, y in (['foo.rdf', 'foo.rdf'],
@@ -94,6 +178,26 @@ class TestFileHelper(amo.tests.TestCase):
         eq_(files['__MACOSX']['directory'], True)
         eq_(files['__MACOSX']['binary'], False)
 
+    def test_get_files_central_directory(self):
+        self.viewer.extract()
+        files = self.viewer.get_files()
+        eq_(files['install.js']['crc32'], '193b8fd8')
+        eq_(files['install.js']['size'], 397)
+        eq_(files['install.js']['modified'],
+            time.mktime((2006, 10, 29, 12, 34, 22, 0, 0, -1)))
+        eq_(files['dictionaries']['crc32'], '')
+        eq_(files['dictionaries']['size'], 0)
+
+    def test_get_files_implicit_directories(self):
+        make_zip(self.tmp, {'a/b/c.txt': 'foo', 'd.txt': 'bar'})
+        self.viewer.src = self.tmp
+        self.viewer.extract()
+        files = self.viewer.get_files()
+        eq_(files.keys(), ['a', 'a/b', 'a/b/c.txt', 'd.txt'])
+        eq_(files['a/b']['directory'], True)
+        eq_(files['a/b']['depth'], 1)
+        eq_(files['a/b/c.txt']['directory'], False)
+
     def test_url_file(self):
         self.viewer.extract()
         files = self.viewer.get_files()
@@ -107,12 +211,20 @@ class TestFileHelper(amo.tests.TestCase):
         eq_(files['dictionaries/license.txt']['depth'], 1)
 
     def test_bom(self):
-        dest = os.path.join(settings.TMP_PATH, 'test_bom')
-        open(dest, 'w').write('foo'.encode('utf-16'))
+        make_zip(self.tmp, {'foo': 'foo'.encode('utf-16')})
+        self.viewer.src = self.tmp
+        self.viewer.extract()
         self.viewer.select('foo')
-        self.viewer.selected = {'full': dest, 'size': 1}
         eq_(self.viewer.read_file(), u'foo')
-        os.remove(dest)
+
+    def test_binary_magic_number(self):
+        make_zip(self.tmp, {'foo.txt': 'MZ\x90\x00'})
+        self.viewer.src = self.tmp
+        self.viewer.extract()
+        # Only the filename is looked at until the file is selected.
+        eq_(self.viewer.get_files()['foo.txt']['binary'], False)
+        self.viewer.select('foo.txt')
+        eq_(self.viewer.is_binary(), True)
 
     def test_syntax(self):
         for filename, syntax in [('foo.rdf', 'xml'),
@@ -127,16 +239,14 @@ class TestFileHelper(amo.tests.TestCase):
             eq_(self.viewer.get_syntax(filename), syntax)
 
     def test_file_order(self):
+        make_zip(self.tmp, {'chrome.manifest': '', 'chrome/foo': ''},
+                 src=self.viewer.src)
+        self.viewer.src = self.tmp
         self.viewer.extract()
-        dest = self.viewer.dest
-        open(os.path.join(dest, 'chrome.manifest'), 'w')
-        subdir = os.path.join(dest, 'chrome')
-        os.mkdir(subdir)
-        open(os.path.join(subdir, 'foo'), 'w')
-        cache.clear()
         files = self.viewer.get_files().keys()
         rt = files.index(u'chrome')
         eq_(files[rt:rt + 3], [u'chrome', u'chrome/foo', u'dictionaries'])
+        eq_(files[-1], u'install.rdf')
 
     @patch.object(settings, 'FILE_VIEWER_SIZE_LIMIT', 5)
     def test_file_size(self):
@@ -165,28 +275,45 @@ class TestFileHelper(amo.tests.TestCase):
         eq_(self.viewer.get_default(None), 'manifest.webapp')
 
     def test_delete_mid_read(self):
+        make_zip(self.tmp, {}, src=self.viewer.src)
+        self.viewer.src = self.tmp
         self.viewer.extract()
         self.viewer.select('install.js')
-        os.remove(os.path.join(self.viewer.dest, 'install.js'))
+        make_zip(self.tmp, {}, src=self.tmp, remove=['install.js'])
         res = self.viewer.read_file()
         eq_(res, '')
         assert self.viewer.selected['msg'].startswith('That file no')
 
-    @patch('mkt.files.helpers.get_md5')
-    def test_delete_mid_tree(self, get_md5):
-        get_md5.side_effect = IOError('ow')
+    def test_iter_member(self):
+        make_zip(self.tmp, {'foo.txt': 'some content'})
+        self.viewer.src = self.tmp
         self.viewer.extract()
+        self.viewer.select('foo.txt')
+        chunks = list(self.viewer.iter_member(self.viewer.selected,
+                                              chunk_size=5))
+        eq_(chunks, ['some ', 'conte', 'nt'])
+
+    def test_not_a_zip(self):
+        self.viewer.src = get_file('search.xml')
+        self.assertRaises(zipfile.BadZipfile, self.viewer.extract)
         eq_({}, self.viewer.get_files())
 
 
 class TestDiffHelper(amo.tests.TestCase):
 
     def setUp(self):
-        src = os.path.join(settings.ROOT, get_file('dictionary-test.xpi'))
-        self.helper = DiffHelper(make_file(1, src), make_file(2, src))
+        src = get_file('dictionary-test.xpi')
+        self.paths = [os.path.join(settings.TMP_PATH, 'test_diff_%s.zip' % x)
+                      for x in ('left', 'right')]
+        for path in self.paths:
+            make_zip(path, {}, src=src)
+        self.helper = DiffHelper(make_file(1, self.paths[0]),
+                                 make_file(2, self.paths[1]))
 
     def tearDown(self):
         self.helper.cleanup()
+        for path in self.paths:
+            os.remove(path)
 
     def test_files_not_extracted(self):
         eq_(self.helper.is_extracted(), False)
@@ -205,8 +332,8 @@ class TestDiffHelper(amo.tests.TestCase):
         assert self.helper.is_diffable()
 
     def test_diffable_one_missing(self):
+        self.remove(self.helper.right, 'install.js')
         self.helper.extract()
-        os.remove(os.path.join(self.helper.right.dest, 'install.js'))
         self.helper.select('install.js')
         assert self.helper.is_diffable()
 
@@ -221,8 +348,8 @@ class TestDiffHelper(amo.tests.TestCase):
         assert not self.helper.is_diffable()
 
     def test_diffable_deleted_files(self):
+        self.remove(self.helper.left, 'install.js')
         self.helper.extract()
-        os.remove(os.path.join(self.helper.left.dest, 'install.js'))
         eq_('install.js' in self.helper.get_deleted_files(), True)
 
     def test_diffable_one_binary_same(self):
@@ -232,18 +359,16 @@ class TestDiffHelper(amo.tests.TestCase):
         assert self.helper.is_binary()
 
     def test_diffable_one_binary_diff(self):
+        self.change(self.helper.left, 'asd')
         self.helper.extract()
-        self.change(self.helper.left.dest, 'asd')
-        cache.clear()
         self.helper.select('install.js')
         self.helper.left.selected['binary'] = True
         assert self.helper.is_binary()
 
     def test_diffable_two_binary_diff(self):
+        self.change(self.helper.left, 'asd')
+        self.change(self.helper.right, 'asd123')
         self.helper.extract()
-        self.change(self.helper.left.dest, 'asd')
-        self.change(self.helper.right.dest, 'asd123')
-        cache.clear()
         self.helper.select('install.js')
         self.helper.left.selected['binary'] = True
         self.helper.right.selected['binary'] = True
@@ -257,19 +382,72 @@ class TestDiffHelper(amo.tests.TestCase):
         assert self.helper.left.selected['msg'].startswith('This file')
 
     def test_diffable_parent(self):
-        self.helper.extract()
-        self.change(self.helper.left.dest, 'asd',
+        self.change(self.helper.left, 'asd',
                     filename='__MACOSX/._dictionaries')
-        cache.clear()
+        self.helper.extract()
         files = self.helper.get_files()
         eq_(files['__MACOSX/._dictionaries']['diff'], True)
         eq_(files['__MACOSX']['diff'], True)
+        eq_(files['install.js']['diff'], False)
+
+    def test_diff_index(self):
+        self.change(self.helper.left, 'foo = 1;\n')
+        self.remove(self.helper.left, 'install.rdf')
+        make_zip(self.helper.left.src, {'dictionaries/new.txt': 'foo'},
+                 src=self.helper.left.src)
+        self.helper.extract()
+        with patch.object(FileViewer, '_open') as _open:
+            index = self.helper.get_diff_index()
+        assert not _open.called
+        eq_(index['install.js'], DIFF_CHANGED)
+        eq_(index['install.rdf'], DIFF_REMOVED)
+        eq_(index['dictionaries/new.txt'], DIFF_ADDED)
+        eq_(index['dictionaries/license.txt'], DIFF_UNCHANGED)
+        assert 'dictionaries' not in index
+
+    def test_unified_diff(self):
+        self.change(self.helper.left, 'foo = 1;\n')
+        self.helper.extract()
+        self.helper.select('install.js')
+        diff = self.helper.get_unified_diff()
+        assert diff.startswith(u'--- a/install.js\n+++ b/install.js\n')
+        assert u'\n+foo = 1;\n' in diff
+
+    def test_unified_diff_cached(self):
+        self.change(self.helper.left, 'foo = 1;\n')
+        self.helper.extract()
+        self.helper.select('install.js')
+        diff = self.helper.get_unified_diff()
+        with patch.object(DiffHelper, 'read_file') as read_file:
+            eq_(self.helper.get_unified_diff(), diff)
+        assert not read_file.called
+
+    def test_unified_diff_unchanged(self):
+        self.helper.extract()
+        self.helper.select('install.js')
+        eq_(self.helper.get_unified_diff(), None)
+
+    def test_unified_diff_binary(self):
+        self.change(self.helper.left, 'foo = 1;\n')
+        self.helper.extract()
+        self.helper.select('install.js')
+        self.helper.left.selected['binary'] = True
+        eq_(self.helper.get_unified_diff(), None)
+
+    @patch.object(settings, 'FILE_VIEWER_SIZE_LIMIT', 5)
+    def test_unified_diff_size(self):
+        self.change(self.helper.left, 'foo = 1;\n')
+        self.helper.extract()
+        self.helper.select('install.js')
+        eq_(self.helper.get_unified_diff(), None)
+
+    def change(self, viewer, text, filename='install.js'):
+        with zipfile.ZipFile(viewer.src) as zip:
+            data = zip.read(filename)
+        make_zip(viewer.src, {filename: data + text}, src=viewer.src)
 
-    def change(self, file, text, filename='install.js'):
-        path = os.path.join(file, filename)
-        data = open(path, 'r').read()
-        data += text
-        open(path, 'w').write(data)
+    def remove(self, viewer, filename):
+        make_zip(viewer.src, {}, src=viewer.src, remove=[filename])
 
 
 class TestSafeUnzipFile(amo.tests.TestCase, amo.tests.AMOPaths):
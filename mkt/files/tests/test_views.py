@@ -2,6 +2,7 @@ import json
 import os
 import shutil
 import urlparse
+import zipfile
 
 from django.conf import settings
 from django.core.cache import cache
@@ -10,7 +11,6 @@ from django.utils.http import http_date
 
 from cache_nuggets.lib import Message
 from mock import patch
-from nose import SkipTest
 from nose.tools import eq_
 from pyquery import PyQuery as pq
 
@@ -18,6 +18,7 @@ import amo
 import amo.tests
 from mkt.files.helpers import DiffHelper, FileViewer
 from mkt.files.models import File
+from mkt.files.tests.test_helpers import make_zip
 from mkt.site.fixtures import fixture
 from mkt.users.models import UserProfile
 from mkt.webapps.models import Webapp
@@ -65,6 +66,12 @@ class FilesBase(object):
     def tearDown(self):
         self.file_viewer.cleanup()
 
+    def rezip(self, file_obj, files=None, remove=()):
+        make_zip(file_obj.file_path, files or {}, src=file_obj.file_path,
+                 remove=remove)
+        # The cached listings are now out of date.
+        cache.clear()
+
     def files_redirect(self, file):
         return reverse('mkt.files.redirect', args=[self.file.pk, file])
 
@@ -118,7 +125,7 @@ class FilesBase(object):
         self.file_viewer.extract()
         self.file_viewer.select('manifest.webapp')
         obj = getattr(self.file_viewer, 'left', self.file_viewer)
-        etag = obj.selected.get('md5')
+        etag = obj.selected.get('crc32')
         res = self.client.get(self.file_url('manifest.webapp'),
                               HTTP_IF_NONE_MATCH=etag)
         eq_(res.status_code, 304)
@@ -236,8 +243,7 @@ class TestFileViewer(FilesBase, amo.tests.WebappTestCase):
                     (url, status_code, status))
 
     def add_file(self, name, contents):
-        dest = os.path.join(self.file_viewer.dest, name)
-        open(dest, 'w').write(contents)
+        self.rezip(self.file, {name: contents})
 
     def test_files_xss(self):
         self.file_viewer.extract()
@@ -264,9 +270,6 @@ class TestFileViewer(FilesBase, amo.tests.WebappTestCase):
     def test_content_xss(self):
         self.file_viewer.extract()
         for name in ['file.txt', 'file.html', 'file.htm']:
-            # If you are adding files, you need to clear out the memcache
-            # file listing.
-            cache.clear()
             self.add_file(name, '<script>alert("foo")</script>')
             res = self.client.get(self.file_url(name))
             doc = pq(res.content)
@@ -278,7 +281,7 @@ class TestFileViewer(FilesBase, amo.tests.WebappTestCase):
         self.add_file('file.php', '<script>alert("foo")</script>')
         res = self.client.get(self.file_url('file.php'))
         eq_(res.status_code, 200)
-        assert self.file_viewer.get_files()['file.php']['md5'] in res.content
+        assert self.file_viewer.get_files()['file.php']['crc32'] in res.content
 
     def test_tree_no_file(self):
         self.file_viewer.extract()
@@ -322,15 +325,27 @@ class TestFileViewer(FilesBase, amo.tests.WebappTestCase):
         eq_(res.status_code, 403)
 
     def test_bounce(self):
-        # Don't run this test if the server has x-sendfile turned off.
-        if not settings.XSENDFILE:
-            raise SkipTest()
-
         self.file_viewer.extract()
-        res = self.client.get(self.files_redirect(binary), follow=True)
+        res = self.client.get(self.files_redirect(binary))
+        url = res['Location'][len(settings.STATIC_URL) - 1:]
+        res = self.client.get(url)
         eq_(res.status_code, 200)
-        eq_(res[settings.XSENDFILE_HEADER],
-            self.file_viewer.get_files().get(binary)['full'])
+        eq_(res['Content-Type'], 'image/png')
+        content = zipfile.ZipFile(self.file.file_path).read(binary)
+        eq_(''.join(res.streaming_content), content)
+        eq_(res['Content-Length'], str(len(content)))
+
+    def test_serve_directory(self):
+        self.file_viewer.extract()
+        res = self.client.get(self.files_redirect('icons'))
+        url = res['Location'][len(settings.STATIC_URL) - 1:]
+        eq_(self.client.get(url).status_code, 404)
+
+    def test_no_local_extraction(self):
+        self.client.get(self.file_url(not_binary))
+        dest = os.path.join(settings.TMP_PATH, 'file_viewer',
+                            str(self.file.pk))
+        assert not os.path.exists(dest)
 
     @patch.object(settings, 'FILE_VIEWER_SIZE_LIMIT', 5)
     def test_file_size(self):
@@ -369,10 +384,6 @@ class TestDiffViewer(FilesBase, amo.tests.WebappTestCase):
         return reverse('mkt.files.compare.poll', args=[self.files[0].pk,
                                                        self.files[1].pk])
 
-    def add_file(self, file_obj, name, contents):
-        dest = os.path.join(file_obj.dest, name)
-        open(dest, 'w').write(contents)
-
     def file_url(self, file=None):
         args = [self.files[0].pk, self.files[1].pk]
         if file:
@@ -413,36 +424,64 @@ class TestDiffViewer(FilesBase, amo.tests.WebappTestCase):
         eq_(len(doc('#content-wrapper p')), 4)
 
     def test_view_one_missing(self):
-        self.file_viewer.extract()
-        os.remove(os.path.join(self.file_viewer.right.dest, 'manifest.webapp'))
+        self.rezip(self.files[1], remove=[not_binary])
         res = self.client.get(self.file_url(not_binary))
         doc = pq(res.content)
         eq_(len(doc('pre')), 3)
         eq_(len(doc('#content-wrapper p')), 2)
 
     def test_view_left_binary(self):
-        self.file_viewer.extract()
-        filename = os.path.join(self.file_viewer.left.dest, 'manifest.webapp')
-        open(filename, 'w').write('MZ')
+        self.rezip(self.files[0], {not_binary: 'MZ'})
         res = self.client.get(self.file_url(not_binary))
         assert 'This file is not viewable online' in res.content
 
     def test_view_right_binary(self):
+        self.rezip(self.files[1], {not_binary: 'MZ'})
         self.file_viewer.extract()
-        filename = os.path.join(self.file_viewer.right.dest, 'manifest.webapp')
-        open(filename, 'w').write('MZ')
+        self.file_viewer.select(not_binary)
         assert not self.file_viewer.is_diffable()
         res = self.client.get(self.file_url(not_binary))
         assert 'This file is not viewable online' in res.content
 
     def test_different_tree(self):
-        self.file_viewer.extract()
-        os.remove(os.path.join(self.file_viewer.left.dest, not_binary))
+        self.rezip(self.files[0], remove=[not_binary])
         res = self.client.get(self.file_url(not_binary))
         doc = pq(res.content)
         eq_(doc('h4:last').text(), 'Deleted files:')
         eq_(len(doc('ul.root')), 2)
 
+    def diff_url(self, file):
+        return reverse('mkt.files.compare.diff',
+                       args=[self.files[0].pk, self.files[1].pk, file])
+
+    def test_unchanged_no_diff_link(self):
+        res = self.client.get(self.file_url(not_binary))
+        eq_(res.context.get('diff_url'), None)
+        eq_(self.client.get(self.diff_url(not_binary)).status_code, 404)
+
+    def test_changed_diff_link(self):
+        self.rezip(self.files[0], {'script.js': 'var foo = 1;\n'})
+        res = self.client.get(self.file_url('script.js'))
+        eq_(res.context['diff_url'], self.diff_url('script.js'))
+        eq_(pq(res.content)('#content-wrapper a:last').attr('href'),
+            self.diff_url('script.js'))
+
+    def test_unified_diff(self):
+        self.rezip(self.files[0], {'script.js': 'var foo = 1;\n'})
+        res = self.client.get(self.diff_url('script.js'))
+        eq_(res.status_code, 200)
+        eq_(res['Content-Type'], 'text/plain; charset=utf-8')
+        assert res.content.startswith('--- a/script.js\n+++ b/script.js\n')
+        assert '\n+var foo = 1;\n' in res.content
+
+    def test_unified_diff_binary(self):
+        self.rezip(self.files[0], {binary: 'foo'})
+        eq_(self.client.get(self.diff_url(binary)).status_code, 404)
+
+    def test_unified_diff_anon(self):
+        self.client.logout()
+        eq_(self.client.get(self.diff_url(not_binary)).status_code, 403)
+
     def test_file_chooser_selection(self):
         res = self.client.get(self.file_url())
         doc = pq(res.content)
@@ -15,6 +15,8 @@ file_patterns = patterns('',
 
 compare_patterns = patterns('',
     url(r'^$', views.compare, name='mkt.files.compare'),
+    url(r'^diff/(?P<key>.*)$', views.compare_diff,
+        name='mkt.files.compare.diff'),
     url(r'(?P<type_>fragment|file)/(?P<key>.*)$', views.compare,
         name='mkt.files.compare'),
     url(r'status$', views.compare_poll, name='mkt.files.compare.poll'),
@@ -13,11 +13,12 @@ from cache_nuggets.lib import Message, Token
 from tower import ugettext as _
 
 from amo.decorators import json_view
-from amo.utils import HttpResponseSendFile, urlparams
+from amo.utils import urlparams
 from mkt.access import acl
 from mkt.files import forms
 from mkt.files.decorators import (compare_webapp_file_view, etag, last_modified,
                                   webapp_file_view, webapp_file_view_token)
+from mkt.files.helpers import DIFF_CHANGED
 from mkt.files.tasks import extract_file
 
 
@@ -158,6 +159,10 @@ def compare(request, diff, key=None, type_='file'):
         data['key'] = key
         if diff.is_diffable():
             data['left'], data['right'] = diff.read_file()
+            if diff.get_diff_index().get(key) == DIFF_CHANGED:
+                data['diff_url'] = reverse(
+                    'mkt.files.compare.diff',
+                    args=[diff.left.file.id, diff.right.file.id, key])
 
     else:
         extract_file.delay(diff.left)
@@ -167,6 +172,20 @@ def compare(request, diff, key=None, type_='file'):
     return render(request, 'fileviewer/%s.html' % tmpl, data)
 
 
+@compare_webapp_file_view
+def compare_diff(request, diff, key):
+    """Serve the unified diff of a file changed between both versions."""
+    if not diff.is_extracted():
+        extract_file(diff.left)
+        extract_file(diff.right)
+
+    diff.select(key)
+    content = diff.get_unified_diff()
+    if content is None:
+        raise http.Http404
+    return http.HttpResponse(content, content_type='text/plain; charset=utf-8')
+
+
 @webapp_file_view
 def redirect(request, viewer, key):
     new = Token(data=[viewer.file.id, key])
@@ -185,9 +204,12 @@ def serve(request, viewer, key):
     """
     files = viewer.get_files()
     obj = files.get(key)
-    if not obj:
+    if not obj or obj['directory']:
         log.error(u'Couldn\'t find %s in %s (%d entries) for file %s' %
                   (key, files.keys()[:10], len(files.keys()), viewer.file.id))
         raise http.Http404()
-    return HttpResponseSendFile(request, obj['full'],
-                                content_type=obj['mimetype'])
+    # Stream the file rather than reading it whole, it can be big.
+    response = http.StreamingHttpResponse(viewer.iter_member(obj),
+                                          content_type=obj['mimetype'])
+    response['Content-Length'] = obj['size']
+    return response
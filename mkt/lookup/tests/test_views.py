@@ -36,6 +36,7 @@ from mkt.lookup.views import (_transaction_summary, app_summary,
 from mkt.prices.models import AddonPaymentData, Refund
 from mkt.purchase.models import Contribution
 from mkt.site.fixtures import fixture
+from mkt.users.indexers import UserIndexer
 from mkt.users.models import UserProfile
 from mkt.webapps.models import Addon, AddonUser, Webapp
 
@@ -307,7 +308,7 @@ class SearchTestMixin(object):
         self.assertLoginRedirects(res, self.url)
 
 
-class TestAcctSearch(TestCase, SearchTestMixin):
+class TestAcctSearch(ESTestCase, SearchTestMixin):
     fixtures = fixture('user_10482', 'user_support_staff', 'user_operator')
 
     def setUp(self):
@@ -315,6 +316,11 @@ class TestAcctSearch(TestCase, SearchTestMixin):
         self.url = reverse('lookup.user_search')
         self.user = UserProfile.objects.get(username='clouserw')
         self.login(UserProfile.objects.get(username='support_staff'))
+        # Fixtures don't send the signals that index users.
+        UserIndexer.index_ids(
+            list(UserProfile.objects.values_list('id', flat=True)),
+            no_delay=True)
+        self.refresh('users')
 
     def verify_result(self, data):
         eq_(data['results'][0]['name'], self.user.username)
@@ -326,28 +332,61 @@ class TestAcctSearch(TestCase, SearchTestMixin):
 
     def test_by_username(self):
         self.user.update(username='newusername')
+        self.refresh('users')
         data = self.search(q='newus')
         self.verify_result(data)
 
     def test_by_username_with_dashes(self):
         self.user.update(username='kr-raj')
+        self.refresh('users')
         data = self.search(q='kr-raj')
         self.verify_result(data)
 
     def test_by_display_name(self):
         self.user.update(display_name='Kumar McMillan')
+        self.refresh('users')
         data = self.search(q='mcmill')
         self.verify_result(data)
 
+    def test_by_several_words(self):
+        self.user.update(display_name='Kumar McMillan')
+        self.refresh('users')
+        data = self.search(q='kum mcm')
+        self.verify_result(data)
+        self.search(expect_results=False, q='kum xyz')
+
     def test_by_id(self):
         data = self.search(q=self.user.pk)
         self.verify_result(data)
 
     def test_by_email(self):
         self.user.update(email='fonzi@happydays.com')
+        self.refresh('users')
         data = self.search(q='fonzi')
         self.verify_result(data)
 
+    def test_by_whole_email(self):
+        self.user.update(email='Fonzi@HappyDays.com')
+        self.refresh('users')
+        data = self.search(q='fonzi@happydays.com')
+        self.verify_result(data)
+
+    def test_new_user(self):
+        user = UserProfile.objects.create(username='fonzie',
+                                          email='fonzie@happydays.com',
+                                          display_name='Arthur Fonzarelli')
+        self.refresh('users')
+        data = self.search(q='fonzar')
+        eq_(data['results'][0]['id'], user.pk)
+        eq_(data['results'][0]['email'], user.email)
+
+    def test_by_deleted_user(self):
+        self.user.anonymize()
+        self.refresh('users')
+        data = self.search(q='anonymous-%s' % self.user.pk)
+        eq_(data['results'][0]['id'], self.user.pk)
+        eq_(data['results'][0]['email'], None)
+
     @mock.patch('mkt.constants.lookup.SEARCH_LIMIT', 2)
     @mock.patch('mkt.constants.lookup.MAX_RESULTS', 3)
     def test_all_results(self):
@@ -355,6 +394,7 @@ class TestAcctSearch(TestCase, SearchTestMixin):
             name = 'chr' + str(x)
             UserProfile.objects.create(username=name, name=name,
                                        email=name + '@gmail.com')
+        self.refresh('users')
 
         # Test not at search limit.
         data = self.search(q='clouserw')
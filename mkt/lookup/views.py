@@ -38,6 +38,7 @@ from mkt.lookup.tasks import (email_buyer_refund_approved,
 from mkt.prices.models import AddonPaymentData, Refund
 from mkt.purchase.models import Contribution
 from mkt.site import messages
+from mkt.users.indexers import UserIndexer
 from mkt.users.models import UserProfile
 from mkt.webapps.indexers import WebappIndexer
 from mkt.webapps.models import Webapp
@@ -360,26 +361,38 @@ def _expand_query(q, fields):
     return query.Bool(should=should)
 
 
+def _expand_user_query(q, fields):
+    """
+    Match users whose fields contain words starting with every word of the
+    query, ranking exact matches of a whole field first.
+    """
+    should = []
+    for field in fields:
+        should.append(ES_Q('term', **{'%s.raw' % field: {'value': q,
+                                                          'boost': 10}}))
+        should.append(ES_Q('match', **{field: {'query': q,
+                                               'operator': 'and'}}))
+    return query.Bool(should=should)
+
+
 @login_required
 @permission_required('AccountLookup', 'View')
 @json_view
 def user_search(request):
     results = []
     q = request.GET.get('q', u'').lower().strip()
-    search_fields = ('username', 'display_name', 'email')
+    search_fields = UserIndexer.search_fields
     fields = ('id',) + search_fields
 
     if q.isnumeric():
-        # id is added implictly by the ES filter. Add it explicitly:
+        # Exact id matches come from the database, by primary key.
         qs = UserProfile.objects.filter(pk=q).values(*fields)
     else:
-        qs = UserProfile.objects.all()
-        filters = Q()
-        for field in search_fields:
-            filters = filters | Q(**{'%s__icontains' % field: q})
-        qs = qs.filter(filters)
-        qs = qs.values(*fields)
-        qs = _slice_results(request, qs)
+        qs = (UserIndexer.search()
+              .query(_expand_user_query(q, search_fields)))
+        qs = _slice_results(request, qs).execute()
+        qs = [dict((field, user.get(field)) for field in fields)
+              for user in qs]
     for user in qs:
         user['url'] = reverse('lookup.user_summary', args=[user['id']])
         user['name'] = user['username']
@@ -412,9 +425,10 @@ def app_search(request):
     if q.isnumeric():
         qs = Webapp.objects.filter(pk=q).values(*non_es_fields)[:limit]
     else:
-        # Try to load by GUID:
-        qs = Webapp.objects.filter(guid=q).values(*non_es_fields)[:limit]
-        if not qs.count():
+        # Try to load by GUID, which is an exact match on a unique key too:
+        qs = list(Webapp.objects.filter(guid=q)
+                  .values(*non_es_fields)[:limit])
+        if not qs:
             qs = (WebappIndexer.search()
                   .query(_expand_query(q, fields))[:limit])
                   # TODO: Update to `.fields(...)` when the DSL supports it.
@@ -1,9 +1,22 @@
+import atexit
 import datetime
 import hashlib
 import json
+import threading
+import time
+from collections import deque
 
+from django.conf import settings
+from django.core.signals import request_finished
 from django.db import models
 
+import commonware.log
+from celery.signals import task_postrun, worker_shutdown
+from django_statsd.clients import statsd
+
+
+log = commonware.log.getLogger('z.monolith')
+
 
 class MonolithRecord(models.Model):
     """Data stored temporarily for monolith.
@@ -21,6 +34,73 @@ class MonolithRecord(models.Model):
         db_table = 'monolith_record'
 
 
+class RecordBuffer(object):
+    """A per-process buffer of records waiting to be written in bulk.
+
+    Records are written once the buffer holds `MONOLITH_BUFFER_FLUSH_SIZE`
+    records or `MONOLITH_BUFFER_FLUSH_INTERVAL` seconds after the last write,
+    whichever comes first, when a request or a task finishes, and when the
+    process exits. If `MONOLITH_BUFFER_SIZE` records are already waiting, the
+    oldest one is dropped to make room.
+    """
+
+    def __init__(self):
+        self.records = deque()
+        self.lock = threading.Lock()
+        self.last_flush = time.time()
+
+    def __len__(self):
+        return len(self.records)
+
+    def add(self, record):
+        with self.lock:
+            if len(self.records) >= settings.MONOLITH_BUFFER_SIZE:
+                self.records.popleft()
+                statsd.incr('monolith.buffer.dropped')
+            self.records.append(record)
+            depth = len(self.records)
+        statsd.gauge('monolith.buffer.depth', depth)
+
+    def should_flush(self):
+        return (len(self.records) >= settings.MONOLITH_BUFFER_FLUSH_SIZE or
+                time.time() - self.last_flush >=
+                settings.MONOLITH_BUFFER_FLUSH_INTERVAL)
+
+    def flush(self):
+        with self.lock:
+            records = list(self.records)
+            self.records.clear()
+            self.last_flush = time.time()
+        if not records:
+            return
+        statsd.gauge('monolith.buffer.depth', 0)
+        try:
+            MonolithRecord.objects.bulk_create(records)
+        except Exception:
+            log.exception('Failed to write %s monolith records.'
+                          % len(records))
+            statsd.incr('monolith.buffer.lost', len(records))
+
+
+record_buffer = RecordBuffer()
+
+
+def flush_records(force=False, **kwargs):
+    """Write the buffered records if the buffer is due for a flush."""
+    if len(record_buffer) and (force or record_buffer.should_flush()):
+        record_buffer.flush()
+
+
+def flush_all_records(**kwargs):
+    flush_records(force=True)
+
+
+request_finished.connect(flush_records, dispatch_uid='monolith_flush_request')
+task_postrun.connect(flush_records, dispatch_uid='monolith_flush_task')
+worker_shutdown.connect(flush_all_records, dispatch_uid='monolith_flush_worker')
+atexit.register(flush_all_records)
+
+
 def get_user_hash(request):
     """Get a hash identifying an user.
 
@@ -46,6 +126,9 @@ def record_stat(key, request, **data):
     :para: data:
         The data you want to store. You can pass the data to this function as
         named arguments.
+
+    Unless `MONOLITH_BUFFER_SIZE` is 0, the record is buffered and written
+    to the database later, see `RecordBuffer`.
     """
     if '__recorded' in data:
         recorded = data.pop('__recorded')
@@ -57,5 +140,8 @@ def record_stat(key, request, **data):
 
     record = MonolithRecord(key=key, user_hash=get_user_hash(request),
                             recorded=recorded, value=json.dumps(data))
-    record.save()
+    if settings.MONOLITH_BUFFER_SIZE:
+        record_buffer.add(record)
+    else:
+        record.save()
     return record
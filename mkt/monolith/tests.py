@@ -1,11 +1,13 @@
 import datetime
 import json
+import time
 import uuid
 from collections import namedtuple
 
 import mock
 from nose.tools import eq_, ok_
 
+from django.core.signals import request_finished
 from django.core.urlresolvers import reverse
 from django.test import client
 
@@ -13,7 +15,8 @@ from amo.tests import TestCase
 from mkt.api.tests.test_oauth import RestOAuth
 from mkt.site.fixtures import fixture
 
-from .models import MonolithRecord, record_stat
+from .models import (flush_all_records, MonolithRecord, record_buffer,
+                     record_stat)
 from .views import daterange
 
 
@@ -66,6 +69,55 @@ class TestModels(TestCase):
             record_stat('app.install', self.request)
 
 
+class TestRecordBuffer(TestCase):
+
+    def setUp(self):
+        super(TestRecordBuffer, self).setUp()
+        self.request = RequestFactory()
+        record_buffer.records.clear()
+        record_buffer.last_flush = time.time()
+
+    def test_buffered(self):
+        with self.settings(MONOLITH_BUFFER_SIZE=10):
+            record_stat('app.install', self.request, value=1)
+            eq_(MonolithRecord.objects.count(), 0)
+            eq_(len(record_buffer), 1)
+
+            # Not flushed until the buffer is big or old enough.
+            request_finished.send(sender=self)
+            eq_(MonolithRecord.objects.count(), 0)
+
+            with self.settings(MONOLITH_BUFFER_FLUSH_SIZE=1):
+                request_finished.send(sender=self)
+            eq_(MonolithRecord.objects.get().value,
+                json.dumps({'value': 1}))
+            eq_(len(record_buffer), 0)
+
+    @mock.patch('mkt.monolith.models.statsd')
+    def test_buffer_full(self, statsd):
+        with self.settings(MONOLITH_BUFFER_SIZE=2):
+            for value in range(3):
+                record_stat('app.install', self.request, value=value)
+            eq_(len(record_buffer), 2)
+            statsd.incr.assert_called_with('monolith.buffer.dropped')
+            statsd.gauge.assert_called_with('monolith.buffer.depth', 2)
+
+            flush_all_records()
+            # The oldest record was dropped.
+            eq_(sorted(json.loads(r.value)['value'] for r in
+                       MonolithRecord.objects.all()), [1, 2])
+
+    @mock.patch('mkt.monolith.models.statsd')
+    @mock.patch.object(MonolithRecord.objects, 'bulk_create')
+    def test_flush_error(self, bulk_create, statsd):
+        bulk_create.side_effect = Exception
+        with self.settings(MONOLITH_BUFFER_SIZE=10):
+            record_stat('app.install', self.request, value=1)
+            flush_all_records()
+        eq_(len(record_buffer), 0)
+        statsd.incr.assert_called_with('monolith.buffer.lost', 1)
+
+
 class TestMonolithResource(RestOAuth):
     fixtures = fixture('user_2519')
 
@@ -24,6 +24,7 @@ from mkt.constants.payments import (CARRIER_CHOICES, PAYMENT_METHOD_ALL,
                                 PROVIDER_CHOICES, PROVIDER_LOOKUP)
 from mkt.constants.regions import RESTOFWORLD, REGIONS_CHOICES_ID_DICT as RID
 from mkt.purchase.models import Contribution
+from mkt.receipts.status import clear_app_purchase, clear_inapp_purchase
 from mkt.regions.utils import remove_accents
 from mkt.users.models import UserProfile
 
@@ -312,6 +313,32 @@ def add_uuid(sender, **kw):
             record.save()
 
 
+@receiver(models.signals.post_save, sender=AddonPurchase,
+          dispatch_uid='clear_addon_purchase_status')
+@receiver(models.signals.post_delete, sender=AddonPurchase,
+          dispatch_uid='clear_addon_purchase_status_delete')
+def clear_addon_purchase_status(sender, instance, **kw):
+    """
+    Clear the status the receipt verifier cached when a purchase changes, be
+    it refunded, charged back or bought again.
+    """
+    if not kw.get('raw'):
+        clear_app_purchase(instance.addon_id, instance.uuid)
+
+
+@receiver(models.signals.post_save, sender=Contribution,
+          dispatch_uid='clear_contribution_status')
+@receiver(models.signals.post_delete, sender=Contribution,
+          dispatch_uid='clear_contribution_status_delete')
+def clear_contribution_status(sender, instance, **kw):
+    """
+    Clear the status the receipt verifier cached for an in-app purchase when
+    it changes.
+    """
+    if not kw.get('raw'):
+        clear_inapp_purchase(instance.pk, instance.related_id)
+
+
 @write
 @receiver(models.signals.post_save, sender=Contribution,
           dispatch_uid='create_addon_purchase')
@@ -6,8 +6,10 @@ import commonware.log
 import cronjobs
 
 import amo
-from amo.utils import send_mail_jinja
+from amo.utils import chunked, send_mail_jinja
 from mkt.ratings.models import Review
+from mkt.ratings.tasks import update_ratings_bulk
+from mkt.webapps.models import Webapp
 
 
 cron_log = commonware.log.getLogger('mkt.ratings.cron')
@@ -44,3 +46,15 @@ def email_daily_ratings():
         send_mail_jinja(subject, 'ratings/emails/daily_digest.html',
                         context, recipient_list=author_emails,
                         perm_setting='app_new_review', async=True)
+
+
+@cronjobs.register
+def update_app_ratings():
+    """
+    Recomputes the denormalized review fields and the ratings of all the apps,
+    in chunks of apps that are each updated with a handful of queries.
+    """
+    ids = list(Webapp.objects.values_list('id', flat=True))
+    cron_log.info('Recomputing ratings of %s apps.' % len(ids))
+    for chunk in chunked(ids, 500):
+        update_ratings_bulk.delay(chunk)
@@ -85,12 +85,12 @@ class Review(amo.models.ModelBase):
 
         if update_denorm:
             pair = self.addon_id, self.user_id
-            # Do this immediately so is_latest is correct. Use default
-            # to avoid slave lag.
-            tasks.update_denorm(pair, using='default')
+            # Do this immediately so is_latest is correct.
+            tasks.update_denorm(pair)
 
-        # Review counts have changed, so run the task and trigger a reindex.
-        tasks.addon_review_aggregates.delay(self.addon_id, using='default')
+        # Review counts have changed, so run the task, which reindexes the
+        # app if its ratings changed.
+        tasks.addon_review_aggregates.delay(self.addon_id)
 
     @staticmethod
     def transformer(reviews):
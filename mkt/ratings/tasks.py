@@ -1,11 +1,15 @@
 import logging
 
-from django.db.models import Count, Avg, F
+from django.db import connection
+from django.db.models import Count, Avg
 
 import caching.base as caching
 from celeryutils import task
 
-from mkt.webapps.models import Addon
+from amo.decorators import write
+from amo.utils import chunked
+from mkt.webapps.models import Addon, Webapp
+from mkt.webapps.tasks import index_webapps
 
 from .models import Review
 
@@ -13,7 +17,43 @@ from .models import Review
 log = logging.getLogger('z.task')
 
 
+# Sets the denormalized fields of the reviews whose ids are passed, from the
+# number of reviews by the same user for the same app created before and
+# after each of them (MySQL doesn't have window functions).
+DENORM_SQL = """
+    UPDATE reviews JOIN (
+        SELECT mine.id,
+               SUM(other.created < mine.created OR
+                   (other.created = mine.created AND other.id < mine.id))
+                   AS previous_count,
+               SUM(other.created > mine.created OR
+                   (other.created = mine.created AND other.id > mine.id))
+                   AS next_count
+        FROM reviews AS mine
+        JOIN reviews AS other
+            ON other.addon_id = mine.addon_id AND
+               other.user_id = mine.user_id AND other.reply_to IS NULL
+        WHERE mine.id IN (%s)
+        GROUP BY mine.id) AS counts ON counts.id = reviews.id
+    SET reviews.previous_count = counts.previous_count,
+        reviews.is_latest = (counts.next_count = 0)
+"""
+
+
+def _update_denorm(reviews):
+    """
+    Sets `is_latest` and `previous_count` on `reviews`, with one query per
+    chunk of reviews.
+    """
+    cursor = connection.cursor()
+    for chunk in chunked(reviews, 1000):
+        cursor.execute(DENORM_SQL % ', '.join(['%s'] * len(chunk)),
+                       [review.id for review in chunk])
+        Review.objects.invalidate(*chunk)
+
+
 @task(rate_limit='50/m')
+@write
 def update_denorm(*pairs, **kw):
     """
     Takes a bunch of (addon, user) pairs and sets the denormalized fields for
@@ -21,61 +61,146 @@ def update_denorm(*pairs, **kw):
     """
     log.info('[%s@%s] Updating review denorms.' %
              (len(pairs), update_denorm.rate_limit))
-    using = kw.get('using')
-    for addon, user in pairs:
-        reviews = list(Review.objects.valid().no_cache().using(using)
-                       .filter(addon=addon, user=user).order_by('created'))
-        if not reviews:
-            continue
+    if not pairs:
+        return
+    where = ' OR '.join(['(addon_id = %s AND user_id = %s)'] * len(pairs))
+    qs = Review.objects.valid().no_cache().no_transforms().extra(
+        where=[where], params=[v for pair in pairs for v in pair])
+    _update_denorm(list(qs))
 
-        for idx, review in enumerate(reviews):
-            review.previous_count = idx
-            review.is_latest = False
-        reviews[-1].is_latest = True
 
-        for review in reviews:
-            review.save()
+def _bayesian_averages():
+    """The average rating and number of reviews of all the apps, cached."""
+    f = lambda: Addon.objects.aggregate(rating=Avg('average_rating'),
+                                        reviews=Avg('total_reviews'))
+    return caching.cached(f, 'task.bayes.avg', 60 * 60 * 60)
 
 
-@task
-def addon_review_aggregates(*addons, **kw):
-    log.info('[%s@%s] Updating total reviews and average ratings.' %
-             (len(addons), addon_review_aggregates.rate_limit))
-    using = kw.get('using')
-    addon_objs = list(Addon.objects.filter(pk__in=addons))
+def _bayesian_rating(avg, rating, reviews):
+    return ((avg['reviews'] * avg['rating'] + reviews * rating) /
+            (avg['reviews'] + reviews)) if reviews else 0
+
+
+def _ratings_changed(old, new):
+    """
+    Whether the (average_rating, total_reviews, bayesian_rating) changed. The
+    ratings are read back from float columns, so they are compared with a
+    tolerance.
+    """
+    for a, b in zip(old, new):
+        if a is None or b is None:
+            if a is not b:
+                return True
+        elif abs(a - b) > 1e-4:
+            return True
+    return False
+
+
+def _update_ratings(apps, updates):
+    """
+    Writes the (average_rating, total_reviews, bayesian_rating) in `updates`,
+    a dict keyed by app id, with a single query.
+    """
+    if not updates:
+        return
+    cases = ' '.join(['WHEN %s THEN %s'] * len(updates))
+    params = []
+    for idx in range(3):
+        params.extend(v for id_, values in updates.items()
+                      for v in (id_, values[idx]))
+    cursor = connection.cursor()
+    cursor.execute(
+        'UPDATE addons SET averagerating = CASE id %s END, '
+        'totalreviews = CASE id %s END, bayesianrating = CASE id %s END '
+        'WHERE id IN (%s)' % (cases, cases, cases,
+                              ', '.join(['%s'] * len(updates))),
+        params + updates.keys())
+    Webapp.objects.invalidate(*[app for app in apps if app.id in updates])
+
+
+def _review_aggregates(ids):
+    """
+    Computes the average rating, number of reviews and bayesian rating of the
+    apps from a single aggregate query, and writes those that changed with a
+    single query. Returns the ids of the apps that changed.
+    """
+    apps = list(Webapp.objects.no_cache().filter(id__in=ids).no_transforms())
     stats = dict((x[0], x[1:]) for x in
-                 Review.objects.valid().no_cache().using(using)
-                 .filter(addon__in=addons, is_latest=True)
+                 Review.objects.valid().no_cache()
+                 .filter(addon__in=ids, is_latest=True)
                  .values_list('addon')
                  .annotate(Avg('rating'), Count('addon')))
-    for addon in addon_objs:
-        rating, reviews = stats.get(addon.id, [0, 0])
-        addon.update(total_reviews=reviews, average_rating=rating)
+    avg = _bayesian_averages()
+
+    updates = {}
+    for app in apps:
+        rating, reviews = stats.get(app.id, [0, 0])
+        if rating is None or avg['rating'] is None:
+            # Rating can be NULL in the DB, keep the bayesian rating then.
+            bayesian = app.bayesian_rating
+        else:
+            rating = float(rating)
+            bayesian = _bayesian_rating(avg, rating, reviews)
+        values = (rating, reviews, bayesian)
+        if _ratings_changed((app.average_rating, app.total_reviews,
+                             app.bayesian_rating), values):
+            updates[app.id] = values
 
-    # Delay bayesian calculations to avoid slave lag.
-    addon_bayesian_rating.apply_async(args=addons, countdown=5)
+    _update_ratings(apps, updates)
+    return updates.keys()
 
 
 @task
+@write
+def addon_review_aggregates(*addons, **kw):
+    """
+    Updates the total reviews, average and bayesian ratings of the apps, and
+    reindexes those that changed.
+    """
+    log.info('[%s@%s] Updating total reviews and average ratings.' %
+             (len(addons), addon_review_aggregates.rate_limit))
+    changed = _review_aggregates(addons)
+    if changed:
+        index_webapps.delay(changed)
+
+
+@task
+@write
 def addon_bayesian_rating(*addons, **kw):
     log.info('[%s@%s] Updating bayesian ratings.' %
              (len(addons), addon_bayesian_rating.rate_limit))
-    f = lambda: Addon.objects.aggregate(rating=Avg('average_rating'),
-                                        reviews=Avg('total_reviews'))
-    avg = caching.cached(f, 'task.bayes.avg', 60 * 60 * 60)
+    avg = _bayesian_averages()
     # Rating can be NULL in the DB, so don't update it if it's not there.
     if avg['rating'] is None:
         return
-    mc = avg['reviews'] * avg['rating']
-    for addon in Addon.objects.no_cache().filter(id__in=addons):
-        if addon.average_rating is None:
+    apps = list(Webapp.objects.no_cache().filter(id__in=addons)
+                .no_transforms())
+    updates = {}
+    for app in apps:
+        if app.average_rating is None:
             # Ignoring addons with no average rating.
             continue
+        bayesian = _bayesian_rating(avg, app.average_rating,
+                                    app.total_reviews)
+        if _ratings_changed([app.bayesian_rating], [bayesian]):
+            updates[app.id] = (app.average_rating, app.total_reviews,
+                               bayesian)
+    _update_ratings(apps, updates)
 
-        q = Addon.objects.filter(id=addon.id)
-        if addon.total_reviews:
-            num = mc + F('total_reviews') * F('average_rating')
-            denom = avg['reviews'] + F('total_reviews')
-            q.update(bayesian_rating=num / denom)
-        else:
-            q.update(bayesian_rating=0)
+
+@task
+@write
+def update_ratings_bulk(ids, **kw):
+    """
+    Recomputes the denormalized fields of all the reviews of the apps, then
+    their ratings, with a handful of queries. The apps whose ratings changed
+    are reindexed together.
+    """
+    log.info('[%s] Recomputing review denorms and ratings.' % len(ids))
+    _update_denorm(list(Review.objects.valid().no_cache().no_transforms()
+                        .filter(addon__in=ids)))
+    changed = _review_aggregates(ids)
+    if changed:
+        index_webapps.delay(changed)
+    log.info('Ratings updated for %s out of %s apps.'
+             % (len(changed), len(ids)))
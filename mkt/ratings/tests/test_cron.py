@@ -9,7 +9,7 @@ import mock
 from nose.tools import eq_
 
 import amo.tests
-from mkt.ratings.cron import email_daily_ratings
+from mkt.ratings.cron import email_daily_ratings, update_app_ratings
 from mkt.ratings.models import Review
 from mkt.webapps.models import AddonUser
 from mkt.users.models import UserProfile
@@ -58,3 +58,12 @@ class TestEmailDailyRatings(amo.tests.TestCase):
             True)
         eq_(str(self.app2_review.body) not in smart_str(mail.outbox[0].body),
             True)
+
+
+class TestUpdateAppRatings(amo.tests.TestCase):
+
+    @mock.patch('mkt.ratings.cron.update_ratings_bulk')
+    def test_update_app_ratings(self, update_ratings_bulk):
+        app = amo.tests.app_factory()
+        update_app_ratings()
+        update_ratings_bulk.delay.assert_called_once_with([app.pk])
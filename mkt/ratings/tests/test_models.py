@@ -3,6 +3,7 @@ from nose.tools import eq_
 
 import amo.tests
 from mkt.ratings.models import check_spam, Review, Spam
+from mkt.ratings.tasks import addon_review_aggregates, update_ratings_bulk
 from mkt.site.fixtures import fixture
 from mkt.webapps.models import Webapp
 from mkt.users.models import UserProfile
@@ -29,5 +30,91 @@ class TestSpamTest(amo.tests.TestCase):
     def test_refresh_triggers_reindex(self, index_webapps_apply_async):
         index_webapps_apply_async.reset_mock()
         review = Review.objects.latest('pk')
+        Review.objects.filter(pk=review.pk).update(rating=4)
         review.refresh()
         assert index_webapps_apply_async.called
+
+    @patch('mkt.webapps.tasks.index_webapps.original_apply_async')
+    def test_refresh_unchanged_no_reindex(self, index_webapps_apply_async):
+        index_webapps_apply_async.reset_mock()
+        Review.objects.latest('pk').refresh()
+        assert not index_webapps_apply_async.called
+
+
+class TestDenorm(amo.tests.TestCase):
+    fixtures = fixture('webapp_337141', 'user_999')
+
+    def setUp(self):
+        self.app = Webapp.objects.get(pk=337141)
+        self.user = UserProfile.objects.get(pk=31337)
+        self.other = UserProfile.objects.get(pk=999)
+
+    def create(self, user, rating, **kw):
+        return Review.objects.create(addon=self.app, user=user, rating=rating,
+                                     **kw)
+
+    def test_denorm(self):
+        first = self.create(self.user, 1)
+        second = self.create(self.user, 2)
+        third = self.create(self.user, 3)
+        # Replies are ignored.
+        self.create(self.other, None, reply_to=third)
+        eq_([(r.is_latest, r.previous_count) for r in
+             Review.objects.valid().no_cache().order_by('id')],
+            [(False, 0), (False, 1), (True, 2)])
+
+        third.delete()
+        eq_(Review.objects.no_cache().get(pk=second.pk).is_latest, True)
+        eq_(Review.objects.no_cache().get(pk=first.pk).is_latest, False)
+
+    def test_aggregates(self):
+        self.create(self.user, 1)
+        self.create(self.user, 2)
+        self.create(self.other, 4)
+        app = Webapp.objects.no_cache().get(pk=self.app.pk)
+        eq_(app.total_reviews, 2)
+        eq_(app.average_rating, 3)
+        assert app.bayesian_rating > 0
+
+    @patch('mkt.ratings.tasks.index_webapps')
+    def test_aggregates_reindex_changed(self, index_webapps):
+        self.create(self.user, 1)
+        index_webapps.reset_mock()
+        addon_review_aggregates(self.app.pk)
+        assert not index_webapps.delay.called
+
+        Review.objects.update(rating=5)
+        addon_review_aggregates(self.app.pk)
+        index_webapps.delay.assert_called_once_with([self.app.pk])
+        eq_(Webapp.objects.no_cache().get(pk=self.app.pk).average_rating, 5)
+
+    @patch('mkt.ratings.tasks.index_webapps')
+    def test_aggregates_float_rounding(self, index_webapps):
+        self.create(self.user, 1)
+        self.create(self.other, 2)
+        app = Webapp.objects.no_cache().get(pk=self.app.pk)
+        # What MySQL gives back from a float column is a bit off.
+        Webapp.objects.filter(pk=self.app.pk).update(
+            bayesian_rating=app.bayesian_rating + 1e-6)
+        index_webapps.reset_mock()
+        addon_review_aggregates(self.app.pk)
+        assert not index_webapps.delay.called
+
+    @patch('mkt.ratings.tasks.index_webapps')
+    def test_update_ratings_bulk(self, index_webapps):
+        self.create(self.user, 1)
+        self.create(self.user, 2)
+        self.create(self.other, 4)
+        Review.objects.update(is_latest=True, previous_count=0)
+        Webapp.objects.filter(pk=self.app.pk).update(
+            total_reviews=0, average_rating=0, bayesian_rating=0)
+        index_webapps.reset_mock()
+
+        update_ratings_bulk([self.app.pk])
+        eq_(sorted(Review.objects.no_cache().values_list('is_latest',
+                                                         'previous_count')),
+            [(False, 0), (True, 0), (True, 1)])
+        app = Webapp.objects.no_cache().get(pk=self.app.pk)
+        eq_((app.total_reviews, app.average_rating), (2, 3))
+        assert app.bayesian_rating > 0
+        index_webapps.delay.assert_called_once_with([self.app.pk])
@@ -0,0 +1,29 @@
+"""
+Cache keys for the purchase statuses the receipt verifier (services/verify.py)
+keeps in memcache. This is imported by the verifier, so keep it free of
+models.
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.utils.encoding import smart_str
+
+
+def app_purchase_key(app_id, uuid):
+    """The key for the status of the purchase of app `app_id` by `uuid`."""
+    return 'receipts:status:app:%s:%s' % (
+        app_id, hashlib.md5(smart_str(uuid)).hexdigest())
+
+
+def inapp_purchase_key(contribution_id):
+    """The key for the status of the in-app purchase `contribution_id`."""
+    return 'receipts:status:inapp:%s' % contribution_id
+
+
+def clear_app_purchase(app_id, uuid):
+    cache.delete(app_purchase_key(app_id, uuid))
+
+
+def clear_inapp_purchase(*contribution_ids):
+    cache.delete_many([inapp_purchase_key(pk) for pk in contribution_ids
+                       if pk])
@@ -51,6 +51,7 @@ class TestVerify(amo.tests.TestCase):
                                                  price=Price.objects.get(pk=1),
                                                  webapp=self.app)
         self.user = UserProfile.objects.get(pk=999)
+        verify.status_cache.clear()
 
     def verify_signed_receipt(self, signed_receipt, check_purchase=True):
         # Ensure that the verify code is using the test database cursor.
@@ -364,6 +365,143 @@ class TestVerify(amo.tests.TestCase):
         self.assertRaises(M2Crypto.RSA.RSAError, verify.decode_receipt,
                           receipt + 'x')
 
+    @mock.patch.object(verify, 'decode_receipt')
+    def verify_batch(self, receipts, decode_receipt):
+        # Each receipt is the key of its unsigned data in `receipts`.
+        decode_receipt.side_effect = lambda receipt: receipts[receipt]
+        batch = verify.BatchVerify(
+            sorted(receipts), RequestFactory().get('/verifyme/').META)
+        batch.cursor = connection.cursor()
+        return batch.check_full()
+
+    def test_batch(self):
+        self.make_purchase()
+        contribution = self.make_inapp_contribution()
+        bad_user = get_sample_app_receipt()
+        bad_user['user']['value'] = 'ugh'
+        wrong_type = get_sample_app_receipt()
+        wrong_type['typ'] = 'anything'
+        res = self.verify_batch({
+            'a': get_sample_app_receipt(),
+            'b': get_sample_inapp_receipt(contribution),
+            'c': bad_user,
+            'd': wrong_type,
+        })
+        eq_([r['status'] for r in res], ['ok', 'ok', 'invalid', 'invalid'])
+        eq_(res[2]['reason'], 'NO_PURCHASE')
+        eq_(res[3]['reason'], 'WRONG_TYPE')
+
+    def test_batch_refunded(self):
+        contribution = self.make_inapp_contribution(type=amo.CONTRIB_REFUND)
+        res = self.verify_batch({
+            'a': get_sample_inapp_receipt(contribution)})
+        eq_(res[0]['status'], 'refunded')
+
+    def test_batch_queries(self):
+        self.make_purchase()
+        contribution = self.make_inapp_contribution()
+        receipts = dict(('app-%s' % i, get_sample_app_receipt())
+                        for i in range(5))
+        receipts.update(('inapp-%s' % i,
+                         get_sample_inapp_receipt(contribution))
+                        for i in range(5))
+        with self.assertNumQueries(2):
+            res = self.verify_batch(receipts)
+        eq_(set(r['status'] for r in res), set(['ok']))
+
+    def test_batch_wrong_path(self):
+        self.make_purchase()
+        receipt = get_sample_app_receipt()
+        receipt['verify'] = 'https://foo.com/other/'
+        res = self.verify_batch({'a': receipt})
+        eq_(res[0]['reason'], 'WRONG_PATH')
+
+    def test_batch_check(self):
+        def check(body):
+            environ = RequestFactory().post(verify.BATCH_PATH, body,
+                                            content_type='application/json')
+            return verify.batch_receipt_check(environ.META)[0]
+
+        eq_(check('not json'), 400)
+        eq_(check('{}'), 400)
+        eq_(check('[1]'), 400)
+        with mock.patch.object(utils.settings,
+                               'WEBAPPS_RECEIPT_BATCH_SIZE', 1):
+            eq_(check('["a", "b"]'), 400)
+
+    @mock.patch.object(utils.settings, 'SIGNING_SERVER_ACTIVE', True)
+    @mock.patch('services.verify.receipts.certs.ReceiptVerifier')
+    def test_verifier_reused(self, receipt_verifier):
+        verify.get_verifier()
+        verify.get_verifier()
+        eq_(receipt_verifier.call_count, 1)
+
+    @mock.patch.object(utils.settings, 'WEBAPPS_RECEIPT_STATUS_CACHE_TIMEOUT',
+                       60)
+    def test_status_cached(self):
+        self.make_purchase()
+        eq_(self.verify_receipt_data(get_sample_app_receipt())['status'], 'ok')
+        with self.assertNumQueries(0):
+            res = self.verify_receipt_data(get_sample_app_receipt())
+        eq_(res['status'], 'ok')
+
+    @mock.patch.object(utils.settings, 'WEBAPPS_RECEIPT_STATUS_LRU_TIMEOUT', 60)
+    def test_status_cached_in_process(self):
+        contribution = self.make_inapp_contribution()
+        receipt = get_sample_inapp_receipt(contribution)
+        eq_(self.verify_receipt_data(receipt)['status'], 'ok')
+        with self.assertNumQueries(0):
+            eq_(self.verify_receipt_data(receipt)['status'], 'ok')
+
+    def test_status_missing_not_cached(self):
+        with mock.patch.object(utils.settings,
+                               'WEBAPPS_RECEIPT_STATUS_CACHE_TIMEOUT', 60):
+            res = self.verify_receipt_data(get_sample_app_receipt())
+            eq_(res['reason'], 'NO_PURCHASE')
+            self.make_purchase()
+            res = self.verify_receipt_data(get_sample_app_receipt())
+            eq_(res['status'], 'ok')
+
+    @mock.patch.object(utils.settings, 'WEBAPPS_RECEIPT_STATUS_CACHE_TIMEOUT',
+                       60)
+    def test_status_cleared_on_refund(self):
+        purchase = self.make_purchase()
+        eq_(self.verify_receipt_data(get_sample_app_receipt())['status'], 'ok')
+        purchase.update(type=amo.CONTRIB_REFUND)
+        res = self.verify_receipt_data(get_sample_app_receipt())
+        eq_(res['status'], 'refunded')
+
+    @mock.patch.object(utils.settings, 'WEBAPPS_RECEIPT_STATUS_CACHE_TIMEOUT',
+                       60)
+    def test_status_cleared_on_purchase_again(self):
+        purchase = self.make_purchase()
+        purchase.update(type=amo.CONTRIB_REFUND)
+        res = self.verify_receipt_data(get_sample_app_receipt())
+        eq_(res['status'], 'refunded')
+        purchase.update(type=amo.CONTRIB_PURCHASE)
+        eq_(self.verify_receipt_data(get_sample_app_receipt())['status'], 'ok')
+
+    @mock.patch.object(utils.settings, 'WEBAPPS_RECEIPT_STATUS_CACHE_TIMEOUT',
+                       60)
+    def test_inapp_status_cleared_on_chargeback(self):
+        contribution = self.make_inapp_contribution()
+        receipt = get_sample_inapp_receipt(contribution)
+        eq_(self.verify_receipt_data(receipt)['status'], 'ok')
+        contribution.update(type=amo.CONTRIB_CHARGEBACK)
+        eq_(self.verify_receipt_data(receipt)['status'], 'refunded')
+
+    @mock.patch.object(utils.settings, 'WEBAPPS_RECEIPT_STATUS_CACHE_TIMEOUT',
+                       60)
+    def test_batch_status_cached(self):
+        self.make_purchase()
+        contribution = self.make_inapp_contribution()
+        receipts = {'a': get_sample_app_receipt(),
+                    'b': get_sample_inapp_receipt(contribution)}
+        self.verify_batch(receipts)
+        with self.assertNumQueries(0):
+            res = self.verify_batch(receipts)
+        eq_([r['status'] for r in res], ['ok', 'ok'])
+
     @mock.patch.object(verify, 'decode_receipt')
     def get_headers(self, decode_receipt):
         decode_receipt.return_value = ''
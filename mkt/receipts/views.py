@@ -92,7 +92,7 @@ def _record(request, addon):
         if not addon.is_public():
             raise http.Http404
 
-    amo.log(amo.LOG.INSTALL_ADDON, addon)
+    amo.log_deferred(amo.LOG.INSTALL_ADDON, addon)
     record_action('install', request, {
         'app-domain': addon.domain_from_url(addon.origin, allow_none=True),
         'app-id': addon.pk,
@@ -11,13 +11,18 @@ import amo.models
 from amo.utils import cache_ns_key
 from mkt.access.models import Group
 from mkt.developers.models import ActivityLog
+from mkt.files.models import File
+from mkt.ratings.models import Review, ReviewFlag
 from mkt.translations.fields import save_signal, TranslatedField
 from mkt.users.models import UserProfile
-from mkt.webapps.models import Addon
+from mkt.versions.models import Version
+from mkt.webapps.models import Addon, Geodata, Webapp
 
 
 user_log = commonware.log.getLogger('z.users')
 
+QUEUE_STATS_NAMESPACE = 'reviewers:queue_stats'
+
 
 class CannedResponse(amo.models.ModelBase):
     name = TranslatedField()
@@ -362,3 +367,18 @@ def cleanup_queues(sender, instance, **kwargs):
 
 models.signals.post_delete.connect(cleanup_queues, sender=Addon,
                                    dispatch_uid='queue-addon-cleanup')
+
+
+def clear_queue_stats(sender, **kwargs):
+    """
+    Invalidate the cached reviewer queue counts whenever something that can
+    change the membership of a queue is saved or deleted.
+    """
+    cache_ns_key(QUEUE_STATS_NAMESPACE, increment=True)
+
+
+for model in (Addon, Webapp, Version, File, Geodata, RereviewQueue,
+              EscalationQueue, Review, ReviewFlag):
+    for signal in (models.signals.post_save, models.signals.post_delete):
+        signal.connect(clear_queue_stats, sender=model,
+                       dispatch_uid='queue-stats-%s' % model.__name__)
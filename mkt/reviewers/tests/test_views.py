@@ -45,6 +45,7 @@ from mkt.reviewers.models import (CannedResponse, EscalationQueue,
                                   RereviewQueue, ReviewerScore)
 from mkt.reviewers.views import (_do_sort, _progress, app_review, queue_apps,
                                  route_reviewer)
+from mkt.reviewers.utils import queue_stats
 from mkt.site.fixtures import fixture
 from mkt.submit.tests.test_views import BasePackagedAppTest
 from mkt.tags.models import Tag
@@ -244,6 +245,29 @@ class TestReviewersHome(AppReviewerTest, AccessMixin):
         self.assertAlmostEqual(percentages['updates']['old'], 33.333333333333)
         self.assertAlmostEqual(percentages['updates']['med'], 33.333333333333)
 
+    def test_queue_stats_cached(self):
+        with self.settings(REVIEWER_QUEUE_STATS_TIMEOUT=60):
+            eq_(queue_stats()['pending']['total'], 3)
+            with self.assertNumQueries(0):
+                eq_(queue_stats()['pending']['total'], 3)
+
+            # Adding an app to a queue invalidates the cached stats.
+            app_factory(name='Gnu', status=amo.STATUS_PENDING)
+            eq_(queue_stats()['pending']['total'], 4)
+
+            RereviewQueue.objects.create(addon=self.packaged_app)
+            eq_(queue_stats()['rereview']['total'], 2)
+
+    def test_queue_stats_deleted_version(self):
+        # Pending apps with a deleted latest version are in the queue, but
+        # not in the age buckets.
+        for app in self.apps:
+            app.latest_version.update(nomination=self.days_ago(1))
+        self.apps[0].latest_version.update(deleted=True)
+        stats = queue_stats()
+        eq_(stats['pending']['total'], 3)
+        eq_(stats['pending']['new'], 2)
+
     def test_stats_waiting(self):
         self.apps[0].latest_version.update(nomination=self.days_ago(1))
         self.apps[1].latest_version.update(nomination=self.days_ago(5))
@@ -66,6 +66,33 @@ class TestReviewing(RestOAuth):
             reverse('app-detail', kwargs={'pk': 337141}))
 
 
+class TestQueueStats(RestOAuth):
+    fixtures = fixture('user_2519', 'webapp_337141')
+
+    def setUp(self):
+        super(TestQueueStats, self).setUp()
+        self.url = reverse('reviewers-queue-stats')
+        self.user = UserProfile.objects.get(pk=2519)
+
+    def test_verbs(self):
+        self._allowed_verbs(self.url, ('get'))
+
+    def test_not_allowed(self):
+        eq_(self.anon.get(self.url).status_code, 403)
+        eq_(self.client.get(self.url).status_code, 403)
+
+    def test_stats(self):
+        self.grant_permission(self.user, 'Apps:Review')
+        Webapp.objects.get(pk=337141).update(status=amo.STATUS_PENDING)
+        res = self.client.get(self.url)
+        eq_(res.status_code, 200, res.content)
+        data = json.loads(res.content)
+        eq_(data['pending']['total'], 1)
+        eq_(data['rereview'], {'total': 0, 'new': 0, 'med': 0, 'old': 0,
+                               'week': 0})
+        eq_(data['moderated'], {'total': 0})
+
+
 class TestApiReviewer(RestOAuth, ESTestCase):
     fixtures = fixture('webapp_337141', 'user_2519')
 
@@ -58,6 +58,8 @@ api_patterns = patterns('',
         views.ApproveRegion.as_view(), name='approve-region'),
     url(r'^reviewers/reviewing', views.ReviewingView.as_view(),
         name='reviewing-list'),
+    url(r'^reviewers/queue-stats', views.QueueStatsView.as_view(),
+        name='reviewers-queue-stats'),
     url('^reviewers/(?P<addon_slug>[\w-]+)/review/(?P<review_pk>\d+)/translate'
         '/(?P<language>[a-z]{2}(-[A-Z]{2})?)$',
         views.review_translate,
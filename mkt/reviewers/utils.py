@@ -1,10 +1,12 @@
 import json
 import urllib
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from django.conf import settings
 from django.core.cache import cache
 from django.core.urlresolvers import reverse
+from django.db import connection
+from django.db.models import Q
 from django.utils import translation
 from django.utils.datastructures import SortedDict
 
@@ -13,14 +15,17 @@ import waffle
 from tower import ugettext_lazy as _lazy
 
 import amo
+import mkt
 from amo.helpers import absolutify
-from amo.utils import JSONEncoder, send_mail_jinja, to_language
+from amo.utils import cache_ns_key, JSONEncoder, send_mail_jinja, to_language
 from mkt.access import acl
 from mkt.comm.utils import create_comm_note
 from mkt.constants import comm
 from mkt.constants.features import FeatureProfile
 from mkt.files.models import File
-from mkt.reviewers.models import EscalationQueue, RereviewQueue, ReviewerScore
+from mkt.ratings.models import Review
+from mkt.reviewers.models import (EscalationQueue, QUEUE_STATS_NAMESPACE,
+                                  RereviewQueue, ReviewerScore)
 from mkt.site.helpers import product_as_dict
 from mkt.webapps.models import Webapp
 from mkt.webapps.tasks import set_storefront_data
@@ -650,3 +655,104 @@ def device_queue_search(request):
         ))
     return Webapp.version_and_file_transformer(
         Webapp.objects.filter(**filters))
+
+
+def _queue_ages(qs, field, skip_field=None):
+    """
+    Return the number of objects in `qs` and how many of them are in each of
+    the age buckets used on the reviewer dashboard, based on the date in
+    `field`, with a single conditional aggregate query.
+
+    If `skip_field` is given, the objects for which that boolean field is true
+    are counted but left out of the age buckets.
+    """
+    days_ago = lambda n: datetime.now() - timedelta(days=n)
+    buckets = (
+        ('new', '> %s', [days_ago(5)]),
+        ('med', 'BETWEEN %s AND %s', [days_ago(10), days_ago(5)]),
+        ('old', '< %s', [days_ago(10)]),
+        ('week', '>= %s', [days_ago(7)]),
+    )
+    qn = connection.ops.quote_name
+    fields = [field] + ([skip_field] if skip_field else [])
+    column = qn(field.split('__')[-1])
+    condition = ('NOT %s AND ' % qn(skip_field.split('__')[-1])
+                 if skip_field else '')
+
+    inner, inner_params = (qs.order_by().values_list(*fields)
+                             .query.sql_with_params())
+    sums = ['SUM(CASE WHEN %s%s %s THEN 1 ELSE 0 END)' % (condition, column,
+                                                          op)
+            for name, op, params in buckets]
+    params = [p for name, op, bucket_params in buckets
+              for p in bucket_params] + list(inner_params)
+
+    cursor = connection.cursor()
+    cursor.execute('SELECT COUNT(*), %s FROM (%s) AS queue' % (
+        ', '.join(sums), inner), params)
+    row = cursor.fetchone()
+    stats = {'total': int(row[0])}
+    for (name, op, params), value in zip(buckets, row[1:]):
+        stats[name] = int(value or 0)
+    return stats
+
+
+def _compute_queue_stats():
+    excluded_ids = EscalationQueue.objects.values_list('addon', flat=True)
+    public_statuses = amo.WEBAPPS_APPROVED_STATUSES
+
+    pending = (Webapp.objects.exclude(id__in=excluded_ids)
+                     .filter(status=amo.STATUS_PENDING,
+                             disabled_by_user=False))
+    rereview = (RereviewQueue.objects.exclude(addon__in=excluded_ids)
+                             .filter(addon__disabled_by_user=False))
+    escalated = EscalationQueue.objects.filter(addon__disabled_by_user=False)
+    # This will work as long as we disable files of existing unreviewed
+    # versions when a new version is uploaded.
+    updates = (File.objects.exclude(version__addon__id__in=excluded_ids)
+                   .filter(version__addon__type=amo.ADDON_WEBAPP,
+                           version__addon__disabled_by_user=False,
+                           version__addon__is_packaged=True,
+                           version__addon__status__in=public_statuses,
+                           version__deleted=False,
+                           status=amo.STATUS_PENDING))
+    moderated = (Review.objects.exclude(Q(addon__isnull=True) |
+                                        Q(reviewflag__isnull=True))
+                               .exclude(addon__status=amo.STATUS_DELETED)
+                               .filter(addon__type=amo.ADDON_WEBAPP,
+                                       editorreview=True))
+    region_cn = Webapp.objects.pending_in_region(mkt.regions.CN)
+
+    return {
+        # Apps whose latest version was deleted are in the queue but aren't
+        # aged.
+        'pending': _queue_ages(pending, '_latest_version__nomination',
+                               skip_field='_latest_version__deleted'),
+        'rereview': _queue_ages(rereview, 'created'),
+        'escalated': _queue_ages(escalated, 'created'),
+        'updates': _queue_ages(updates, 'version__nomination'),
+        'moderated': {'total': moderated.no_cache().count()},
+        'region_cn': {'total': region_cn.count()},
+    }
+
+
+def queue_stats():
+    """
+    Return the number of items in each reviewer queue, and for the app queues
+    the number of items in each age bucket ('new', 'med', 'old' and 'week'),
+    e.g. `{'pending': {'total': 3, 'new': 1, ...}, 'moderated': {'total': 1},
+    ...}`.
+
+    The stats are cached for `settings.REVIEWER_QUEUE_STATS_TIMEOUT` seconds
+    and invalidated whenever the content of a queue changes.
+    """
+    timeout = settings.REVIEWER_QUEUE_STATS_TIMEOUT
+    if not timeout:
+        return _compute_queue_stats()
+
+    key = '%s:stats' % cache_ns_key(QUEUE_STATS_NAMESPACE)
+    stats = cache.get(key)
+    if stats is None:
+        stats = _compute_queue_stats()
+        cache.set(key, stats, timeout)
+    return stats
@@ -27,11 +27,11 @@ from elasticsearch_dsl.filter import F
 from rest_framework.exceptions import ParseError
 from rest_framework.generics import CreateAPIView, ListAPIView
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from tower import ugettext as _
 from waffle.decorators import waffle_switch
 
 import amo
-import mkt
 from amo.decorators import (any_permission_required, json_view, login_required,
                             permission_required)
 from amo.helpers import absolutify, urlparams
@@ -48,7 +48,6 @@ from mkt.api.base import SlugOrIdMixin
 from mkt.comm.forms import CommAttachmentFormSet
 from mkt.constants import MANIFEST_CONTENT_TYPE
 from mkt.developers.models import ActivityLog, ActivityLogAttachment
-from mkt.files.models import File
 from mkt.ratings.forms import ReviewFlagFormSet
 from mkt.ratings.models import Review, ReviewFlag
 from mkt.regions.utils import parse_region
@@ -59,7 +58,7 @@ from mkt.reviewers.models import (EditorSubscription, EscalationQueue,
 from mkt.reviewers.serializers import (ReviewersESAppSerializer,
                                        ReviewingSerializer)
 from mkt.reviewers.utils import (AppsReviewing, clean_sort_param,
-                                 device_queue_search)
+                                 device_queue_search, queue_stats)
 from mkt.search.views import SearchView
 from mkt.site import messages
 from mkt.site.helpers import product_as_dict
@@ -138,44 +137,7 @@ def home(request):
 
 
 def queue_counts(request):
-    excluded_ids = EscalationQueue.objects.no_cache().values_list('addon',
-                                                                  flat=True)
-    public_statuses = amo.WEBAPPS_APPROVED_STATUSES
-
-    counts = {
-        'pending': Webapp.objects.no_cache()
-                         .exclude(id__in=excluded_ids)
-                         .filter(type=amo.ADDON_WEBAPP,
-                                 disabled_by_user=False,
-                                 status=amo.STATUS_PENDING)
-                         .count(),
-        'rereview': RereviewQueue.objects.no_cache()
-                                 .exclude(addon__in=excluded_ids)
-                                 .filter(addon__disabled_by_user=False)
-                                 .count(),
-        # This will work as long as we disable files of existing unreviewed
-        # versions when a new version is uploaded.
-        'updates': File.objects.no_cache()
-                       .exclude(version__addon__id__in=excluded_ids)
-                       .filter(version__addon__type=amo.ADDON_WEBAPP,
-                               version__addon__disabled_by_user=False,
-                               version__addon__is_packaged=True,
-                               version__addon__status__in=public_statuses,
-                               version__deleted=False,
-                               status=amo.STATUS_PENDING)
-                       .count(),
-        'escalated': EscalationQueue.objects.no_cache()
-                                    .filter(addon__disabled_by_user=False)
-                                    .count(),
-        'moderated': Review.objects.no_cache()
-                           .exclude(Q(addon__isnull=True) |
-                                    Q(reviewflag__isnull=True))
-                           .exclude(addon__status=amo.STATUS_DELETED)
-                           .filter(addon__type=amo.ADDON_WEBAPP,
-                                   editorreview=True)
-                           .count(),
-        'region_cn': Webapp.objects.pending_in_region(mkt.regions.CN).count(),
-    }
+    counts = dict((k, v['total']) for k, v in queue_stats().items())
 
     if 'pro' in request.GET:
         counts.update({'device': device_queue_search(request).count()})
@@ -195,55 +157,11 @@ def _progress():
     Return the number of apps still unreviewed for a given period of time and
     the percentage.
     """
-
-    days_ago = lambda n: datetime.datetime.now() - datetime.timedelta(days=n)
-    excluded_ids = EscalationQueue.objects.values_list('addon', flat=True)
-    public_statuses = amo.WEBAPPS_APPROVED_STATUSES
-
-    base_filters = {
-        'pending': (Webapp.objects
-                          .exclude(id__in=excluded_ids)
-                          .filter(status=amo.STATUS_PENDING,
-                                  disabled_by_user=False,
-                                  _latest_version__deleted=False),
-                    '_latest_version__nomination'),
-        'rereview': (RereviewQueue.objects
-                                  .exclude(addon__in=excluded_ids)
-                                  .filter(addon__disabled_by_user=False),
-                     'created'),
-        'escalated': (EscalationQueue.objects
-                                     .filter(addon__disabled_by_user=False),
-                      'created'),
-        'updates': (File.objects
-                        .exclude(version__addon__id__in=excluded_ids)
-                        .filter(version__addon__type=amo.ADDON_WEBAPP,
-                                version__addon__disabled_by_user=False,
-                                version__addon__is_packaged=True,
-                                version__addon__status__in=public_statuses,
-                                version__deleted=False,
-                                status=amo.STATUS_PENDING),
-                    'version__nomination')
-    }
-
-    operators_and_values = {
-        'new': ('gt', days_ago(5)),
-        'med': ('range', (days_ago(10), days_ago(5))),
-        'old': ('lt', days_ago(10)),
-        'week': ('gte', days_ago(7))
-    }
-
-    types = base_filters.keys()
-    progress = {}
-
-    for t in types:
-        tmp = {}
-        base_query, field = base_filters[t]
-        for k in operators_and_values.keys():
-            operator, value = operators_and_values[k]
-            filter_ = {}
-            filter_['%s__%s' % (field, operator)] = value
-            tmp[k] = base_query.filter(**filter_).count()
-        progress[t] = tmp
+    stats = queue_stats()
+    types = ('pending', 'rereview', 'escalated', 'updates')
+    progress = dict(
+        (t, dict((k, stats[t][k]) for k in ('new', 'med', 'old', 'week')))
+        for t in types)
 
     # Return the percent of (p)rogress out of (t)otal.
     pct = lambda p, t: (p / float(t)) * 100 if p > 0 else 0
@@ -1074,6 +992,15 @@ class ReviewingView(ListAPIView):
         return [row['app'] for row in AppsReviewing(self.request).get_apps()]
 
 
+class QueueStatsView(APIView):
+    authentication_classes = [RestOAuthAuthentication,
+                              RestSharedSecretAuthentication]
+    permission_classes = [GroupPermission('Apps', 'Review')]
+
+    def get(self, request, *args, **kwargs):
+        return Response(queue_stats())
+
+
 class ReviewersSearchView(SearchView):
     cors_allowed_methods = ['get']
     authentication_classes = [RestSharedSecretAuthentication,
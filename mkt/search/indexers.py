@@ -84,6 +84,23 @@ class BaseIndexer(object):
 
         helpers.bulk(es, actions)
 
+    @classmethod
+    def extract_documents(cls, objs):
+        """
+        Extracts the documents for a list of instances. Indexers that can
+        fetch related data for several instances at once should override
+        this.
+        """
+        return [cls.extract_document(obj.id, obj) for obj in objs]
+
+    @classmethod
+    def indexed(cls, ids):
+        """
+        Called once the objects matching the ids have been indexed by the
+        `index` task. Override to act on changes, like invalidating caches.
+        """
+        pass
+
     @classmethod
     def index_ids(cls, ids, no_delay=False):
         """
@@ -321,7 +338,8 @@ def index(ids, indexer, **kw):
     indices = Reindexing.get_indices(indexer.get_index())
 
     es = indexer.get_es(urls=settings.ES_URLS)
-    for obj in indexer.get_indexable().filter(id__in=ids):
-        doc = indexer.extract_document(obj.id, obj)
+    objs = list(indexer.get_indexable().filter(id__in=ids))
+    for obj, doc in zip(objs, indexer.extract_documents(objs)):
         for idx in indices:
             indexer.index(doc, id_=obj.id, es=es, index=idx)
+    indexer.indexed(ids)
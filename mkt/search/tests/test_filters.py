@@ -8,6 +8,7 @@ from django.contrib.auth.models import AnonymousUser
 import amo
 from mkt import regions
 from mkt.api.tests.test_oauth import BaseOAuth
+from mkt.constants.features import FeatureProfile
 from mkt.regions import set_region
 from mkt.reviewers.forms import ApiReviewersSearchForm
 from mkt.search.forms import (ApiSearchForm, DEVICE_CHOICES_IDS,
@@ -182,6 +183,15 @@ class TestSearchFilters(BaseOAuth):
         ok_({'term': {'region_exclusions': regions.CO.id}}
             in qs['query']['filtered']['filter']['bool']['must_not'])
 
+    def test_feature_profile(self):
+        profile = FeatureProfile(apps=True, sms=True)
+        qs = _filter_search(self.req, Webapp.from_search(self.req), {},
+                            profile=profile).to_dict()
+        unsupported = sorted(k for k, v in profile.items() if not v)
+        ok_({'terms': {'required_features': unsupported}}
+            in qs['query']['filtered']['filter']['bool']['must_not'])
+        ok_('apps' not in unsupported)
+
     def test_sort(self):
         for api_sort, es_sort in DEFAULT_SORTING.items():
             qs = self._filter(self.req, {'sort': [api_sort]})
@@ -18,11 +18,13 @@ import mkt
 import mkt.regions
 from amo.helpers import absolutify
 from amo.tests import app_factory, ESTestCase, TestCase, user_factory
+from lib.es.management.commands import reindex_mkt
 from mkt.access.middleware import ACLMiddleware
 from mkt.api.tests.test_oauth import RestOAuth, RestOAuthClient
 from mkt.collections.constants import (COLLECTIONS_TYPE_BASIC,
                                        COLLECTIONS_TYPE_FEATURED,
                                        COLLECTIONS_TYPE_OPERATOR)
+from mkt.collections.filters import resolve_collections
 from mkt.collections.models import Collection
 from mkt.constants import regions
 from mkt.constants.features import FeatureProfile
@@ -922,11 +924,11 @@ class TestFeaturedCollections(BaseFeaturedTests):
         eq_(mock_field_to_native.call_args[1].get('use_es', False), False)
 
     @patch('mkt.search.views.SearchView.get_region_from_request')
-    @patch('mkt.search.views.CollectionFilterSetWithFallback')
-    def test_collection_filterset_called(self, mock_fallback, mock_region):
+    @patch('mkt.search.views.resolve_collections', wraps=resolve_collections)
+    def test_collections_resolved(self, mock_resolve, mock_region):
         """
-        CollectionFilterSetWithFallback should be called 3 times, one for each
-        collection_type.
+        resolve_collections should be called once, for all the
+        collection_types.
         """
         # Mock get_region_from_request() and ensure we are not passing it as
         # the query string parameter.
@@ -934,13 +936,15 @@ class TestFeaturedCollections(BaseFeaturedTests):
         mock_region.return_value = mkt.regions.SPAIN
 
         res, json = self.make_request()
-        eq_(mock_fallback.call_count, 3)
+        eq_(mock_resolve.call_count, 1)
 
-        # We expect all calls to contain self.qs and region parameter.
+        # We expect the call to contain self.qs and region parameter.
         expected_args = {'region': mkt.regions.SPAIN.slug}
         expected_args.update(self.qs)
-        for call in mock_fallback.call_args_list:
-            eq_(call[0][0], expected_args)
+        eq_(mock_resolve.call_args[0][0], expected_args)
+        eq_(sorted(mock_resolve.call_args[0][1]),
+            [COLLECTIONS_TYPE_BASIC, COLLECTIONS_TYPE_FEATURED,
+             COLLECTIONS_TYPE_OPERATOR])
 
     def test_fallback_usage(self):
         """
@@ -982,6 +986,69 @@ class TestFeaturedApps(TestFeaturedCollections):
     prop_name = 'featured'
 
 
+class TestSearchViewCache(TestCase):
+
+    def setUp(self):
+        self.url = reverse('search-api')
+        patcher = patch.object(SearchView, 'render_search')
+        self.render_search = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.render_search.return_value = ({'objects': [{'id': 1}]}, {})
+
+    def _get(self, **kwargs):
+        with self.settings(SEARCH_CACHE_TIMEOUT=60):
+            res = self.client.get(self.url, kwargs)
+        eq_(res.status_code, 200)
+        eq_(json.loads(res.content), {'objects': [{'id': 1}]})
+        return res
+
+    def test_cached(self):
+        self._get(q='Foo', cat='')
+        self._get(q='foo')
+        eq_(self.render_search.call_count, 1)
+
+    def test_cache_key(self):
+        self._get(q='foo')
+        self._get(q='bar')
+        self._get(q='foo', region='br')
+        self._get(q='foo', lang='fr')
+        self._get(q='foo', offset=25)
+        self._get(q='foo', dev='firefoxos')
+        eq_(self.render_search.call_count, 6)
+
+    def test_headers(self):
+        self.render_search.return_value = (
+            {'objects': [{'id': 1}]}, {'API-Fallback-featured': 'region'})
+        self._get()
+        res = self._get()
+        eq_(self.render_search.call_count, 1)
+        eq_(res['API-Fallback-featured'], 'region')
+
+    def test_not_invalidated_on_index(self):
+        self._get()
+        WebappIndexer.indexed([42])
+        self._get()
+        eq_(self.render_search.call_count, 1)
+
+    @patch.object(reindex_mkt, 'ES')
+    def test_invalidated_on_alias_update(self, es):
+        self._get()
+        reindex_mkt.update_alias('new', 'old', 'apps', {})
+        self._get()
+        eq_(self.render_search.call_count, 2)
+
+    def test_authenticated(self):
+        request = RequestFactory().get(self.url)
+        request.user = user_factory()
+        with self.settings(SEARCH_CACHE_TIMEOUT=60):
+            eq_(SearchView().get_cache_key(request), None)
+
+    def test_disabled(self):
+        self.client.get(self.url)
+        self.client.get(self.url)
+        eq_(self.render_search.call_count, 2)
+
+
 @patch.object(settings, 'SITE_URL', 'http://testserver')
 class TestSuggestionsApi(ESTestCase):
     fixtures = fixture('webapp_337141')
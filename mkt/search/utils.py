@@ -1,6 +1,21 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+import commonware.log
 from elasticsearch_dsl.search import Search as dslSearch
 from statsd import statsd
 
+from amo.utils import cache_ns_key
+
+
+log = commonware.log.getLogger('z.search')
+
+# Anonymous search responses are cached under this namespace, which is
+# incremented to invalidate all of them at once when apps are reindexed.
+NAMESPACE = 'search'
+
 
 class Search(dslSearch):
 
@@ -9,3 +24,37 @@ class Search(dslSearch):
             results = super(Search, self).execute()
             statsd.timing('search.took', results['took'])
             return results
+
+
+def search_cache_key(path, params, **context):
+    """
+    Return the key identifying a search response, without the namespace.
+
+    `params` is the QueryDict of query string parameters. It is normalized
+    so that equivalent queries share a key: parameters are sorted, empty
+    values are ignored and the query is lowercased like in the ES query.
+    `context` holds what else the response depends on (region, language...).
+    """
+    normalized = []
+    for name, values in params.lists():
+        values = [v.lower() if name == 'q' else v for v in values if v]
+        if values:
+            normalized.append((name, values))
+    return hashlib.md5(repr((path, sorted(normalized),
+                             sorted(context.items())))).hexdigest()
+
+
+def get_search_cache(key):
+    """Return the cached search response, or None if it isn't cached."""
+    return cache.get('%s:%s' % (cache_ns_key(NAMESPACE), key))
+
+
+def set_search_cache(key, value):
+    cache.set('%s:%s' % (cache_ns_key(NAMESPACE), key), value,
+              settings.SEARCH_CACHE_TIMEOUT)
+
+
+def invalidate_search_cache():
+    """Invalidate every cached search response."""
+    log.info('Invalidating the search cache.')
+    cache_ns_key(NAMESPACE, increment=True)
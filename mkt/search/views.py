@@ -6,7 +6,8 @@ from django.conf import settings
 from django.http import HttpResponse
 from django.utils import translation
 
-from elasticsearch_dsl import query
+from django_statsd.clients import statsd
+from elasticsearch_dsl import F, query
 from rest_framework.generics import GenericAPIView
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
@@ -16,14 +17,17 @@ from mkt.api.authentication import (RestOAuthAuthentication,
                                     RestSharedSecretAuthentication)
 from mkt.api.base import CORSMixin, form_errors, MarketplaceView
 from mkt.api.paginator import ESPaginator
+from mkt.carriers import get_carrier
 from mkt.collections.constants import (COLLECTIONS_TYPE_BASIC,
                                        COLLECTIONS_TYPE_FEATURED,
                                        COLLECTIONS_TYPE_OPERATOR)
-from mkt.collections.filters import CollectionFilterSetWithFallback
+from mkt.collections.filters import resolve_collections
 from mkt.collections.models import Collection
 from mkt.collections.serializers import CollectionSerializer
 from mkt.features.utils import get_feature_profile
 from mkt.search.forms import ApiSearchForm, TARAKO_CATEGORIES_MAPPING
+from mkt.search.utils import (get_search_cache, search_cache_key,
+                              set_search_cache)
 from mkt.translations.helpers import truncate
 from mkt.webapps.indexers import WebappIndexer
 from mkt.webapps.models import Webapp
@@ -162,8 +166,9 @@ def _filter_search(request, qs, data, region=None, profile=None):
         qs = qs.filter('term', is_offline=data['offline'])
 
     if profile:
-        for k, v in profile.to_kwargs(prefix='features.has_').items():
-            qs = qs.filter('term', **{k: v})
+        # Exclude the apps requiring any feature the profile doesn't have.
+        qs = qs.filter(~F('terms', required_features=sorted(
+            profile.to_kwargs().keys())))
 
     # Sorting.
     if data.get('sort'):
@@ -201,8 +206,43 @@ class SearchView(CORSMixin, MarketplaceView, GenericAPIView):
         return self.get_pagination_serializer(page), query
 
     def get(self, request, *args, **kwargs):
+        key = self.get_cache_key(request)
+        cached = get_search_cache(key) if key else None
+        if cached is None:
+            data, headers = self.render_search(request)
+            if key:
+                statsd.incr('search.cache.miss')
+                set_search_cache(key, (data, headers))
+        else:
+            statsd.incr('search.cache.hit')
+            data, headers = cached
+
+        response = Response(data)
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    def render_search(self, request):
+        """Return a tuple of the response data and extra headers."""
         serializer, _ = self.search(request)
-        return Response(serializer.data)
+        return serializer.data, {}
+
+    def get_cache_key(self, request):
+        """
+        Return the key of the cached response for `request`, or None if the
+        response shouldn't be cached: only anonymous responses are.
+        """
+        if (not settings.SEARCH_CACHE_TIMEOUT or
+                request.user.is_authenticated()):
+            return None
+        region = self.get_region_from_request(request)
+        return search_cache_key(
+            request.path, request.GET,
+            api_version=getattr(request, 'API_VERSION', None),
+            carrier=get_carrier(),
+            devices=(request.GAIA, request.MOBILE, request.TABLET),
+            lang=translation.get_language(),
+            region=region.id if region else None)
 
     def get_search_data(self, request):
         form = self.form_class(request.GET if request else None)
@@ -224,33 +264,44 @@ class SearchView(CORSMixin, MarketplaceView, GenericAPIView):
 class FeaturedSearchView(SearchView):
     collections_serializer_class = CollectionSerializer
 
-    def collections(self, request, collection_type=None, limit=1):
+    def collections(self, request, collection_types, limit=1):
+        """
+        Return a dict of {collection type: (serialized collections, filter
+        fallback)} with up to `limit` collections of each type.
+        """
         filters = request.GET.dict()
         region = self.get_region_from_request(request)
         if region:
             filters.setdefault('region', region.slug)
-        if collection_type is not None:
-            qs = Collection.public.filter(collection_type=collection_type)
-        else:
-            qs = Collection.public.all()
-        qs = CollectionFilterSetWithFallback(filters, queryset=qs).qs
-        preview_mode = filters.get('preview', False)
-        serializer = self.collections_serializer_class(
-            qs[:limit], many=True, context={
-                'request': request,
-                'view': self,
-                'use-es-for-apps': not preview_mode}
-        )
-        return serializer.data, getattr(qs, 'filter_fallback', None)
+        resolved = resolve_collections(filters, collection_types, limit=limit)
 
-    def get(self, request, *args, **kwargs):
-        serializer, _ = self.search(request)
-        data, filter_fallbacks = self.add_featured_etc(request,
-                                                       serializer.data)
-        response = Response(data)
-        for name, value in filter_fallbacks.items():
-            response['API-Fallback-%s' % name] = ','.join(value)
-        return response
+        ids = [pk for type_ids, fallback in resolved.values()
+               for pk in type_ids]
+        collections = {}
+        if ids:
+            collections = dict((c.pk, c) for c in
+                               Collection.public.filter(pk__in=ids))
+
+        preview_mode = filters.get('preview', False)
+        context = {
+            'request': request,
+            'view': self,
+            'use-es-for-apps': not preview_mode
+        }
+        result = {}
+        for collection_type, (type_ids, fallback) in resolved.items():
+            serializer = self.collections_serializer_class(
+                [collections[pk] for pk in type_ids if pk in collections],
+                many=True, context=context)
+            result[collection_type] = serializer.data, fallback
+        return result
+
+    def render_search(self, request):
+        data, _ = super(FeaturedSearchView, self).render_search(request)
+        data, filter_fallbacks = self.add_featured_etc(request, data)
+        headers = dict(('API-Fallback-%s' % name, ','.join(value))
+                       for name, value in filter_fallbacks.items())
+        return data, headers
 
     def add_featured_etc(self, request, data):
         # Tarako categories don't have collections.
@@ -261,10 +312,11 @@ class FeaturedSearchView(SearchView):
             ('featured', COLLECTIONS_TYPE_FEATURED),
             ('operator', COLLECTIONS_TYPE_OPERATOR),
         )
+        collections = self.collections(
+            request, [col_type for name, col_type in types])
         filter_fallbacks = {}
         for name, col_type in types:
-            data[name], fallback = self.collections(request,
-                                                    collection_type=col_type)
+            data[name], fallback = collections[col_type]
             if fallback:
                 filter_fallbacks[name] = fallback
 
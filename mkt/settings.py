@@ -90,6 +90,7 @@ INSTALLED_APPS = (
     'csp',
     'jingo_minify',
     'lib.es',
+    'lib.geoip',
     'product_details',
     'tower',  # for ./manage.py extract
     'mkt.translations',
@@ -483,6 +484,11 @@ API_SHOW_TRACEBACKS = False
 # Whether to throttle API requests. Default is True. Disable where appropriate.
 API_THROTTLE = True
 
+# Where OAuth nonces are stored to prevent replays: 'cache' uses an atomic
+# cache add(), falling back to the database if the cache is unavailable.
+# 'db' always uses the oauth_nonce table.
+OAUTH_NONCE_BACKEND = 'cache'
+
 # The version we append to the app feature profile. Bump when we add new app
 # features to the `AppFeatures` model.
 APP_FEATURES_VERSION = 4
@@ -547,6 +553,39 @@ CACHE_PREFIX = 'marketplace:%s' % build_id
 # Cache timeout on the /search/featured API.
 CACHE_SEARCH_FEATURED_API_TIMEOUT = 60 * 60  # 1 hour.
 
+# Cache timeout of the rendered feed. Set to 0 to disable the feed cache.
+FEED_CACHE_TIMEOUT = 60 * 15  # 15 minutes.
+# How long a rendered feed can be served while it's refreshed in the
+# background, once it has expired or has been invalidated.
+FEED_CACHE_STALE_TIMEOUT = 60 * 60 * 24  # 1 day.
+# How long to wait for a feed refresh before allowing another one.
+FEED_CACHE_REFRESH_TIMEOUT = 60
+
+# Cache timeout of anonymous search responses, which is how long changes to
+# apps can take to show up in them. They are invalidated when the apps are
+# fully reindexed. Set to 0 to disable the cache.
+SEARCH_CACHE_TIMEOUT = 60 * 5  # 5 minutes.
+
+# Cache timeout of the collections resolved for the featured search. They are
+# also invalidated when collections change. Set to 0 to disable the cache.
+COLLECTIONS_FEATURED_CACHE_TIMEOUT = 60 * 60
+
+# Cache timeout of the reviewer queue counts. They are also invalidated when
+# the queues change. Set to 0 to disable the cache.
+REVIEWER_QUEUE_STATS_TIMEOUT = 60
+
+# Cache timeout of the rendered activity logs. Set to 0 to disable the cache.
+ACTIVITY_LOG_STRING_CACHE_TIMEOUT = 60 * 60
+
+# Purified translations read without an up to date cleaned string are queued
+# for cleaning in the background at most once per this many seconds. Set to 0
+# to disable.
+TRANSLATIONS_CLEAN_QUEUE_TIMEOUT = 60 * 60
+
+# Cache timeout of translations, cached by id with all their locales. They
+# are also invalidated when saved. Set to 0 to disable the cache.
+TRANSLATIONS_CACHE_TIMEOUT = 60 * 60
+
 # jingo-minify settings
 CACHEBUST_IMGS = True
 try:
@@ -697,12 +736,19 @@ ES_INDEXES = {
     'mkt_feed_collection': 'feed_collections',
     'mkt_feed_shelf': 'feed_shelves',
     'mkt_feed_item': 'feed_items',
+    'users': 'users',
     # Adding an index? Don't forget to add the indexer to ESTestCase.
     # Also add the index to reindex_mkt.py.
 }
 ES_URLS = ['http://%s' % h for h in ES_HOSTS]
 ES_USE_PLUGINS = False
 ES_TIMEOUT = 30
+# Default number of parallel indexing tasks per index for
+# `reindex_mkt --parallel`.
+ES_REINDEX_CONCURRENCY = 4
+# App saves are coalesced into one bulk reindexing per this many seconds.
+# Set to 0 to reindex each save separately.
+ES_REINDEX_COALESCE_WINDOW = 10
 
 # When True include full tracebacks in JSON. This is useful for QA on preview.
 EXPOSE_VALIDATOR_TRACEBACKS = True
@@ -713,6 +759,10 @@ FETCH_BY_ID = True
 # The maximum file size that is shown inside the file viewer.
 FILE_VIEWER_SIZE_LIMIT = 1048576
 
+# How long the file viewer caches the listing of a zip file. It is cached
+# under the file hash, so it never needs to be invalidated.
+FILE_VIEWER_CACHE_TIMEOUT = 60 * 60 * 24
+
 # The maximum file size that you can have inside a zip file.
 FILE_UNZIP_SIZE_LIMIT = 104857600
 
@@ -737,6 +787,17 @@ if DEBUG:
 GEOIP_URL = ''
 GEOIP_DEFAULT_VAL = 'restofworld'
 GEOIP_DEFAULT_TIMEOUT = .2
+# Lookups are cached in-process by /24 prefix for GEOIP_CACHE_TTL seconds, in
+# a LRU cache of GEOIP_CACHE_SIZE entries. Failed lookups are cached for
+# GEOIP_NEGATIVE_CACHE_TTL seconds. Set to 0 to disable.
+GEOIP_CACHE_TTL = 60 * 60
+GEOIP_CACHE_SIZE = 10000
+GEOIP_NEGATIVE_CACHE_TTL = 60
+# Also cache lookups in memcache for this many seconds. Set to 0 to disable.
+GEOIP_MEMCACHE_TTL = 0
+# Path to an offline database built with `manage.py build_geoip_db`, tried
+# before the GeoIP server.
+GEOIP_OFFLINE_DB = ''
 
 # Credentials for accessing Google Analytics stats.
 GOOGLE_ANALYTICS_CREDENTIALS = {}
@@ -915,6 +976,14 @@ MINIFY_MOZMARKET = True
 MONOLITH_SERVER = None
 MONOLITH_INDEX = 'time_*'
 MONOLITH_MAX_DATE_RANGE = 365
+# Records are buffered in each process and written in bulk after the
+# requests (or tasks) once the buffer holds MONOLITH_BUFFER_FLUSH_SIZE records
+# or every MONOLITH_BUFFER_FLUSH_INTERVAL seconds. When MONOLITH_BUFFER_SIZE
+# records are waiting, the oldest ones are dropped. Set MONOLITH_BUFFER_SIZE
+# to 0 to write the records synchronously.
+MONOLITH_BUFFER_SIZE = 10000
+MONOLITH_BUFFER_FLUSH_SIZE = 100
+MONOLITH_BUFFER_FLUSH_INTERVAL = 10
 
 # The issuer for unverified Persona email addresses.
 # We only trust one issuer to grant us unverified emails.
@@ -1191,6 +1260,18 @@ WEBAPPS_RECEIPT_EXPIRY_SECONDS = 60 * 60 * 24 * 182
 # The key we'll use to sign webapp receipts.
 WEBAPPS_RECEIPT_KEY = os.path.join(ROOT, 'mkt/webapps/tests/sample.key')
 
+# The most receipts that can be verified in one batch verification request.
+WEBAPPS_RECEIPT_BATCH_SIZE = 100
+
+# The receipt verifier caches the status of purchases in memcache for
+# WEBAPPS_RECEIPT_STATUS_CACHE_TIMEOUT seconds, and in-process in a LRU cache
+# of WEBAPPS_RECEIPT_STATUS_CACHE_SIZE entries for
+# WEBAPPS_RECEIPT_STATUS_LRU_TIMEOUT seconds. Refunds clear memcache, so keep
+# the in-process timeout short. Set to 0 to disable.
+WEBAPPS_RECEIPT_STATUS_CACHE_TIMEOUT = 60 * 5
+WEBAPPS_RECEIPT_STATUS_LRU_TIMEOUT = 10
+WEBAPPS_RECEIPT_STATUS_CACHE_SIZE = 10000
+
 WEBAPPS_UNIQUE_BY_DOMAIN = False
 
 # Whitelist IP addresses of the allowed clients that can post email
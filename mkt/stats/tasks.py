@@ -1,6 +1,8 @@
 import json
 import logging
 import datetime
+import functools
+from collections import Counter
 
 from celeryutils import task
 
@@ -9,7 +11,7 @@ from amo.decorators import write
 from mkt.constants.regions import REGIONS_CHOICES_SLUG
 from mkt.monolith.models import MonolithRecord
 from mkt.ratings.models import Review
-from mkt.webapps.models import AddonUser, Webapp
+from mkt.webapps.models import AddonExcludedRegion, AddonUser, Webapp
 from mkt.users.models import UserProfile
 
 
@@ -23,6 +25,7 @@ def update_monolith_stats(metric, date, **kw):
 
     jobs = _get_monolith_jobs(date)[metric]
 
+    records = []
     for job in jobs:
         try:
             # Only record if count is greater than zero.
@@ -32,8 +35,8 @@ def update_monolith_stats(metric, date, **kw):
                 if 'dimensions' in job:
                     value.update(job['dimensions'])
 
-                MonolithRecord.objects.create(recorded=date, key=metric,
-                                              value=json.dumps(value))
+                records.append(MonolithRecord(recorded=date, key=metric,
+                                              value=json.dumps(value)))
 
                 log.info('Monolith stats details: (%s) has (%s) for (%s). '
                          'Value: %s' % (metric, count, date, value))
@@ -45,6 +48,39 @@ def update_monolith_stats(metric, date, **kw):
             log.critical('Update of monolith table failed: (%s): %s'
                          % ([metric, date], e))
 
+    try:
+        MonolithRecord.objects.bulk_create(records)
+    except Exception as e:
+        log.critical('Update of monolith table failed: (%s): %s'
+                     % ([metric, date], e))
+
+
+def _count_by_region(apps, field):
+    """
+    Return a callable counting the apps in `apps` for a region and a value of
+    `field`, i.e. `count(region_id, value)`, excluding the apps excluded
+    from that region.
+
+    The apps and their region exclusions are fetched once, the first time
+    the callable is used, and all the counts are computed from them.
+    """
+    counts = []
+
+    def count(region_id, value):
+        if not counts:
+            values = dict(apps.values_list('id', field))
+            totals = Counter(values.values())
+            exclusions = (AddonExcludedRegion.objects
+                          .filter(addon__in=apps.values_list('id', flat=True))
+                          .values_list('addon', 'region'))
+            excluded = Counter((region, values[app_id])
+                               for app_id, region in exclusions
+                               if app_id in values)
+            counts.append((totals, excluded))
+        totals, excluded = counts[0]
+        return totals[value] - excluded[region_id, value]
+    return count
+
 
 def _get_monolith_jobs(date=None):
     """
@@ -103,73 +139,44 @@ def _get_monolith_jobs(date=None):
         }],
     }
 
-    # Add various "Apps Added" for all the dimensions we need.
-    apps = Webapp.objects.filter(created__range=(date, next_date))
-
-    package_counts = []
-    premium_counts = []
+    # Add various "Apps Added" and "Apps Available" for all the dimensions we
+    # need.
+    added = Webapp.objects.filter(created__range=(date, next_date))
+    available = Webapp.objects.filter(
+        _current_version__reviewed__lt=next_date, status=amo.STATUS_PUBLIC,
+        disabled_by_user=False)
 
     # privileged==packaged for our consideration.
     package_types = amo.ADDON_WEBAPP_TYPES.copy()
     package_types.pop(amo.ADDON_WEBAPP_PRIVILEGED)
 
-    for region_slug, region in REGIONS_CHOICES_SLUG:
-        # Apps added by package type and region.
-        for package_type in package_types.values():
-            package_counts.append({
-                'count': (apps
-                          .filter(is_packaged=package_type == 'packaged')
-                          .exclude(addonexcludedregion__region=region.id)
-                          .count),
-                'dimensions': {'region': region_slug,
-                               'package_type': package_type},
-            })
-
-        # Apps added by premium type and region.
-        for premium_type, pt_name in amo.ADDON_PREMIUM_API.items():
-            premium_counts.append({
-                'count': (apps
-                          .filter(premium_type=premium_type)
-                          .exclude(addonexcludedregion__region=region.id)
-                          .count),
-                'dimensions': {'region': region_slug,
-                               'premium_type': pt_name},
-            })
-
-    stats.update({'apps_added_by_package_type': package_counts})
-    stats.update({'apps_added_by_premium_type': premium_counts})
-
-    # Add various "Apps Available" for all the dimensions we need.
-    apps = Webapp.objects.filter(_current_version__reviewed__lt=next_date,
-                                 status=amo.STATUS_PUBLIC,
-                                 disabled_by_user=False)
-    package_counts = []
-    premium_counts = []
-
-    for region_slug, region in REGIONS_CHOICES_SLUG:
-        # Apps available by package type and region.
-        for package_type in package_types.values():
-            package_counts.append({
-                'count': (apps
-                          .filter(is_packaged=package_type == 'packaged')
-                          .exclude(addonexcludedregion__region=region.id)
-                          .count),
-                'dimensions': {'region': region_slug,
-                               'package_type': package_type},
-            })
-
-        # Apps available by premium type and region.
-        for premium_type, pt_name in amo.ADDON_PREMIUM_API.items():
-            premium_counts.append({
-                'count': (apps
-                          .filter(premium_type=premium_type)
-                          .exclude(addonexcludedregion__region=region.id)
-                          .count),
-                'dimensions': {'region': region_slug,
-                               'premium_type': pt_name},
-            })
-
-    stats.update({'apps_available_by_package_type': package_counts})
-    stats.update({'apps_available_by_premium_type': premium_counts})
+    for name, apps in (('added', added), ('available', available)):
+        count_by_package = _count_by_region(apps, 'is_packaged')
+        count_by_premium = _count_by_region(apps, 'premium_type')
+        package_counts = []
+        premium_counts = []
+
+        for region_slug, region in REGIONS_CHOICES_SLUG:
+            # Apps by package type and region.
+            for package_type in package_types.values():
+                package_counts.append({
+                    'count': functools.partial(
+                        count_by_package, region.id,
+                        package_type == 'packaged'),
+                    'dimensions': {'region': region_slug,
+                                   'package_type': package_type},
+                })
+
+            # Apps by premium type and region.
+            for premium_type, pt_name in amo.ADDON_PREMIUM_API.items():
+                premium_counts.append({
+                    'count': functools.partial(
+                        count_by_premium, region.id, premium_type),
+                    'dimensions': {'region': region_slug,
+                                   'premium_type': pt_name},
+                })
+
+        stats['apps_%s_by_package_type' % name] = package_counts
+        stats['apps_%s_by_premium_type' % name] = premium_counts
 
     return stats
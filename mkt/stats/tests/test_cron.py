@@ -1,10 +1,10 @@
 import datetime
 
-import mock
 from nose.tools import eq_
 
 import amo.tests
 from mkt.constants.regions import REGIONS_CHOICES_SLUG
+from mkt.monolith.models import MonolithRecord
 from mkt.ratings.models import Review
 from mkt.stats import tasks
 from mkt.versions.models import Version
@@ -14,14 +14,24 @@ from mkt.users.models import UserProfile
 
 class TestMonolithStats(amo.tests.TestCase):
 
-    @mock.patch('mkt.stats.tasks.MonolithRecord')
-    def test_mmo_user_total_count_updates_monolith(self, record):
+    def test_mmo_user_total_count_updates_monolith(self):
         UserProfile.objects.create(source=amo.LOGIN_SOURCE_MMO_BROWSERID)
         metric = 'mmo_user_count_total'
 
         tasks.update_monolith_stats(metric, datetime.date.today())
-        self.assertTrue(record.objects.create.called)
-        eq_(record.objects.create.call_args[1]['value'], '{"count": 1}')
+        record = MonolithRecord.objects.get(key=metric)
+        eq_(record.value, '{"count": 1}')
+
+    def test_app_added_counts_updates_monolith(self):
+        Addon.objects.create(type=amo.ADDON_WEBAPP)
+        metric = 'apps_added_by_premium_type'
+
+        # 1 query for the apps, 1 for their region exclusions and 1 insert.
+        with self.assertNumQueries(3):
+            tasks.update_monolith_stats(metric, datetime.date.today())
+        # One record per region, only for the premium type of the app.
+        eq_(MonolithRecord.objects.filter(key=metric).count(),
+            len(REGIONS_CHOICES_SLUG))
 
     def test_app_new(self):
         Addon.objects.create(type=amo.ADDON_WEBAPP)
@@ -0,0 +1,42 @@
+import logging
+
+from django.core.management.base import BaseCommand
+from django.db.models import get_models, Q
+
+from amo.utils import chunked
+from mkt.translations.models import PurifiedTranslation, Translation
+from mkt.translations.tasks import clean_translations
+
+
+log = logging.getLogger('z.task')
+
+
+class Command(BaseCommand):
+    """
+    Clean the translations of purified fields that were never cleaned, or
+    were cleaned by an older version of the cleaner.
+    """
+    help = __doc__
+
+    def handle(self, *args, **kw):
+        for model in get_models():
+            for field in getattr(model._meta, 'translated_fields', []):
+                trans_model = field.rel.to
+                if not issubclass(trans_model, PurifiedTranslation):
+                    continue
+                ids = (model._base_manager.exclude(**{field.name: None})
+                       .values_list(field.name, flat=True))
+                for chunk in chunked(ids, 1000):
+                    autoids = list(
+                        Translation.objects.no_cache()
+                        .filter(id__in=chunk)
+                        .exclude(localized_string=None)
+                        .filter(Q(localized_string_clean=None) |
+                                Q(clean_version__lt=
+                                  trans_model.cleaner_version))
+                        .values_list('autoid', flat=True))
+                    if autoids:
+                        log.info('Cleaning %s translations of %s.%s'
+                                 % (len(autoids), model.__name__, field.name))
+                        clean_translations.delay(autoids,
+                                                 trans_model.__name__)
@@ -1,3 +1,5 @@
+from django.conf import settings
+from django.core.cache import cache
 from django.db import connections, models, router
 from django.db.models.deletion import Collector
 from django.utils import encoding
@@ -15,14 +17,25 @@ from . import utils
 log = commonware.log.getLogger('z.translations')
 
 
+def translation_cache_key(id):
+    """The key of all the locales of translation `id` in the cache."""
+    return 'translations:%s' % id
+
+
+def clear_translation_cache(ids):
+    cache.delete_many([translation_cache_key(id) for id in ids])
+
+
 class TranslationManager(amo.models.ManagerBase):
 
     def remove_for(self, obj, locale):
         """Remove a locale for the given object."""
-        ids = [getattr(obj, f.attname) for f in obj._meta.translated_fields]
-        qs = Translation.objects.filter(id__in=filter(None, ids),
-                                        locale=locale)
-        qs.update(localized_string=None, localized_string_clean=None)
+        ids = filter(None, [getattr(obj, f.attname)
+                            for f in obj._meta.translated_fields])
+        qs = Translation.objects.filter(id__in=ids, locale=locale)
+        qs.update(localized_string=None, localized_string_clean=None,
+                  clean_version=0)
+        clear_translation_cache(ids)
 
 
 class Translation(amo.models.ModelBase):
@@ -38,6 +51,9 @@ class Translation(amo.models.ModelBase):
     locale = models.CharField(max_length=10)
     localized_string = models.TextField(null=True)
     localized_string_clean = models.TextField(null=True)
+    # The `PurifiedTranslation.cleaner_version` localized_string_clean was
+    # made with.
+    clean_version = models.PositiveSmallIntegerField(default=0)
 
     objects = TranslationManager()
 
@@ -154,7 +170,17 @@ class Translation(amo.models.ModelBase):
 
 
 class PurifiedTranslation(Translation):
-    """Run the string through bleach to get a safe version."""
+    """
+    Run the string through bleach to get a safe version.
+
+    The cleaned string is stored when the translation is saved. Bump
+    `cleaner_version` when changing how strings are cleaned (the allowed
+    tags or attributes, `clean_localized_string()`...): translations cleaned
+    by an older version keep being shown until they are cleaned again in the
+    background, either when they are read or by the `clean_translations`
+    command.
+    """
+    cleaner_version = 1
     allowed_tags = [
         'a',
         'abbr',
@@ -179,6 +205,10 @@ class PurifiedTranslation(Translation):
         proxy = True
 
     def __unicode__(self):
+        if (self.localized_string and
+                (not self.localized_string_clean or
+                 self.clean_version != self.cleaner_version)):
+            self.queue_clean()
         if not self.localized_string_clean:
             self.clean()
         return unicode(self.localized_string_clean)
@@ -194,6 +224,19 @@ class PurifiedTranslation(Translation):
         super(PurifiedTranslation, self).clean()
         cleaned = self.clean_localized_string()
         self.localized_string_clean = clean_nl(cleaned).strip()
+        self.clean_version = self.cleaner_version
+
+    def queue_clean(self):
+        """
+        Clean and store this translation in the background, once per version
+        of the cleaner.
+        """
+        if not (self.autoid and settings.TRANSLATIONS_CLEAN_QUEUE_TIMEOUT):
+            return
+        key = 'translations:clean:%s:%s' % (self.autoid, self.cleaner_version)
+        if cache.add(key, True, settings.TRANSLATIONS_CLEAN_QUEUE_TIMEOUT):
+            from .tasks import clean_translations
+            clean_translations.delay([self.autoid], self.__class__.__name__)
 
     def clean_localized_string(self):
         # All links (text and markup) are normalized.
@@ -253,6 +296,20 @@ class TranslationSequence(models.Model):
         db_table = 'translations_seq'
 
 
+def clear_translation(sender, instance, **kw):
+    clear_translation_cache([instance.id])
+
+
+for cls in (Translation, PurifiedTranslation, LinkifiedTranslation,
+            NoLinksTranslation, NoLinksNoMarkupTranslation):
+    models.signals.post_save.connect(
+        clear_translation, sender=cls,
+        dispatch_uid='clear_translation_%s' % cls.__name__)
+    models.signals.post_delete.connect(
+        clear_translation, sender=cls,
+        dispatch_uid='delete_translation_%s' % cls.__name__)
+
+
 def delete_translation(obj, fieldname):
     field = obj._meta.get_field(fieldname)
     trans_id = getattr(obj, field.attname)
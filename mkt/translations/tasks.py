@@ -0,0 +1,26 @@
+import logging
+
+from celeryutils import task
+
+from mkt.translations import models
+
+log = logging.getLogger('z.task')
+
+
+@task
+def clean_translations(ids, model_name, **kw):
+    """
+    Clean the translations with autoids `ids` and store the result.
+    `model_name` is the name of the `PurifiedTranslation` class to clean
+    them with.
+    """
+    model = getattr(models, model_name)
+    log.info('[%s@%s] Cleaning %s translations.'
+             % (len(ids), clean_translations.rate_limit, model_name))
+    translations = list(model.objects.no_cache().filter(autoid__in=ids))
+    for trans in translations:
+        trans.clean()
+        model.objects.filter(autoid=trans.autoid).update(
+            localized_string_clean=trans.localized_string_clean,
+            clean_version=trans.clean_version)
+    models.clear_translation_cache(set(t.id for t in translations))
@@ -3,6 +3,8 @@ from contextlib import nested
 
 import django
 from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
 from django.db import connections, reset_queries
 from django.test.utils import override_settings
 from django.utils import translation
@@ -15,7 +17,7 @@ from nose import SkipTest
 from nose.tools import eq_
 from test_utils import trans_eq, TestCase
 
-from mkt.translations import widgets
+from mkt.translations import transformer, widgets
 from mkt.translations.models import (LinkifiedTranslation, NoLinksTranslation,
                                  NoLinksNoMarkupTranslation,
                                  PurifiedTranslation, Translation,
@@ -366,6 +368,16 @@ class TranslationTestCase(TestCase):
         eq_(unicode(obj.no_locale), 'blammo')
         eq_(obj.no_locale.locale, 'fr')
 
+    def test_require_locale_null_string(self):
+        obj = TranslatedModel.objects.get(id=1)
+        # The last row is in the current locale but has no string.
+        Translation.objects.create(id=obj.no_locale_id, locale='de',
+                                   localized_string=None)
+        translation.activate('de')
+        obj = TranslatedModel.objects.no_cache().get(id=1)
+        eq_(unicode(obj.no_locale), 'blammo')
+        eq_(obj.no_locale.locale, 'en-US')
+
     def test_delete_set_null(self):
         """
         Test that deleting a translation sets the corresponding FK to NULL,
@@ -407,6 +419,115 @@ class TranslationTestCase(TestCase):
         eq_(obj.name.locale, 'de')
 
 
+class PurifiedTranslationCleanTest(TestCase):
+    fixtures = ['testapp/test_models.json']
+    clean = ('<i>x</i> '
+             '<a rel="nofollow" href="http://yyy.com">http://yyy.com</a>')
+
+    def setUp(self):
+        cache.clear()
+
+    def get_purified(self):
+        return Translation.objects.get(id=20, locale='en-US')
+
+    def test_stored_on_save(self):
+        m = FancyModel.objects.create(purified=u'<b>x</b>')
+        trans = Translation.objects.get(id=m.purified_id)
+        eq_(trans.localized_string_clean, '<b>x</b>')
+        eq_(trans.clean_version, PurifiedTranslation.cleaner_version)
+
+    @patch('mkt.translations.tasks.clean_translations.delay')
+    def test_not_queued_when_disabled(self, delay):
+        eq_(unicode(FancyModel.objects.get(id=1).purified), self.clean)
+        assert not delay.called
+
+    @override_settings(TRANSLATIONS_CLEAN_QUEUE_TIMEOUT=60)
+    @patch('mkt.translations.tasks.clean_translations.delay')
+    def test_queued_when_missing(self, delay):
+        eq_(unicode(FancyModel.objects.get(id=1).purified), self.clean)
+        delay.assert_called_with([self.get_purified().autoid],
+                                 'PurifiedTranslation')
+
+        # Only once per version of the cleaner.
+        unicode(FancyModel.objects.get(id=1).purified)
+        eq_(delay.call_count, 1)
+
+    @override_settings(TRANSLATIONS_CLEAN_QUEUE_TIMEOUT=60)
+    @patch('mkt.translations.tasks.clean_translations.delay')
+    def test_outdated_served_and_queued(self, delay):
+        Translation.objects.filter(id=20).update(
+            localized_string_clean='old', clean_version=0)
+        eq_(unicode(FancyModel.objects.get(id=1).purified), 'old')
+        eq_(delay.call_count, 1)
+
+    @override_settings(TRANSLATIONS_CLEAN_QUEUE_TIMEOUT=60)
+    @patch('mkt.translations.tasks.clean_translations.delay')
+    def test_up_to_date_not_queued(self, delay):
+        Translation.objects.filter(id=20).update(
+            localized_string_clean='new',
+            clean_version=PurifiedTranslation.cleaner_version)
+        eq_(unicode(FancyModel.objects.get(id=1).purified), 'new')
+        assert not delay.called
+
+    def test_clean_translations_command(self):
+        Translation.objects.filter(id=20).update(
+            localized_string_clean='old', clean_version=0)
+        call_command('clean_translations')
+        trans = self.get_purified()
+        eq_(trans.localized_string_clean, self.clean)
+        eq_(trans.clean_version, PurifiedTranslation.cleaner_version)
+        # The linkified translation is cleaned with its own class.
+        eq_(Translation.objects.get(id=30, locale='en-US')
+            .localized_string_clean,
+            '&lt;i&gt;x&lt;/i&gt; '
+            '<a rel="nofollow" href="http://yyy.com">http://yyy.com</a>')
+
+
+@override_settings(TRANSLATIONS_CACHE_TIMEOUT=60)
+class TranslationCacheTest(TestCase):
+    fixtures = ['testapp/test_models.json']
+
+    def setUp(self):
+        cache.clear()
+        translation.activate('en-US')
+
+    def tearDown(self):
+        translation.deactivate()
+
+    def get_objects(self):
+        return list(TranslatedModel.objects.no_cache().no_transforms())
+
+    def test_shared_across_locales(self):
+        with self.assertNumQueries(1):
+            transformer.get_trans(self.get_objects())
+
+        translation.activate('de')
+        objs = self.get_objects()
+        with self.assertNumQueries(0):
+            transformer.get_trans(objs)
+        trans_eq(objs[0].name, 'German!! (unst unst)', 'de')
+        trans_eq(objs[0].description, 'some description', 'en-US')
+
+    def test_cleared_on_save(self):
+        o = TranslatedModel.objects.get(id=1)
+        trans_eq(o.name, 'some name', 'en-US')
+        o.name = 'new name'
+        o.save()
+        trans_eq(TranslatedModel.objects.no_cache().get(id=1).name,
+                 'new name', 'en-US')
+
+    def test_cleared_on_remove(self):
+        o = TranslatedModel.objects.get(id=1)
+        Translation.objects.remove_for(o, 'en-US')
+        eq_(TranslatedModel.objects.no_cache().get(id=1).name, None)
+
+    def test_locale_case_insensitive(self):
+        row = [None] * len(transformer.trans_fields)
+        row[transformer.LOCALE] = 'en-US'
+        eq_(transformer.find_row([row], 'en-us'), row)
+        eq_(transformer.find_row([row], 'fr'), None)
+
+
 class TranslationMultiDbTests(TestCase):
     fixtures = ['testapp/test_models.json']
 
@@ -1,87 +1,111 @@
 from django.conf import settings
+from django.core.cache import cache
 from django.db import connections, models, router
 from django.utils import translation
 
 from mkt.translations.fields import TranslatedField
-from mkt.translations.models import Translation
-
-isnull = """IF(!ISNULL({t1}.localized_string), {t1}.{col}, {t2}.{col})
-            AS {name}_{col}"""
-join = """LEFT OUTER JOIN translations {t}
-          ON ({t}.id={model}.{name} AND {t}.locale={locale})"""
-no_locale_join = """LEFT OUTER JOIN translations {t}
-                    ON {t}.id={model}.{name}"""
+from mkt.translations.models import Translation, translation_cache_key
 
 trans_fields = [f.name for f in Translation._meta.fields]
+ID, LOCALE, LOCALIZED_STRING = map(
+    trans_fields.index, ('id', 'locale', 'localized_string'))
+
+
+def get_translations(ids, connection):
+    """
+    Returns a dict of {translation id: [row, ...]} with the rows of all the
+    locales of the translations `ids`, ordered by autoid. A row holds the
+    values of `trans_fields`.
+
+    The translations are cached by id, the missing ones are fetched with one
+    query.
+    """
+    timeout = settings.TRANSLATIONS_CACHE_TIMEOUT
+    keys = dict((translation_cache_key(id_), id_) for id_ in ids)
+    found = {}
+    if timeout:
+        found = dict((keys[key], rows) for key, rows
+                     in cache.get_many(keys.keys()).items())
+    missing = [id_ for id_ in ids if id_ not in found]
+    if not missing:
+        return found
 
-
-def build_query(model, connection):
     qn = connection.ops.quote_name
-    selects, joins, params = [], [], []
-
-    # The model can define a fallback locale (which may be a Field).
-    if hasattr(model, 'get_fallback'):
-        fallback = model.get_fallback()
-    else:
-        fallback = settings.LANGUAGE_CODE
-
-    if not hasattr(model._meta, 'translated_fields'):
-        model._meta.translated_fields = [f for f in model._meta.fields
-                                         if isinstance(f, TranslatedField)]
-
-    # Add the selects and joins for each translated field on the model.
-    for field in model._meta.translated_fields:
-        if isinstance(fallback, models.Field):
-            fallback_str = '%s.%s' % (qn(model._meta.db_table),
-                                      qn(fallback.column))
-        else:
-            fallback_str = '%s'
-
-        name = field.column
-        d = {'t1': 't1_' + name, 't2': 't2_' + name,
-             'model': qn(model._meta.db_table), 'name': name}
-
-        selects.extend(isnull.format(col=f, **d) for f in trans_fields)
+    sql = """SELECT {fields} FROM translations WHERE id IN ({ids})
+             ORDER BY autoid""".format(
+        fields=', '.join(qn(f) for f in trans_fields),
+        ids=', '.join(['%s'] * len(missing)))
+    cursor = connection.cursor()
+    cursor.execute(sql, missing)
+    fetched = dict((id_, []) for id_ in missing)
+    for row in cursor.fetchall():
+        fetched[row[ID]].append(row)
 
-        joins.append(join.format(t=d['t1'], locale='%s', **d))
-        params.append(translation.get_language())
+    if timeout:
+        cache.set_many(dict((translation_cache_key(id_), rows)
+                            for id_, rows in fetched.items()), timeout)
+    found.update(fetched)
+    return found
 
-        if field.require_locale:
-            joins.append(join.format(t=d['t2'], locale=fallback_str, **d))
-            if not isinstance(fallback, models.Field):
-                params.append(fallback)
-        else:
-            joins.append(no_locale_join.format(t=d['t2'], **d))
 
-    # ids will be added later on.
-    sql = """SELECT {model}.{pk}, {selects} FROM {model} {joins}
-             WHERE {model}.{pk} IN {{ids}}"""
-    s = sql.format(selects=','.join(selects), joins='\n'.join(joins),
-                   model=qn(model._meta.db_table), pk=model._meta.pk.column)
-    return s, params
+def find_row(rows, locale):
+    """Returns the row of `rows` in `locale`, ignoring case like MySQL."""
+    locale = (locale or '').lower()
+    for row in rows:
+        if row[LOCALE].lower() == locale:
+            return row
 
 
 def get_trans(items):
+    """
+    Attach the translations of the current locale to `items`, falling back
+    to the locale of the model (or to any locale, if the field doesn't
+    require one).
+    """
     if not items:
         return
 
     model = items[0].__class__
+    if not hasattr(model._meta, 'translated_fields'):
+        model._meta.translated_fields = [f for f in model._meta.fields
+                                         if isinstance(f, TranslatedField)]
+
+    # The model can define a fallback locale (which may be a Field).
+    if hasattr(model, 'get_fallback'):
+        fallback = model.get_fallback()
+    else:
+        fallback = settings.LANGUAGE_CODE
+
     # FIXME: if we knew which db the queryset we are transforming used, we could
     # make sure we are re-using the same one.
     dbname = router.db_for_read(model)
-    connection = connections[dbname]
-    sql, params = build_query(model, connection)
-    item_dict = dict((item.pk, item) for item in items)
-    ids = ','.join(map(str, item_dict.keys()))
+    fields = model._meta.translated_fields
+    ids = set(getattr(item, field.attname) for item in items
+              for field in fields)
+    ids.discard(None)
+    if not ids:
+        return
+    translations = get_translations(ids, connections[dbname])
 
-    cursor = connection.cursor()
-    cursor.execute(sql.format(ids='(%s)' % ids), tuple(params))
-    step = len(trans_fields)
-    for row in cursor.fetchall():
-        # We put the item's pk as the first selected field.
-        item = item_dict[row[0]]
-        for index, field in enumerate(model._meta.translated_fields):
-            start = 1 + step * index
-            t = Translation(*row[start:start+step])
+    lang = translation.get_language()
+    for item in items:
+        if isinstance(fallback, models.Field):
+            item_fallback = getattr(item, fallback.attname)
+        else:
+            item_fallback = fallback
+        for field in fields:
+            rows = translations.get(getattr(item, field.attname), [])
+            row = find_row(rows, lang)
+            if row is None or row[LOCALIZED_STRING] is None:
+                if field.require_locale:
+                    row = find_row(rows, item_fallback)
+                else:
+                    # Any locale with a string will do.
+                    with_string = [r for r in rows
+                                   if r[LOCALIZED_STRING] is not None]
+                    row = with_string[-1] if with_string else None
+            if row is None:
+                continue
+            t = Translation(*row)
             if t.id is not None and t.localized_string is not None:
                 setattr(item, field.name, t)
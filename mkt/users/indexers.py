@@ -0,0 +1,103 @@
+"""
+Indexer for UserProfile, used by the lookup tool to find accounts without
+scanning the users table.
+"""
+from mkt.search.indexers import BaseIndexer
+
+
+class UserIndexer(BaseIndexer):
+    # The fields searched by the lookup tool.
+    search_fields = ('username', 'display_name', 'email')
+    # Changing one of these on a UserProfile reindexes it.
+    indexed_fields = search_fields + ('deleted', 'is_verified')
+    # Longest prefix indexed for each word. Longer words in queries are
+    # truncated to it by the search analyzer.
+    max_prefix_length = 20
+
+    @classmethod
+    def get_model(cls):
+        from mkt.users.models import UserProfile
+        return UserProfile
+
+    @classmethod
+    def get_analysis(cls):
+        """
+        Words are indexed with all their prefixes, so that a few letters of
+        any word of a name or email match. The `raw` sub-fields hold the whole
+        value, lowercased, for exact matches.
+        """
+        return {
+            'analyzer': {
+                'user_prefix': {
+                    'type': 'custom',
+                    'tokenizer': 'standard',
+                    'filter': ['lowercase', 'user_prefix_filter'],
+                },
+                'user_prefix_search': {
+                    'type': 'custom',
+                    'tokenizer': 'standard',
+                    'filter': ['lowercase', 'user_prefix_truncate'],
+                },
+                'user_exact': {
+                    'type': 'custom',
+                    'tokenizer': 'keyword',
+                    'filter': ['lowercase'],
+                },
+            },
+            'filter': {
+                'user_prefix_filter': {
+                    'type': 'edgeNGram',
+                    'min_gram': 1,
+                    'max_gram': cls.max_prefix_length,
+                },
+                'user_prefix_truncate': {
+                    'type': 'truncate',
+                    'length': cls.max_prefix_length,
+                },
+            },
+        }
+
+    @classmethod
+    def get_mapping(cls):
+        doc_type = cls.get_mapping_type_name()
+
+        def get_prefix_multifield(name):
+            # TODO: convert to new syntax on ES 1.0+.
+            return {
+                'type': 'multi_field',
+                'fields': {
+                    name: {'type': 'string',
+                           'index_analyzer': 'user_prefix',
+                           'search_analyzer': 'user_prefix_search'},
+                    'raw': {'type': 'string', 'analyzer': 'user_exact'},
+                }
+            }
+
+        properties = dict((field, get_prefix_multifield(field))
+                          for field in cls.search_fields)
+        properties.update({
+            'id': {'type': 'long'},
+            'deleted': {'type': 'boolean'},
+            'is_verified': {'type': 'boolean'},
+        })
+        return {
+            doc_type: {
+                # Disable _all field to reduce index size.
+                '_all': {'enabled': False},
+                'properties': properties,
+            }
+        }
+
+    @classmethod
+    def extract_document(cls, pk=None, obj=None):
+        if obj is None:
+            obj = cls.get_model().objects.get(pk=pk)
+
+        return {
+            'id': obj.id,
+            'deleted': obj.deleted,
+            'display_name': obj.display_name,
+            'email': obj.email,
+            'is_verified': obj.is_verified,
+            'username': obj.username,
+        }
@@ -6,6 +6,7 @@ from django.conf import settings
 from django.contrib.auth.models import AbstractBaseUser
 from django.core import validators
 from django.db import models
+from django.dispatch import receiver
 from django.utils import translation
 from django.utils.encoding import smart_unicode
 from django.utils.functional import lazy
@@ -249,6 +250,36 @@ models.signals.pre_save.connect(save_signal, sender=UserProfile,
                                 dispatch_uid='userprofile_translations')
 
 
+@UserProfile.on_change
+def watch_indexed_fields(old_attr={}, new_attr={}, instance=None, sender=None,
+                         **kw):
+    """
+    Keep the users index in sync. Only changes to indexed fields reindex the
+    user, so that logins and other bookkeeping don't.
+    """
+    from mkt.users.indexers import UserIndexer
+    if any(old_attr.get(field) != new_attr.get(field)
+           for field in UserIndexer.indexed_fields):
+        UserIndexer.index_ids([instance.id])
+
+
+@receiver(models.signals.post_save, sender=UserProfile,
+          dispatch_uid='userprofile.search.index')
+def create_search_index(sender, instance, created, **kw):
+    # The on_change snapshot is taken after the constructor kwargs are set,
+    # so new users are indexed here.
+    from mkt.users.indexers import UserIndexer
+    if created and not kw.get('raw'):
+        UserIndexer.index_ids([instance.id])
+
+
+@receiver(models.signals.post_delete, sender=UserProfile,
+          dispatch_uid='userprofile.search.unindex')
+def delete_search_index(sender, instance, **kw):
+    from mkt.users.indexers import UserIndexer
+    UserIndexer.unindexer([instance.id])
+
+
 class UserNotification(amo.models.ModelBase):
     user = models.ForeignKey(UserProfile, related_name='notifications')
     notification_id = models.IntegerField()
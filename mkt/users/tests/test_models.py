@@ -11,6 +11,7 @@ import amo.tests
 from mkt.access.models import Group, GroupUser
 from mkt.site.fixtures import fixture
 from mkt.ratings.models import Review
+from mkt.users.indexers import UserIndexer
 from mkt.users.models import UserEmailField, UserProfile
 from mkt.webapps.models import AddonUser, Webapp
 
@@ -88,6 +89,29 @@ class TestUserProfile(amo.tests.TestCase):
         self.assertTrue(sorted([a.name for a in addons]) == [addon1.name,
                                                              addon2.name])
 
+    @patch.object(UserIndexer, 'index_ids')
+    def test_reindex_indexed_fields(self, index_ids):
+        u = UserProfile.objects.get(pk=999)
+        u.update(email='fonzi@happydays.com')
+        index_ids.assert_called_once_with([999])
+
+    @patch.object(UserIndexer, 'index_ids')
+    def test_no_reindex_on_login(self, index_ids):
+        u = UserProfile.objects.get(pk=999)
+        u.log_login_attempt(True)
+        assert not index_ids.called
+
+    @patch.object(UserIndexer, 'index_ids')
+    def test_index_on_create(self, index_ids):
+        u = UserProfile.objects.create(username='yolo', email='yolo@foo.com')
+        index_ids.assert_called_with([u.pk])
+
+    @patch.object(UserIndexer, 'unindexer')
+    def test_unindex_on_delete(self, unindexer):
+        u = UserProfile.objects.create(username='yolo')
+        u.delete()
+        unindexer.assert_called_once_with([u.pk])
+
     @patch.object(settings, 'LANGUAGE_CODE', 'en-US')
     def test_activate_locale(self):
         eq_(translation.get_language(), 'en-us')
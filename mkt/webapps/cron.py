@@ -11,6 +11,7 @@ from django.db.models import Q
 import commonware.log
 import cronjobs
 import path
+import waffle
 from celery import chord
 
 import amo
@@ -21,8 +22,9 @@ from mkt.developers.models import ActivityLog
 from mkt.files.models import File
 
 from .models import Addon, Installed, Webapp
-from .tasks import (dump_user_installs, update_downloads, update_trending,
-                    zip_users)
+from .tasks import (dump_user_installs, update_downloads,
+                    update_downloads_bulk, update_trending,
+                    update_trending_bulk, zip_users)
 
 
 log = commonware.log.getLogger('z.cron')
@@ -147,13 +149,21 @@ def update_app_trending():
     Spread these tasks out successively by 15 seconds so they don't hit
     Monolith all at once.
 
-    """
-    chunk_size = 50
-    seconds_between = 15
+    With the `monolith-batch-queries` switch, each chunk of apps makes a
+    single Monolith query so the tasks aren't spread out.
 
+    """
     all_ids = list(Webapp.objects.filter(status=amo.STATUS_PUBLIC)
                    .values_list('id', flat=True))
 
+    if waffle.switch_is_active('monolith-batch-queries'):
+        for ids in chunked(all_ids, 500):
+            update_trending_bulk.delay(ids)
+        return
+
+    chunk_size = 50
+    seconds_between = 15
+
     countdown = 0
     for ids in chunked(all_ids, chunk_size):
         update_trending.delay(ids, countdown=countdown)
@@ -192,13 +202,21 @@ def update_app_downloads():
     Spread these tasks out successively by `seconds_between` seconds so they
     don't hit Monolith all at once.
 
-    """
-    chunk_size = 50
-    seconds_between = 2
+    With the `monolith-batch-queries` switch, each chunk of apps makes a
+    single Monolith query so the tasks aren't spread out.
 
+    """
     all_ids = list(Webapp.objects.filter(status=amo.STATUS_PUBLIC)
                    .values_list('id', flat=True))
 
+    if waffle.switch_is_active('monolith-batch-queries'):
+        for ids in chunked(all_ids, 500):
+            update_downloads_bulk.delay(ids)
+        return
+
+    chunk_size = 50
+    seconds_between = 2
+
     countdown = 0
     for ids in chunked(all_ids, chunk_size):
         update_downloads.delay(ids, countdown=countdown)
@@ -219,7 +237,8 @@ def mkt_gc(**kw):
         log.debug('Deleting log entries: %s' % str(chunk))
         amo.tasks.delete_logs.delay(chunk)
 
-    # Clear oauth nonce rows. These expire after 10 minutes but we're just
+    # Clear oauth nonce rows, when they are stored in the database or when
+    # the cache was unavailable. These expire after 10 minutes but we're just
     # clearing those that are more than 1 day old.
     Nonce.objects.filter(created__lt=days_ago(1)).delete()
 
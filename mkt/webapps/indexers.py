@@ -4,7 +4,7 @@ from operator import attrgetter
 
 from django.conf import settings
 from django.core.urlresolvers import reverse
-from django.db.models import Max, Min
+from django.db.models import Count, Max
 
 import commonware.log
 
@@ -157,6 +157,10 @@ class WebappIndexer(BaseIndexer):
                         }
                     },
                     'region_exclusions': {'type': 'short'},
+                    # Lower-cased keys of the features the app requires, to
+                    # filter by feature profile in a single filter.
+                    'required_features': {'type': 'string',
+                                          'index': 'not_analyzed'},
                     'reviewed': {'format': 'dateOptionalTime', 'type': 'date'},
                     'status': {'type': 'byte'},
                     'supported_locales': {'type': 'string',
@@ -219,57 +223,179 @@ class WebappIndexer(BaseIndexer):
         return mapping
 
     @classmethod
-    def extract_document(cls, pk=None, obj=None):
-        """Extracts the ElasticSearch index document for this instance."""
-        from mkt.webapps.models import (AppFeatures, attach_devices,
-                                        attach_prices, attach_tags,
-                                        attach_translations, Geodata,
-                                        Installed, RatingDescriptors,
+    def get_related_data(cls, objs):
+        """
+        Fetch everything extract_document() needs for `objs` in a fixed
+        number of set-based queries and return it as a dict of lookup maps,
+        keyed by app id unless noted otherwise.
+
+        This also attaches devices, prices, tags, translations, versions and
+        geodata directly on the objects.
+        """
+        from mkt.collections.models import CollectionMembership
+        from mkt.reviewers.models import EscalationQueue
+        from mkt.webapps.models import (Addon, AddonExcludedRegion,
+                                        AddonUpsell, AddonUser, AppFeatures,
+                                        attach_devices, attach_prices,
+                                        attach_tags, attach_translations,
+                                        ContentRating, Geodata, Installed,
+                                        Preview, RatingDescriptors,
                                         RatingInteractives, Webapp)
 
-        if obj is None:
-            obj = cls.get_model().objects.no_cache().get(pk=pk)
+        objs = list(objs)
+        ids = [obj.id for obj in objs]
+        objs_dict = dict((obj.id, obj) for obj in objs)
 
         # Attach everything we need to index apps.
         for transform in (attach_devices, attach_prices, attach_tags,
                           attach_translations):
-            transform([obj])
+            transform(objs)
+        Addon.attach_related_versions(objs, objs_dict)
+
+        # Premiums, with their price. Only attached as `_premium` to premium
+        # apps, like Addon.attach_prices() does.
+        premiums = dict(
+            (p.addon_id, p) for p in AddonPremium.objects.no_cache()
+            .filter(addon__in=ids).select_related('price'))
+        for obj in objs:
+            obj._premium = (premiums.get(obj.id) if obj.is_premium()
+                            else None)
+
+        def rollup(qs, key='addon_id'):
+            return dict((k, list(vs)) for k, vs in
+                        amo.utils.sorted_groupby(qs, key))
+
+        # Geodata, along with its translations.
+        geodatas = list(Geodata.objects.no_cache().filter(addon__in=ids))
+        amo.utils.attach_trans_dict(Geodata, geodatas)
+        for geodata in geodatas:
+            objs_dict[geodata.addon_id]._geodata = geodata
+
+        # All non-deleted versions, release notes for the current ones and
+        # the features of the current ones.
+        versions = rollup(Version.objects.no_cache().filter(addon__in=ids))
+        current_versions = filter(None, (obj.current_version for obj in objs))
+        amo.utils.attach_trans_dict(Version, current_versions)
+        features = dict(
+            (f.version_id, f) for f in AppFeatures.objects.no_cache().filter(
+                version__in=[v.id for v in current_versions]))
+
+        installed = dict(
+            Installed.objects.filter(addon__in=ids).order_by()
+                     .values_list('addon').annotate(Count('id')))
+        owners = rollup(AddonUser.objects.no_cache()
+                        .filter(addon__in=ids, role=amo.AUTHOR_ROLE_OWNER)
+                        .values_list('addon', 'user'), key=lambda x: x[0])
+        excluded_regions = rollup(
+            AddonExcludedRegion.objects.filter(addon__in=ids)
+                               .values_list('addon', 'region'),
+            key=lambda x: x[0])
+
+        max_downloads = float(
+            Webapp.objects.aggregate(Max('weekly_downloads')).values()[0] or 0)
+
+        return {
+            'collections': rollup(CollectionMembership.objects.no_cache()
+                                  .filter(app__in=ids), key='app_id'),
+            'content_ratings': rollup(
+                ContentRating.objects.no_cache().filter(addon__in=ids)),
+            'descriptors': dict(
+                (r.addon_id, r) for r in
+                RatingDescriptors.objects.no_cache().filter(addon__in=ids)),
+            'escalated': set(EscalationQueue.objects.no_cache()
+                             .filter(addon__in=ids)
+                             .values_list('addon', flat=True)),
+            # Keyed by version id.
+            'features': features,
+            'excluded_regions': dict(
+                (k, [r for _, r in v]) for k, v in excluded_regions.items()),
+            'installed': installed,
+            'interactives': dict(
+                (r.addon_id, r) for r in
+                RatingInteractives.objects.no_cache().filter(addon__in=ids)),
+            'max_downloads': max_downloads,
+            'owners': dict((k, [u for _, u in v]) for k, v in owners.items()),
+            'premiums': premiums,
+            'previews': rollup(Preview.objects.no_cache()
+                               .filter(addon__in=ids).no_transforms()),
+            'upsells': dict(
+                (u.free_id, u) for u in AddonUpsell.objects.no_cache()
+                .filter(free__in=ids).select_related('premium')),
+            'versions': versions,
+        }
+
+    @classmethod
+    def extract_documents(cls, objs):
+        """
+        Extracts the ElasticSearch index documents for a list of instances,
+        sharing the related data queries between all of them.
+        """
+        related = cls.get_related_data(objs)
+        return [cls.extract_document(obj.id, obj=obj, related=related)
+                for obj in objs]
+
+    @classmethod
+    def extract_document(cls, pk=None, obj=None, related=None):
+        """
+        Extracts the ElasticSearch index document for this instance.
+
+        `related` is the dict returned by get_related_data(). If it's not
+        provided it will be fetched for this instance only.
+        """
+        from mkt.webapps.models import AppFeatures
+
+        if obj is None:
+            obj = cls.get_model().objects.no_cache().get(pk=pk)
+        if related is None:
+            related = cls.get_related_data([obj])
 
         latest_version = obj.latest_version
         version = obj.current_version
         geodata = obj.geodata
-        features = (version.features.to_dict()
-                    if version else AppFeatures().to_dict())
-        is_escalated = obj.escalationqueue_set.exists()
+        if version and version.id in related['features']:
+            features = related['features'][version.id].to_dict()
+        else:
+            features = AppFeatures().to_dict()
+        versions = related['versions'].get(obj.id, [])
 
         try:
             status = latest_version.statuses[0][1] if latest_version else None
         except IndexError:
             status = None
 
-        installed_ids = list(Installed.objects.filter(addon=obj)
-                             .values_list('id', flat=True))
+        installed_count = related['installed'].get(obj.id, 0)
 
         attrs = ('app_slug', 'bayesian_rating', 'created', 'id', 'is_disabled',
                  'last_updated', 'modified', 'premium_type', 'status', 'type',
-                 'uses_flash', 'weekly_downloads')
+                 'weekly_downloads')
         d = dict(zip(attrs, attrgetter(*attrs)(obj)))
 
-        d['boost'] = len(installed_ids) or 1
+        # Same as Addon.uses_flash, using the files attached to the version.
+        files = sorted(version.all_files if version else [],
+                       key=attrgetter('created'), reverse=True)
+        d['uses_flash'] = files[0].uses_flash if files else False
+
+        d['boost'] = installed_count or 1
         d['app_type'] = obj.app_type_id
         d['author'] = obj.developer_name
         d['banner_regions'] = geodata.banner_regions_slugs()
         d['category'] = obj.categories if obj.categories else []
         if obj.is_public:
             d['collection'] = [{'id': cms.collection_id, 'order': cms.order}
-                               for cms in obj.collectionmembership_set.all()]
+                               for cms in related['collections'].get(obj.id,
+                                                                     [])]
         else:
             d['collection'] = []
-        d['content_ratings'] = (obj.get_content_ratings_by_body(es=True) or
-                                None)
-        try:
-            d['content_descriptors'] = obj.rating_descriptors.to_keys()
-        except RatingDescriptors.DoesNotExist:
+        content_ratings = {}
+        for cr in related['content_ratings'].get(obj.id, []):
+            body = cr.get_body()
+            content_ratings[body.label] = {'body': body.id,
+                                           'rating': cr.get_rating().id}
+        d['content_ratings'] = content_ratings or None
+        if obj.id in related['descriptors']:
+            d['content_descriptors'] = (
+                related['descriptors'][obj.id].to_keys())
+        else:
             d['content_descriptors'] = []
         d['current_version'] = version.version if version else None
         d['default_locale'] = obj.default_locale
@@ -277,13 +403,16 @@ class WebappIndexer(BaseIndexer):
             set(string for _, string in obj.translations[obj.description_id]))
         d['device'] = getattr(obj, 'device_ids', [])
         d['features'] = features
+        d['required_features'] = sorted(k[len('has_'):]
+                                        for k, v in features.items() if v)
         d['has_public_stats'] = obj.public_stats
         d['icon_hash'] = obj.icon_hash
-        try:
-            d['interactive_elements'] = obj.rating_interactives.to_keys()
-        except RatingInteractives.DoesNotExist:
+        if obj.id in related['interactives']:
+            d['interactive_elements'] = (
+                related['interactives'][obj.id].to_keys())
+        else:
             d['interactive_elements'] = []
-        d['is_escalated'] = is_escalated
+        d['is_escalated'] = obj.id in related['escalated']
         d['is_offline'] = getattr(obj, 'is_offline', False)
         if latest_version:
             d['latest_version'] = {
@@ -304,25 +433,23 @@ class WebappIndexer(BaseIndexer):
         d['name'] = list(
             set(string for _, string in obj.translations[obj.name_id]))
         d['name_sort'] = unicode(obj.name).lower()
-        d['owners'] = [au.user.id for au in
-                       obj.addonuser_set.filter(role=amo.AUTHOR_ROLE_OWNER)]
-        d['popularity'] = len(installed_ids)
+        d['owners'] = related['owners'].get(obj.id, [])
+        d['popularity'] = installed_count
         d['previews'] = [{'filetype': p.filetype, 'modified': p.modified,
                           'id': p.id, 'sizes': p.sizes}
-                         for p in obj.previews.all()]
-        try:
-            p = obj.addonpremium.price
-            d['price_tier'] = p.name
-        except AddonPremium.DoesNotExist:
-            d['price_tier'] = None
+                         for p in related['previews'].get(obj.id, [])]
+        premium = related['premiums'].get(obj.id)
+        d['price_tier'] = (premium.price.name if premium and premium.price
+                           else None)
 
         d['ratings'] = {
             'average': obj.average_rating,
             'count': obj.total_reviews,
         }
-        d['region_exclusions'] = obj.get_excluded_region_ids()
-        d['reviewed'] = obj.versions.filter(
-            deleted=False).aggregate(Min('reviewed')).get('reviewed__min')
+        d['region_exclusions'] = obj.get_excluded_region_ids(
+            excluded=related['excluded_regions'].get(obj.id, []))
+        reviewed = filter(None, (v.reviewed for v in versions))
+        d['reviewed'] = min(reviewed) if reviewed else None
         if version:
             d['supported_locales'] = filter(
                 None, version.supported_locales.split(','))
@@ -330,8 +457,9 @@ class WebappIndexer(BaseIndexer):
             d['supported_locales'] = []
 
         d['tags'] = getattr(obj, 'tag_list', [])
-        if obj.upsell and obj.upsell.premium.is_public():
-            upsell_obj = obj.upsell.premium
+        upsell = related['upsells'].get(obj.id)
+        if upsell and upsell.premium.is_public():
+            upsell_obj = upsell.premium
             d['upsell'] = {
                 'id': upsell_obj.id,
                 'app_slug': upsell_obj.app_slug,
@@ -343,13 +471,12 @@ class WebappIndexer(BaseIndexer):
 
         d['versions'] = [dict(version=v.version,
                               resource_uri=reverse_version(v))
-                         for v in obj.versions.all()]
+                         for v in versions]
 
         # Calculate weight. It's similar to popularity, except that we can
         # expose the number - it's relative to the max weekly downloads for
         # the whole database.
-        max_downloads = float(
-            Webapp.objects.aggregate(Max('weekly_downloads')).values()[0] or 0)
+        max_downloads = related['max_downloads']
         if max_downloads:
             d['weight'] = math.ceil(d['weekly_downloads'] / max_downloads * 5)
         else:
@@ -364,14 +491,15 @@ class WebappIndexer(BaseIndexer):
                 in obj.translations[getattr(obj, '%s_id' % field)]
                 if string]
         if version:
-            amo.utils.attach_trans_dict(Version, [version])
             d['release_notes_translations'] = [
                 {'lang': to_language(lang), 'string': string}
                 for lang, string
                 in version.translations[version.releasenotes_id]]
         else:
             d['release_notes_translations'] = None
-        amo.utils.attach_trans_dict(Geodata, [geodata])
+        if not hasattr(geodata, 'translations'):
+            # Geodata was created on the fly by Webapp.geodata.
+            amo.utils.attach_trans_dict(geodata.__class__, [geodata])
         d['banner_message_translations'] = [
             {'lang': to_language(lang), 'string': string}
             for lang, string
@@ -420,6 +548,18 @@ class WebappIndexer(BaseIndexer):
 
         return d
 
+    @classmethod
+    def indexed(cls, ids):
+        """
+        Invalidate the cached feeds if they contain any of the apps.
+
+        Cached search responses are left to expire: invalidating them on each
+        app change would empty the cache all the time. They are invalidated
+        when the alias moves to a new index instead.
+        """
+        from mkt.feed.utils import invalidate_feed_cache
+        invalidate_feed_cache(app_ids=ids)
+
     @classmethod
     def get_indexable(cls):
         """Returns the queryset of ids of all things to be indexed."""
@@ -432,12 +572,14 @@ class WebappIndexer(BaseIndexer):
         from mkt.webapps.models import Webapp
         sys.stdout.write('Indexing %s webapps\n' % len(ids))
 
-        qs = Webapp.with_deleted.no_cache().filter(id__in=ids)
+        qs = list(Webapp.with_deleted.no_cache().filter(id__in=ids))
+        related = cls.get_related_data(qs)
 
         docs = []
         for obj in qs:
             try:
-                docs.append(cls.extract_document(obj.id, obj=obj))
+                docs.append(cls.extract_document(obj.id, obj=obj,
+                                                 related=related))
             except Exception as e:
                 sys.stdout.write('Failed to index webapp {0}: {1}\n'.format(
                     obj.id, e))
@@ -0,0 +1,57 @@
+import json
+import time
+from optparse import make_option
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.test.client import RequestFactory
+
+from amo.utils import JSONEncoder
+from mkt.regions.middleware import RegionMiddleware
+from mkt.webapps.indexers import WebappIndexer
+from mkt.webapps.serializers import ESAppSerializer
+
+
+class Command(BaseCommand):
+    """
+    Time the serialization of a page of search results by ESAppSerializer,
+    with and without its fast path, for an anonymous request. The results
+    come from the webapp index, which needs to have some apps.
+    """
+    help = __doc__
+    option_list = BaseCommand.option_list + (
+        make_option('--size', action='store', type='int', default=25,
+                    dest='size', help='Apps per page, default: %default'),
+        make_option('--runs', action='store', type='int', default=100,
+                    dest='runs', help='Pages to serialize, default: %default'),
+        make_option('--lang', action='store', type='string', dest='lang',
+                    help='Serialize a single translation in this language.'),
+    )
+
+    def handle(self, *args, **options):
+        hits = WebappIndexer.search()[:options['size']].execute().hits
+        if not hits:
+            raise CommandError('No apps in the webapp index.')
+
+        params = {'lang': options['lang']} if options['lang'] else {}
+        request = RequestFactory().get('/', params)
+        request.user = AnonymousUser()
+        RegionMiddleware().process_request(request)
+
+        results = {}
+        for fast_path in (False, True):
+            start = time.time()
+            for x in xrange(options['runs']):
+                serializer = ESAppSerializer(hits, many=True,
+                                             context={'request': request})
+                serializer.fast_path = fast_path
+                data = serializer.data
+            elapsed = (time.time() - start) * 1000 / options['runs']
+            results[fast_path] = json.dumps(data, cls=JSONEncoder,
+                                            sort_keys=True)
+            print '%s: %.2fms per page of %s apps' % (
+                'fast path' if fast_path else 'fake_object()', elapsed,
+                len(hits))
+
+        if results[True] != results[False]:
+            raise CommandError('The outputs differ.')
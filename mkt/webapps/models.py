@@ -1943,7 +1943,7 @@ class Webapp(Addon):
 
         return sorted(set(all_ids) - set(excluded or []))
 
-    def get_excluded_region_ids(self):
+    def get_excluded_region_ids(self, excluded=None):
         """
         Return IDs of regions for which this app is excluded.
 
@@ -1951,10 +1951,15 @@ class Webapp(Addon):
         this will also exclude any region that does not have the price tier
         set.
 
+        If `excluded` is provided we'll use that instead of doing our own
+        excluded lookup.
+
         Note: free and in-app are not included in this.
         """
-        excluded = set(self.addonexcludedregion
-                           .values_list('region', flat=True))
+        if excluded is None:
+            excluded = self.addonexcludedregion.values_list('region',
+                                                            flat=True)
+        excluded = set(excluded)
 
         if self.is_premium():
             all_regions = set(mkt.regions.ALL_REGION_IDS)
@@ -2528,8 +2533,8 @@ def update_search_index(sender, instance, **kw):
     from . import tasks
     if not kw.get('raw'):
         if instance.upsold and instance.upsold.free_id:
-            tasks.index_webapps.delay([instance.upsold.free_id])
-        tasks.index_webapps.delay([instance.id])
+            tasks.queue_reindex([instance.upsold.free_id])
+        tasks.queue_reindex([instance.id])
 
 
 @receiver(dbsignals.post_save, sender=AddonUpsell,
@@ -2539,9 +2544,9 @@ def update_search_index_upsell(sender, instance, **kw):
     # upsell/upsold properties in ES.
     from . import tasks
     if instance.free:
-        tasks.index_webapps.delay([instance.free.id])
+        tasks.queue_reindex([instance.free.id])
     if instance.premium:
-        tasks.index_webapps.delay([instance.premium.id])
+        tasks.queue_reindex([instance.premium.id])
 
 
 models.signals.pre_save.connect(save_signal, sender=Webapp,
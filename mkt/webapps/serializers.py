@@ -1,4 +1,5 @@
 import json
+from collections import namedtuple
 from decimal import Decimal
 
 from django.conf import settings
@@ -366,6 +367,59 @@ class AppSerializer(serializers.ModelSerializer):
         return instance
 
 
+ESVersionHit = namedtuple('ESVersionHit', 'version supported_locales')
+
+
+class ESAppHit(object):
+    """
+    A lightweight stand-in for a Webapp built from ES data, cheaper to build
+    than ESAppSerializer.fake_object(). It only has what the serializer
+    methods need for free apps, borrowing the Webapp methods that don't touch
+    the database.
+    """
+    icon_type = 'image/png'
+    get_absolute_url = Webapp.get_absolute_url.__func__
+    get_icon_url = Webapp.get_icon_url.__func__
+    get_regions = Webapp.get_regions.__func__
+    get_url_path = Webapp.get_url_path.__func__
+    is_premium = Webapp.is_premium.__func__
+
+    def __init__(self, data):
+        self.es_data = data
+        self.id = self.pk = data['id']
+        self.app_slug = data['app_slug']
+        self.current_version = ESVersionHit(data['current_version'],
+                                            data['supported_locales'])
+        self.default_locale = data.get('default_locale')
+        self.device_types = [DEVICE_TYPES[d] for d in data['device']]
+        self.icon_hash = data.get('icon_hash')
+        self.premium_type = data.get('premium_type')
+        self.public_stats = data['has_public_stats']
+        self.region_ids = sorted(set(mkt.regions.ALL_REGION_IDS) -
+                                 set(data['region_exclusions'] or []))
+        self.status = data.get('status')
+        self.weekly_downloads = data.get('weekly_downloads')
+
+    def has_premium(self):
+        # Premium apps are serialized from fake_object(), which has prices.
+        return False
+
+
+class ESPreviewHit(object):
+    """A lightweight stand-in for a Preview built from ES data."""
+    _image_url = Preview._image_url.__func__
+    file_extension = Preview.file_extension
+    image_url = Preview.image_url
+    thumbnail_size = Preview.thumbnail_size
+    thumbnail_url = Preview.thumbnail_url
+
+    def __init__(self, data, modified):
+        self.id = self.pk = data['id']
+        self.filetype = data['filetype']
+        self.modified = modified
+        self.sizes = data.get('sizes', {})
+
+
 class ESAppSerializer(BaseESSerializer, AppSerializer):
     # Fields specific to search.
     absolute_url = serializers.SerializerMethodField('get_absolute_url')
@@ -395,6 +449,29 @@ class ESAppSerializer(BaseESSerializer, AppSerializer):
     # The fields we want converted to Python date/datetimes.
     datetime_fields = ('created', 'modified', 'reviewed')
 
+    # Serialize free apps straight from the ES data, see to_native().
+    fast_path = True
+
+    # The values of the plain fields in the ES data, before they go through
+    # the field's to_native(), as they would be found on fake_object().
+    fast_values = {
+        'app_type': lambda data: amo.ADDON_WEBAPP_TYPES[data['app_type']],
+        'author': lambda data: data['author'],
+        'banner_regions': lambda data: [],
+        'categories': lambda data: data['category'],
+        'current_version': lambda data: data['current_version'],
+        'default_locale': lambda data: data.get('default_locale'),
+        'id': lambda data: data['id'],
+        'is_offline': lambda data: data.get('is_offline'),
+        'is_packaged': lambda data: (data['app_type'] !=
+                                     amo.ADDON_WEBAPP_HOSTED),
+        'manifest_url': lambda data: data.get('manifest_url'),
+        'premium_type': lambda data: data.get('premium_type'),
+        'public_stats': lambda data: data['has_public_stats'],
+        'slug': lambda data: data['app_slug'],
+        'status': lambda data: data.get('status'),
+    }
+
     class Meta(AppSerializer.Meta):
         fields = AppSerializer.Meta.fields + ['absolute_url', 'group',
                                               'reviewed']
@@ -405,6 +482,113 @@ class ESAppSerializer(BaseESSerializer, AppSerializer):
         # Remove fields that we don't have in ES at the moment.
         self.fields.pop('upsold', None)
 
+        # Per-request state of the fast path, built on first use.
+        self._fast_getters = None
+        self._fast_regions = {}
+
+    @amo.cached_property
+    def ratings_body(self):
+        return mkt.regions.REGION_TO_RATINGS_BODY().get(
+            self.context['request'].REGION.slug, 'generic')
+
+    def to_native(self, data):
+        """
+        Serialize free, public apps straight from the ES data with an
+        ESAppHit, without the models of fake_object() nor the DRF serializer
+        machinery, which dominate the cost of search results. Everything else
+        (premium apps need prices, signed-in users need their purchases)
+        goes through fake_object(). Both give the same output.
+        """
+        getters = self.get_fast_getters()
+        if getters:
+            data = (data._source if hasattr(data, '_source') else
+                    data.get('_source', data))
+            hit = ESAppHit(data)
+            # With no region, Webapp.get_regions() would hit the database.
+            if (not hit.is_premium() and hit.region_ids and
+                    hit.status != amo.STATUS_DELETED):
+                ret = self._dict_class()
+                for key, getter in getters:
+                    ret[key] = getter(hit)
+                return ret
+        return super(ESAppSerializer, self).to_native(data)
+
+    def get_fast_getters(self):
+        """
+        Return a list of (key, getter) for the fields, getter returning the
+        serialized value of the field from an ESAppHit, or False if this
+        serializer can't use the fast path.
+        """
+        if self._fast_getters is None:
+            self._fast_getters = self._build_fast_getters() or False
+        return self._fast_getters
+
+    def _build_fast_getters(self):
+        request = self.context.get('request')
+        if not self.fast_path or request is None:
+            return
+        if ('user' in self.fields and request.user.is_authenticated() and
+                self.get_user_info.__func__ is
+                AppSerializer.get_user_info.__func__):
+            return
+
+        getters = []
+        for name, field in self.fields.items():
+            if callable(getattr(self, 'transform_%s' % name, None)):
+                return
+            field.initialize(parent=self, field_name=name)
+            getter = self._build_fast_getter(name, field)
+            if getter is None:
+                return
+            getters.append((self.get_field_key(name), getter))
+        return getters
+
+    def _build_fast_getter(self, name, field):
+        if isinstance(field, serializers.SerializerMethodField):
+            method = getattr(self, field.method_name)
+            return lambda hit: field.to_native(method(hit))
+
+        # Fields added or overridden by subclasses aren't known here.
+        base = ESAppSerializer.base_fields.get(name)
+        if (base is None or type(field) is not type(base) or
+                field.source != base.source):
+            return
+
+        if isinstance(field, ESTranslationSerializerField):
+            key = (field.source or name + field.suffix).split('.')[-1]
+            return lambda hit: self._fast_translation(hit, field, key)
+        if name in self.datetime_fields:
+            return lambda hit: field.to_native(
+                self.to_datetime(hit.es_data.get(name)))
+        if name in self.fast_values:
+            value = self.fast_values[name]
+            return lambda hit: field.to_native(value(hit.es_data))
+        if name == 'previews':
+            return lambda hit: [
+                field.to_native(ESPreviewHit(p, self.to_datetime(
+                    p['modified']))) for p in hit.es_data['previews']]
+        if name == 'regions':
+            return lambda hit: self._fast_region_list(hit, field)
+        if name in ('privacy_policy', 'resource_uri'):
+            # Those only need the pk.
+            return lambda hit: field.field_to_native(hit, name)
+
+    def _fast_translation(self, hit, field, key):
+        translations = dict((v.get('lang', ''), v.get('string', ''))
+                            for v in hit.es_data.get(key, {}) or {})
+        if field.requested_language:
+            return field.fetch_single_translation(hit, key, translations)
+        return field.fetch_all_translations(hit, key, translations)
+
+    def _fast_region_list(self, hit, field):
+        # Most apps share their regions, serialize each list of regions once.
+        key = tuple(hit.region_ids)
+        if key not in self._fast_regions:
+            self._fast_regions[key] = [
+                field.to_native(region)
+                for region in hit.get_regions(hit.region_ids)]
+        return list(self._fast_regions[key])
+
     def fake_object(self, data):
         """Create a fake instance of Webapp and related models from ES data."""
         is_packaged = data['app_type'] != amo.ADDON_WEBAPP_HOSTED
@@ -466,8 +650,7 @@ class ESAppSerializer(BaseESSerializer, AppSerializer):
         return obj
 
     def get_content_ratings(self, obj):
-        body = (mkt.regions.REGION_TO_RATINGS_BODY().get(
-            self.context['request'].REGION.slug, 'generic'))
+        body = self.ratings_body
         prefix = 'has_%s' % body
 
         # Backwards incompat with old index.
@@ -9,8 +9,10 @@ import time
 
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
 from django.core.files.storage import default_storage as storage
 from django.core.urlresolvers import reverse
+from django.db import connection
 from django.template import Context, loader
 
 import elasticsearch
@@ -19,6 +21,7 @@ import requests
 from celery import chord
 from celery.exceptions import RetryTaskError
 from celeryutils import task
+from django_statsd.clients import statsd
 from requests.exceptions import RequestException
 from test_utils import RequestFactory
 from tower import ugettext as _
@@ -40,7 +43,7 @@ from mkt.reviewers.models import RereviewQueue
 from mkt.users.models import UserProfile
 from mkt.users.utils import get_task_user
 from mkt.webapps.indexers import WebappIndexer
-from mkt.webapps.models import Addon, AppManifest, Preview, Webapp
+from mkt.webapps.models import Addon, AppManifest, Preview, Trending, Webapp
 from mkt.webapps.utils import get_locale_properties
 
 
@@ -336,6 +339,100 @@ def index_webapps(ids, **kw):
     WebappIndexer.index_ids(ids)
 
 
+def _reindex_bucket_key(bucket, name):
+    return 'reindex:bucket:%s:%s' % (bucket, name)
+
+
+def _reindex_pending_key(bucket, id_):
+    return 'reindex:pending:%s:%s' % (bucket, id_)
+
+
+def queue_reindex(ids):
+    """
+    Queue the apps for reindexing, coalescing the ids saved during the same
+    ES_REINDEX_COALESCE_WINDOW seconds into a single bulk indexing.
+
+    Each window is a bucket in the cache. The first id queued in a bucket
+    schedules `flush_reindex_queue` a whole window after the end of that
+    window, so that the flush reads what the transactions of the requests
+    queuing the ids committed. Ids that are already pending in the bucket
+    aren't queued again. Ids pending in an earlier bucket are, since its flush
+    may run before the transaction saving them again commits.
+
+    If the cache fails the apps are indexed right away instead, so that saving
+    an app doesn't depend on the cache.
+    """
+    window = settings.ES_REINDEX_COALESCE_WINDOW
+    if not window or settings.CELERY_ALWAYS_EAGER:
+        index_webapps.delay(ids)
+        return
+
+    now = time.time()
+    bucket = int(now / window)
+    try:
+        _queue_reindex(ids, window, bucket, now)
+    except ValueError:
+        # Django raises ValueError when incrementing a key that was evicted,
+        # or when memcached is down.
+        task_log.warning('Could not queue apps %s for reindexing, indexing '
+                         'them now.' % ids, exc_info=True)
+        cache.delete_many([_reindex_pending_key(bucket, id_) for id_ in ids])
+        index_webapps.delay(ids)
+
+
+def _queue_reindex(ids, window, bucket, now):
+    timeout = window * 10
+    requests_key = _reindex_bucket_key(bucket, 'requests')
+    count_key = _reindex_bucket_key(bucket, 'count')
+    cache.add(requests_key, 0, timeout)
+    cache.add(count_key, 0, timeout)
+
+    for id_ in ids:
+        cache.incr(requests_key)
+        statsd.incr('reindex.coalesce.requested')
+        # Store when the id was queued to measure the lag when flushing.
+        if not cache.add(_reindex_pending_key(bucket, id_), now, timeout):
+            # Already pending, it will be indexed by the flush of the bucket.
+            continue
+
+        slot = cache.incr(count_key)
+        cache.set(_reindex_bucket_key(bucket, slot), id_, timeout)
+        if slot == 1:
+            flush_reindex_queue.apply_async(
+                args=[bucket], countdown=(bucket + 2) * window - now)
+
+
+@task(acks_late=True)
+@write
+def flush_reindex_queue(bucket, **kw):
+    """Index all the apps queued in a bucket by `queue_reindex`."""
+    count = cache.get(_reindex_bucket_key(bucket, 'count')) or 0
+    requested = cache.get(_reindex_bucket_key(bucket, 'requests')) or 0
+    keys = [_reindex_bucket_key(bucket, slot)
+            for slot in range(1, count + 1)]
+    ids = sorted(set(cache.get_many(keys).values()))
+    if not ids:
+        return
+
+    pending_keys = [_reindex_pending_key(bucket, id_) for id_ in ids]
+    queued = cache.get_many(pending_keys).values()
+    cache.delete_many(pending_keys + keys)
+
+    task_log.info('Indexing %s coalesced webapps from %s requests.'
+                  % (len(ids), requested))
+    es = WebappIndexer.get_es(urls=settings.ES_URLS)
+    for index in Reindexing.get_indices(WebappIndexer.get_index()):
+        WebappIndexer.run_indexing(ids, es, index=index)
+    WebappIndexer.indexed(ids)
+
+    statsd.incr('reindex.coalesce.indexed', len(ids))
+    statsd.gauge('reindex.coalesce.ratio',
+                 float(max(requested, len(ids))) / len(ids))
+    if queued:
+        statsd.timing('reindex.coalesce.lag',
+                      int((time.time() - min(queued)) * 1000))
+
+
 @post_request_task(acks_late=True)
 @write
 def unindex_webapps(ids, **kw):
@@ -792,6 +889,161 @@ def update_downloads(ids, **kw):
                   % (count, len(ids)))
 
 
+def _installs_facet(app_ids, start=None, end=None, region=None):
+    """
+    Return a facet summing the installs per app for `app_ids`, optionally
+    between the `start` and `end` dates and in a `region`.
+    """
+    filters = [{'terms': {'app-id': list(app_ids)}}]
+    if start or end:
+        date_range = {}
+        if start:
+            date_range['gte'] = start.date().strftime('%Y-%m-%d')
+        if end:
+            date_range['lte'] = end.date().strftime('%Y-%m-%d')
+        filters.append({'range': {'date': date_range}})
+    if region:
+        filters.append({'term': {'region': region.slug}})
+    return {
+        'terms_stats': {
+            'key_field': 'app-id',
+            'value_field': 'app_installs',
+            'size': len(app_ids),
+        },
+        'facet_filter': {'and': filters},
+    }
+
+
+def _get_installs(facets):
+    """
+    Run all the `_installs_facet` facets in a single Monolith query.
+
+    Returns a dict of {facet name: {app id: installs}}, empty if the query
+    failed.
+    """
+    client = get_monolith_client()
+    try:
+        resp = client.raw({'query': {'match_all': {}}, 'facets': facets,
+                           'size': 0})
+    except Exception as e:
+        task_log.info('Call to ES failed: {0}'.format(e))
+        return {}
+    return dict(
+        (name, dict((int(t['term']), t.get('total') or 0)
+                    for t in facet.get('terms', [])))
+        for name, facet in resp.get('facets', {}).items())
+
+
+def _compute_trending(count_1, count_3):
+    """
+    Same as `_get_trending`, from the installs of the past week (count_1)
+    and of the 3 prior weeks (count_3).
+    """
+    if not count_1 > 100:
+        return 0.0
+    count_3 = count_3 / 3
+    if count_3 > 1:
+        return (count_1 - count_3) / count_3
+    return 0.0
+
+
+@task
+@write
+def update_trending_bulk(ids, **kw):
+    """
+    Like `update_trending`, but fetches the installs of all the apps for all
+    the regions in a single Monolith query and upserts the trending values
+    in a single query.
+    """
+    t_start = time.time()
+    today = datetime.datetime.today()
+    regions = [None] + mkt.regions.REGIONS_DICT.values()
+
+    facets = {}
+    for region in regions:
+        name = region.slug if region else 'all'
+        facets['%s_recent' % name] = _installs_facet(
+            ids, days_ago(7), today, region)
+        facets['%s_prior' % name] = _installs_facet(
+            ids, days_ago(28), days_ago(8), region)
+    installs = _get_installs(facets)
+
+    values = []
+    for region in regions:
+        name = region.slug if region else 'all'
+        recent = installs.get('%s_recent' % name, {})
+        prior = installs.get('%s_prior' % name, {})
+        for app_id in ids:
+            value = _compute_trending(float(recent.get(app_id, 0)),
+                                      float(prior.get(app_id, 0)))
+            if value:
+                values.append((app_id, region.id if region else 0, value))
+
+    if values:
+        now = datetime.datetime.now()
+        cursor = connection.cursor()
+        cursor.execute(
+            'INSERT INTO addons_trending '
+            '(addon_id, region, value, created, modified) VALUES %s '
+            'ON DUPLICATE KEY UPDATE value=VALUES(value), '
+            'modified=VALUES(modified)' %
+            ', '.join(['(%s, %s, %s, %s, %s)'] * len(values)),
+            [v for row in values for v in row + (now, now)])
+        Trending.objects.invalidate(
+            *Trending.objects.no_cache().filter(addon__in=ids))
+
+    task_log.info('Trending calculated for %s apps in %0.2fs, %s values '
+                  'updated.' % (len(ids), time.time() - t_start, len(values)))
+
+
+@task
+@write
+def update_downloads_bulk(ids, **kw):
+    """
+    Like `update_downloads`, but fetches the weekly and total downloads of
+    all the apps in a single Monolith query and updates them with a single
+    query. The apps whose weekly downloads changed are reindexed together.
+    """
+    installs = _get_installs({
+        'weekly': _installs_facet(ids, days_ago(8), days_ago(1)),
+        'total': _installs_facet(ids),
+    })
+    weekly = installs.get('weekly', {})
+    total = installs.get('total', {})
+
+    apps = list(Webapp.objects.no_cache().filter(id__in=ids)
+                .no_transforms())
+    updates = {}
+    reindex = []
+    for app in apps:
+        app_weekly = int(weekly.get(app.id, 0))
+        app_total = int(total.get(app.id, 0))
+        if app_weekly != app.weekly_downloads:
+            reindex.append(app.id)
+        if (app_weekly, app_total) != (app.weekly_downloads,
+                                       app.total_downloads):
+            updates[app.id] = (app_weekly, app_total)
+
+    if updates:
+        cases = ' '.join(['WHEN %s THEN %s'] * len(updates))
+        params = ([v for id_, (w, t) in updates.items() for v in (id_, w)] +
+                  [v for id_, (w, t) in updates.items() for v in (id_, t)] +
+                  updates.keys())
+        cursor = connection.cursor()
+        cursor.execute(
+            'UPDATE addons SET weekly_downloads = CASE id %s END, '
+            'total_downloads = CASE id %s END WHERE id IN (%s)' % (
+                cases, cases, ', '.join(['%s'] * len(updates))),
+            params)
+        Webapp.objects.invalidate(*[a for a in apps if a.id in updates])
+
+    if reindex:
+        index_webapps.delay(reindex)
+
+    task_log.info('App downloads updated for %s out of %s apps.'
+                  % (len(updates), len(ids)))
+
+
 class PreGenAPKError(Exception):
     """
     An error encountered while trying to pre-generate an APK.
@@ -23,7 +23,8 @@ from mkt.webapps import cron
 from mkt.webapps.cron import (clean_old_signed, mkt_gc, update_app_trending,
                               update_downloads)
 from mkt.webapps.models import Addon, Webapp
-from mkt.webapps.tasks import _get_trending
+from mkt.webapps.tasks import (_get_trending, update_downloads_bulk,
+                               update_trending_bulk)
 
 
 class TestLastUpdated(amo.tests.TestCase):
@@ -192,6 +193,40 @@ class TestWeeklyDownloads(amo.tests.TestCase):
         eq_(self.app.weekly_downloads, 0)
         eq_(self.app.total_downloads, 0)
 
+    @mock.patch('mkt.webapps.tasks.index_webapps')
+    @mock.patch('mkt.webapps.tasks.get_monolith_client')
+    def test_bulk(self, _mock, index_mock):
+        client = mock.Mock()
+        client.raw.return_value = {
+            'facets': {
+                'weekly': {'terms': [{'term': self.app.pk, 'total': 255.0}]},
+                'total': {'terms': [{'term': self.app.pk, 'total': 6638.0}]},
+            }
+        }
+        _mock.return_value = client
+
+        update_downloads_bulk([self.app.pk])
+
+        eq_(client.raw.call_count, 1)
+        app = self.get_app()
+        eq_(app.weekly_downloads, 255)
+        eq_(app.total_downloads, 6638)
+        index_mock.delay.assert_called_with([self.app.pk])
+
+    @mock.patch('mkt.webapps.tasks.index_webapps')
+    @mock.patch('mkt.webapps.tasks.get_monolith_client')
+    def test_bulk_monolith_error(self, _mock, index_mock):
+        client = mock.Mock()
+        client.raw.side_effect = Exception
+        _mock.return_value = client
+
+        update_downloads_bulk([self.app.pk])
+
+        app = self.get_app()
+        eq_(app.weekly_downloads, 0)
+        eq_(app.total_downloads, 0)
+        assert not index_mock.delay.called
+
 
 class TestCleanup(amo.tests.TestCase):
 
@@ -302,6 +337,36 @@ class TestUpdateTrending(amo.tests.TestCase):
         _mock.return_value = client
         eq_(_get_trending(self.app.id), 0.0)
 
+    @mock.patch('mkt.webapps.tasks.get_monolith_client')
+    def test_trending_bulk(self, _mock):
+        def raw(query):
+            # 255 installs in each period for every facet.
+            return {'facets': dict(
+                (name, {'terms': [{'term': self.app.id, 'total': 255.0}]})
+                for name in query['facets'])}
+
+        client = mock.Mock()
+        client.raw.side_effect = raw
+        _mock.return_value = client
+
+        update_trending_bulk([self.app.id])
+
+        eq_(client.raw.call_count, 1)
+        # (255 - 255 / 3) / (255 / 3) = 2.0
+        eq_(self.app.get_trending(), 2.0)
+        for region in mkt.regions.REGIONS_DICT.values():
+            eq_(self.app.get_trending(region=region), 2.0)
+
+    @mock.patch('mkt.webapps.tasks.get_monolith_client')
+    def test_trending_bulk_threshold(self, _mock):
+        client = mock.Mock()
+        client.raw.return_value = {'facets': {
+            'all_recent': {'terms': [{'term': self.app.id, 'total': 99.0}]}}}
+        _mock.return_value = client
+
+        update_trending_bulk([self.app.id])
+        eq_(self.app.get_trending(), 0.0)
+
 
 @mock.patch('os.stat')
 @mock.patch('os.listdir')
@@ -1,4 +1,7 @@
 # -*- coding: utf-8 -*-
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
 from nose.tools import eq_, ok_
 
 import amo.tests
@@ -88,6 +91,7 @@ class TestWebappIndexer(amo.tests.TestCase):
         obj, doc = self._get_doc()
         for k, v in doc['features'].iteritems():
             eq_(v, k in enabled)
+        eq_(doc['required_features'], ['apps', 'geolocation', 'sms'])
 
     def test_extract_regions(self):
         self.app.addonexcludedregion.create(region=mkt.regions.BR.id)
@@ -155,3 +159,27 @@ class TestWebappIndexer(amo.tests.TestCase):
             {'lang': 'en-US', 'string': release_notes['en-US']})
         eq_(doc['release_notes_translations'][1],
             {'lang': 'fr', 'string': release_notes['fr']})
+
+    def test_extract_documents(self):
+        app2 = amo.tests.app_factory()
+        EscalationQueue.objects.create(addon=app2)
+        objs = list(Webapp.objects.no_cache().filter(
+            id__in=[self.app.pk, app2.pk]).order_by('id'))
+        docs = WebappIndexer.extract_documents(objs)
+        eq_([d['id'] for d in docs], [self.app.pk, app2.pk])
+        eq_([d['is_escalated'] for d in docs], [False, True])
+        for obj, doc in zip(objs, docs):
+            eq_(doc, WebappIndexer.extract_document(obj.pk))
+
+    def test_extract_documents_num_queries(self):
+        apps = [amo.tests.app_factory() for i in range(3)]
+
+        def count_queries(ids):
+            objs = list(Webapp.objects.no_cache().filter(id__in=ids))
+            with CaptureQueriesContext(connection) as ctx:
+                WebappIndexer.extract_documents(objs)
+            return len(ctx.captured_queries)
+
+        # The number of queries doesn't depend on the number of apps.
+        eq_(count_queries([apps[0].pk]),
+            count_queries([a.pk for a in apps]))
@@ -7,6 +7,7 @@ from django.test.utils import override_settings
 
 import mock
 from nose.tools import eq_, ok_
+from rest_framework import serializers
 from test_utils import RequestFactory
 
 import amo
@@ -23,7 +24,9 @@ from mkt.users.models import UserProfile
 from mkt.versions.models import Version
 from mkt.webapps.indexers import WebappIndexer
 from mkt.webapps.models import AddonDeviceType, Installed, Preview, Webapp
-from mkt.webapps.serializers import (AppSerializer, ESAppSerializer,
+from mkt.webapps.serializers import (AppSerializer,
+                                     ESAppFeedCollectionSerializer,
+                                     ESAppFeedSerializer, ESAppSerializer,
                                      SimpleESAppSerializer)
 
 
@@ -667,6 +670,90 @@ class TestESAppSerializer(amo.tests.ESTestCase):
         eq_(res['author'], '')
 
 
+class TestESAppSerializerFastPath(amo.tests.ESTestCase):
+    fixtures = fixture('user_2519', 'webapp_337141')
+
+    def setUp(self):
+        self.request = RequestFactory().get('/')
+        self.request.REGION = mkt.regions.US
+        self.request.user = AnonymousUser()
+        self.app = Webapp.objects.get(pk=337141)
+        self.app.update(categories=['books', 'social'])
+        Preview.objects.create(filetype='image/png', addon=self.app,
+                               position=0)
+        self.app.description = {'en-US': u'Déscriptîon',
+                                'fr': u'Déscriptîon in frènch'}
+        self.app.save()
+        self.refresh('webapp')
+
+    def get_obj(self):
+        return WebappIndexer.search().filter(
+            'term', id=self.app.pk).execute().hits[0]
+
+    def serialize(self, serializer_class=ESAppSerializer, fast_path=True):
+        serializer = serializer_class(self.get_obj(),
+                                      context={'request': self.request})
+        serializer.fast_path = fast_path
+        return serializer.data
+
+    def check_same_output(self, serializer_class=ESAppSerializer):
+        fast = self.serialize(serializer_class)
+        eq_(fast, self.serialize(serializer_class, fast_path=False))
+        eq_(fast.keys(), self.serialize(serializer_class,
+                                        fast_path=False).keys())
+
+    @mock.patch.object(ESAppSerializer, 'fake_object')
+    def test_no_fake_object(self, fake_object):
+        res = self.serialize()
+        eq_(res['id'], self.app.pk)
+        ok_(not fake_object.called)
+
+    def test_same_output(self):
+        self.check_same_output()
+
+    def test_same_output_lang(self):
+        self.request = RequestFactory().get('/', {'lang': 'fr'})
+        self.request.REGION = mkt.regions.BR
+        self.request.user = AnonymousUser()
+        self.check_same_output()
+        eq_(self.serialize()['description'], u'Déscriptîon in frènch')
+
+    def test_same_output_subclasses(self):
+        self.check_same_output(SimpleESAppSerializer)
+        self.check_same_output(ESAppFeedSerializer)
+        self.check_same_output(ESAppFeedCollectionSerializer)
+
+    @mock.patch.object(ESAppSerializer, 'fake_object')
+    def test_premium(self, fake_object):
+        self.make_premium(self.app)
+        self.refresh('webapp')
+        self.serialize()
+        ok_(fake_object.called)
+
+    @mock.patch.object(ESAppSerializer, 'fake_object')
+    def test_signed_in(self, fake_object):
+        self.request.user = UserProfile.objects.get(pk=2519)
+        self.serialize()
+        ok_(fake_object.called)
+
+    def test_unknown_field(self):
+        class Serializer(ESAppSerializer):
+            reviewed = serializers.CharField()
+
+        serializer = Serializer(self.get_obj(),
+                                context={'request': self.request})
+        eq_(serializer.get_fast_getters(), False)
+
+    def test_regions_serialized_once(self):
+        serializer = ESAppSerializer([self.get_obj()] * 2, many=True,
+                                     context={'request': self.request})
+        with mock.patch.object(serializer.fields['regions'],
+                               'to_native') as to_native:
+            to_native.return_value = {}
+            serializer.data
+        eq_(to_native.call_count, len(self.app.get_regions()))
+
+
 class TestSimpleESAppSerializer(amo.tests.ESTestCase):
     fixtures = fixture('webapp_337141')
 
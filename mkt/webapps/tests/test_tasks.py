@@ -10,6 +10,7 @@ from tempfile import mkdtemp
 
 from django.conf import settings
 from django.core import mail
+from django.core.cache import cache
 from django.core.files.storage import default_storage as storage
 from django.core.management import call_command
 from django.core.urlresolvers import reverse
@@ -29,9 +30,10 @@ from mkt.users.models import UserProfile
 from mkt.versions.models import Version
 from mkt.webapps.models import Addon, AddonUser, Preview, Webapp
 from mkt.webapps.tasks import (dump_app, dump_user_installs, export_data,
+                               flush_reindex_queue,
                                notify_developers_of_failure, pre_generate_apk,
-                               PreGenAPKError, rm_directory, update_manifests,
-                               zip_apps)
+                               PreGenAPKError, queue_reindex, rm_directory,
+                               update_manifests, zip_apps)
 
 
 original = {
@@ -717,3 +719,62 @@ class TestExportData(amo.tests.TestCase):
         collection_file = tarball.extractfile(self.collection_path)
         collection_data = json.loads(collection_file.read())
         eq_(collection_data['apps'][0]['filepath'], self.app_path)
+
+
+@mock.patch('mkt.webapps.tasks.time.time', lambda: 1000.0)
+class TestQueueReindex(amo.tests.TestCase):
+
+    def setUp(self):
+        self.settings_patcher = self.settings(
+            CELERY_ALWAYS_EAGER=False, ES_REINDEX_COALESCE_WINDOW=10)
+        self.settings_patcher.enable()
+        self.addCleanup(self.settings_patcher.disable)
+
+    @mock.patch('mkt.webapps.tasks.index_webapps')
+    def test_no_window(self, index_webapps):
+        with self.settings(ES_REINDEX_COALESCE_WINDOW=0):
+            queue_reindex([1, 2])
+        index_webapps.delay.assert_called_with([1, 2])
+
+    @mock.patch('mkt.webapps.tasks.flush_reindex_queue.apply_async')
+    def test_flush_scheduled_once(self, apply_async):
+        queue_reindex([1])
+        queue_reindex([2, 1])
+        queue_reindex([1])
+        eq_(apply_async.call_count, 1)
+        eq_(apply_async.call_args[1], {'args': [100], 'countdown': 20.0})
+
+    @mock.patch('mkt.webapps.tasks.flush_reindex_queue.apply_async')
+    def test_pending_in_earlier_bucket(self, apply_async):
+        queue_reindex([1])
+        # Saved again in the next window, before the first flush ran: the
+        # flush of the next window indexes it too.
+        with mock.patch('mkt.webapps.tasks.time.time', lambda: 1012.0):
+            queue_reindex([1])
+        eq_([c[1]['args'] for c in apply_async.call_args_list],
+            [[100], [101]])
+        eq_(cache.get('reindex:bucket:101:1'), 1)
+
+    @mock.patch('mkt.webapps.tasks.index_webapps')
+    @mock.patch('mkt.webapps.tasks.flush_reindex_queue.apply_async')
+    @mock.patch('mkt.webapps.tasks.cache.incr')
+    def test_cache_error(self, incr, apply_async, index_webapps):
+        incr.side_effect = ValueError
+        queue_reindex([1, 2])
+        index_webapps.delay.assert_called_with([1, 2])
+        assert not apply_async.called
+        # The ids aren't left pending.
+        eq_(cache.get('reindex:pending:100:1'), None)
+
+    @mock.patch('mkt.webapps.tasks.WebappIndexer.run_indexing')
+    @mock.patch('mkt.webapps.tasks.flush_reindex_queue.apply_async')
+    def test_flush(self, apply_async, run_indexing):
+        queue_reindex([1])
+        queue_reindex([2, 1])
+        flush_reindex_queue(100)
+        eq_(run_indexing.call_count, 1)
+        eq_(run_indexing.call_args[0][0], [1, 2])
+
+        # Once flushed, the ids are not pending anymore.
+        eq_(cache.get('reindex:pending:100:1'), None)
+        eq_(cache.get('reindex:pending:100:2'), None)
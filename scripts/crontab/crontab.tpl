@@ -7,7 +7,6 @@ HOME=/tmp
 
 # Once per hour.
 20 * * * * %(z_cron)s addon_last_updated
-50 * * * * %(z_cron)s cleanup_extracted_file
 
 # 2014-06-23: Disabled to stop sending 2MB emails for old AMO files.
 # TODO: Determine if we need this. If not, remove. If so, re-enable after removing AMO files.
@@ -24,6 +23,7 @@ HOME=/tmp
 10 8 * * * %(z_cron)s update_monolith_stats `/bin/date -d 'yesterday' +\%%Y-\%%m-\%%d`
 15 8 * * * %(z_cron)s process_iarc_changes --settings=settings_local_mkt
 30 8 * * * %(z_cron)s dump_user_installs_cron --settings=settings_local_mkt
+50 8 * * * %(z_cron)s update_app_ratings --settings=settings_local_mkt
 00 9 * * * %(z_cron)s update_app_downloads --settings=settings_local_mkt
 45 9 * * * %(z_cron)s mkt_gc --settings=settings_local_mkt
 45 9 * * * %(z_cron)s clean_old_signed --settings=settings_local_mkt
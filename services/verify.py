@@ -7,12 +7,14 @@ from wsgiref.handlers import format_date_time
 
 import jwt
 from browserid.errors import ExpiredSignatureError
+from django.core.cache import cache
 from django_statsd.clients import statsd
 from receipts import certs
 
 from lib.cef_loggers import receipt_cef
 from lib.crypto.receipt import sign
-from lib.utils import static_url
+from lib.utils import LRUCache, static_url
+from mkt.receipts.status import app_purchase_key, inapp_purchase_key
 
 from services.utils import settings
 
@@ -28,10 +30,80 @@ import receipts  # NOQA, used for patching in the tests
 
 status_codes = {
     200: '200 OK',
+    400: '400 Bad Request',
     405: '405 Method Not Allowed',
     500: '500 Internal Server Error',
 }
 
+# Where apps can post a JSON list of receipts to verify them all at once.
+BATCH_PATH = '/services/verify/batch/'
+
+
+class StatusCache(object):
+    """
+    A read-through cache of purchase statuses, first in-process and then in
+    memcache. Purchases that aren't found are not cached, so a receipt isn't
+    rejected for long because it was checked before its purchase was
+    written.
+    """
+
+    def __init__(self):
+        self._lru, self._config = None, None
+
+    @property
+    def lru(self):
+        ttl = settings.WEBAPPS_RECEIPT_STATUS_LRU_TIMEOUT
+        if not ttl:
+            return None
+        config = (settings.WEBAPPS_RECEIPT_STATUS_CACHE_SIZE, ttl)
+        if self._config != config:
+            self._lru, self._config = LRUCache(*config), config
+        return self._lru
+
+    def get_many(self, keys):
+        """Returns a dict of the cached statuses for `keys`."""
+        found = {}
+        if self.lru:
+            for key in keys:
+                value = self.lru.get(key)
+                if value is not None:
+                    found[key] = value
+            statsd.incr('services.verify.status.lru.hit', len(found))
+        missing = [key for key in keys if key not in found]
+        if missing and settings.WEBAPPS_RECEIPT_STATUS_CACHE_TIMEOUT:
+            cached = cache.get_many(missing)
+            statsd.incr('services.verify.status.memcache.hit', len(cached))
+            if self.lru:
+                for key, value in cached.items():
+                    self.lru.set(key, value)
+            found.update(cached)
+        statsd.incr('services.verify.status.miss', len(keys) - len(found))
+        return found
+
+    def set_many(self, values):
+        if self.lru:
+            for key, value in values.items():
+                self.lru.set(key, value)
+        if values and settings.WEBAPPS_RECEIPT_STATUS_CACHE_TIMEOUT:
+            cache.set_many(values,
+                           settings.WEBAPPS_RECEIPT_STATUS_CACHE_TIMEOUT)
+
+    def get(self, key, lookup):
+        """Returns the status for `key`, calling `lookup` if not cached."""
+        value = self.get_many([key]).get(key)
+        if value is None:
+            value = lookup()
+            if value:
+                self.set_many({key: tuple(value)})
+        return value
+
+    def clear(self):
+        if self._lru:
+            self._lru.clear()
+
+
+status_cache = StatusCache()
+
 
 class VerificationError(Exception):
     pass
@@ -51,13 +123,21 @@ class RefundedReceipt(Exception):
 
 class Verify:
 
-    def __init__(self, receipt, environ):
+    def __init__(self, receipt, environ, path=None):
         self.receipt = receipt
         self.environ = environ
+        # The path the receipt should be verified at, defaults to the path
+        # of the request.
+        self.path = path
+        self.decoded = None
 
         # This is so the unit tests can override the connection.
         self.conn, self.cursor = None, None
 
+        # Purchases prefetched by `BatchVerify`, keyed by (app id, uuid) and
+        # by contribution id.
+        self.app_purchases, self.inapp_purchases = None, None
+
     def check_full(self):
         """
         This is the default that verify will use, this will
@@ -65,7 +145,8 @@ class Verify:
         """
         receipt_domain = urlparse(static_url('WEBAPPS_RECEIPT_URL')).netloc
         try:
-            self.decoded = self.decode()
+            if self.decoded is None:
+                self.decoded = self.decode()
             self.check_type('purchase-receipt')
             self.check_url(receipt_domain)
             self.check_purchase()
@@ -146,7 +227,7 @@ class Verify:
             note that "real" receipts are verified at a different domain
             from the main marketplace domain.
         """
-        path = self.environ['PATH_INFO']
+        path = self.path or self.environ['PATH_INFO']
         parsed = urlparse(self.decoded.get('verify', ''))
 
         if parsed.netloc != domain:
@@ -243,14 +324,13 @@ class Verify:
         """
         Verifies that the inapp has been purchased.
         """
-        self.setup_db()
-        sql = """SELECT inapp_product_id, type FROM stats_contributions
-                 WHERE id = %(contribution_id)s LIMIT 1;"""
-        self.cursor.execute(
-            sql,
-            {'contribution_id': self.get_contribution_id()}
-        )
-        result = self.cursor.fetchone()
+        contribution_id = self.get_contribution_id()
+        if self.inapp_purchases is not None:
+            result = self.inapp_purchases.get(contribution_id)
+        else:
+            result = status_cache.get(
+                inapp_purchase_key(contribution_id),
+                lambda: self.get_purchase_inapp(contribution_id))
         if not result:
             log_info('Invalid receipt, no purchase')
             raise InvalidReceipt('NO_PURCHASE')
@@ -259,6 +339,13 @@ class Verify:
         self.check_purchase_type(purchase_type)
         self.check_inapp_product(contribution_inapp_id)
 
+    def get_purchase_inapp(self, contribution_id):
+        self.setup_db()
+        sql = """SELECT inapp_product_id, type FROM stats_contributions
+                 WHERE id = %(contribution_id)s LIMIT 1;"""
+        self.cursor.execute(sql, {'contribution_id': contribution_id})
+        return self.cursor.fetchone()
+
     def check_inapp_product(self, contribution_inapp_id):
         if int(contribution_inapp_id) != self.get_inapp_id():
             log_info('Invalid receipt, inapp_id does not match')
@@ -268,19 +355,27 @@ class Verify:
         """
         Verifies that the app has been purchased by the user.
         """
-        self.setup_db()
-        sql = """SELECT type FROM addon_purchase
-                 WHERE addon_id = %(app_id)s
-                 AND uuid = %(uuid)s LIMIT 1;"""
-        self.cursor.execute(sql, {'app_id': self.get_app_id(),
-                                  'uuid': self.get_user()})
-        result = self.cursor.fetchone()
+        app_id, uuid = self.get_app_id(), self.get_user()
+        if self.app_purchases is not None:
+            result = self.app_purchases.get((app_id, uuid))
+        else:
+            result = status_cache.get(
+                app_purchase_key(app_id, uuid),
+                lambda: self.get_purchase_app(app_id, uuid))
         if not result:
             log_info('Invalid receipt, no purchase')
             raise InvalidReceipt('NO_PURCHASE')
 
         self.check_purchase_type(result[0])
 
+    def get_purchase_app(self, app_id, uuid):
+        self.setup_db()
+        sql = """SELECT type FROM addon_purchase
+                 WHERE addon_id = %(app_id)s
+                 AND uuid = %(uuid)s LIMIT 1;"""
+        self.cursor.execute(sql, {'app_id': app_id, 'uuid': uuid})
+        return self.cursor.fetchone()
+
     def check_purchase_type(self, purchase_type):
         """
         Verifies that the purchase type is of a valid type.
@@ -358,6 +453,110 @@ class Verify:
         return {'status': 'expired'}
 
 
+class BatchVerify:
+    """
+    Verifies many purchase receipts at once, like `Verify.check_full` does
+    for each of them, but with a single query per table for all the purchase
+    checks.
+    """
+
+    def __init__(self, receipt_list, environ):
+        path = urlparse(static_url('WEBAPPS_RECEIPT_URL')).path
+        self.verifiers = [Verify(receipt, environ, path=path)
+                          for receipt in receipt_list]
+
+        # This is so the unit tests can override the connection.
+        self.conn, self.cursor = None, None
+
+    def setup_db(self):
+        if not self.cursor:
+            self.conn = mypool.connect()
+            self.cursor = self.conn.cursor()
+
+    def check_full(self):
+        """
+        Returns the status of each receipt, in the order they were given.
+        """
+        results = {}
+        app_keys, contribution_ids = set(), set()
+        for i, verifier in enumerate(self.verifiers):
+            try:
+                verifier.decoded = verifier.decode()
+            except InvalidReceipt, err:
+                results[i] = verifier.invalid(str(err))
+                continue
+            try:
+                if 'contrib' in verifier.get_storedata():
+                    contribution_ids.add(verifier.get_contribution_id())
+                else:
+                    app_keys.add((verifier.get_app_id(), verifier.get_user()))
+            except InvalidReceipt:
+                # Leave it to `Verify.check_full` to report, in the order
+                # it checks the receipt.
+                pass
+
+        app_purchases = self.get_app_purchases(app_keys)
+        inapp_purchases = self.get_inapp_purchases(contribution_ids)
+
+        for i, verifier in enumerate(self.verifiers):
+            if i not in results:
+                verifier.app_purchases = app_purchases
+                verifier.inapp_purchases = inapp_purchases
+                results[i] = verifier.check_full()
+        return [results[i] for i in range(len(self.verifiers))]
+
+    def get_app_purchases(self, keys):
+        """
+        Returns a dict of {(app id, uuid): (type,)} for the purchases of
+        `keys`, a set of (app id, uuid).
+        """
+        cache_keys = dict((app_purchase_key(*key), key) for key in keys)
+        cached = status_cache.get_many(cache_keys.keys())
+        purchases = dict((cache_keys[k], v) for k, v in cached.items())
+        missing = [key for key in keys if key not in purchases]
+        if not missing:
+            return purchases
+
+        self.setup_db()
+        uuids = list(set(uuid for app_id, uuid in missing))
+        sql = """SELECT addon_id, uuid, type FROM addon_purchase
+                 WHERE uuid IN (%s);""" % ', '.join(['%s'] * len(uuids))
+        self.cursor.execute(sql, uuids)
+        found = dict(((addon_id, uuid), (purchase_type,))
+                     for addon_id, uuid, purchase_type
+                     in self.cursor.fetchall()
+                     if (addon_id, uuid) in keys)
+        status_cache.set_many(dict((app_purchase_key(*key), value)
+                                   for key, value in found.items()))
+        purchases.update(found)
+        return purchases
+
+    def get_inapp_purchases(self, contribution_ids):
+        """
+        Returns a dict of {contribution id: (inapp product id, type)} for the
+        contributions in `contribution_ids`.
+        """
+        cache_keys = dict((inapp_purchase_key(pk), pk)
+                          for pk in contribution_ids)
+        cached = status_cache.get_many(cache_keys.keys())
+        purchases = dict((cache_keys[k], v) for k, v in cached.items())
+        missing = [pk for pk in contribution_ids if pk not in purchases]
+        if not missing:
+            return purchases
+
+        self.setup_db()
+        sql = """SELECT id, inapp_product_id, type FROM stats_contributions
+                 WHERE id IN (%s);""" % ', '.join(['%s'] * len(missing))
+        self.cursor.execute(sql, missing)
+        found = dict((id_, (inapp_product_id, purchase_type))
+                     for id_, inapp_product_id, purchase_type
+                     in self.cursor.fetchall())
+        status_cache.set_many(dict((inapp_purchase_key(pk), value)
+                                   for pk, value in found.items()))
+        purchases.update(found)
+        return purchases
+
+
 def get_headers(length):
     return [('Access-Control-Allow-Origin', '*'),
             ('Access-Control-Allow-Methods', 'POST'),
@@ -367,6 +566,29 @@ def get_headers(length):
             ('Last-Modified', format_date_time(time()))]
 
 
+_verifiers = {}
+_keys = {}
+
+
+def get_verifier():
+    """
+    Returns a receipt verifier for the valid issuers. It is kept for the
+    life of the process so the certificates it fetched are reused.
+    """
+    if certs.ReceiptVerifier not in _verifiers:
+        _verifiers[certs.ReceiptVerifier] = certs.ReceiptVerifier(
+            valid_issuers=settings.SIGNING_VALID_ISSUERS)
+    return _verifiers[certs.ReceiptVerifier]
+
+
+def get_receipt_key():
+    """Returns the key receipts are signed with, loaded only once."""
+    path = settings.WEBAPPS_RECEIPT_KEY
+    if path not in _keys:
+        _keys[path] = jwt.rsa_load(path)
+    return _keys[path]
+
+
 def decode_receipt(receipt):
     """
     Cracks the receipt using the private key. This will probably change
@@ -374,8 +596,7 @@ def decode_receipt(receipt):
     """
     with statsd.timer('services.decode'):
         if settings.SIGNING_SERVER_ACTIVE:
-            verifier = certs.ReceiptVerifier(valid_issuers=
-                                             settings.SIGNING_VALID_ISSUERS)
+            verifier = get_verifier()
             try:
                 result = verifier.verify(receipt)
             except ExpiredSignatureError:
@@ -385,8 +606,7 @@ def decode_receipt(receipt):
                 raise VerificationError()
             return jwt.decode(receipt.split('~')[1], verify=False)
         else:
-            key = jwt.rsa_load(settings.WEBAPPS_RECEIPT_KEY)
-            raw = jwt.decode(receipt, key)
+            raw = jwt.decode(receipt, get_receipt_key())
     return raw
 
 
@@ -421,6 +641,25 @@ def receipt_check(environ):
     return output
 
 
+def batch_receipt_check(environ):
+    with statsd.timer('services.verify.batch'):
+        try:
+            receipt_list = json.loads(environ['wsgi.input'].read())
+        except ValueError:
+            return 400, ''
+        if (not isinstance(receipt_list, list) or
+                len(receipt_list) > settings.WEBAPPS_RECEIPT_BATCH_SIZE or
+                not all(isinstance(r, basestring) for r in receipt_list)):
+            return 400, ''
+        statsd.incr('services.verify.batch.receipts', len(receipt_list))
+        try:
+            verify = BatchVerify(receipt_list, environ)
+            return 200, json.dumps(verify.check_full())
+        except:
+            log_exception('<none>')
+            return 500, ''
+
+
 def application(environ, start_response):
     body = ''
     path = environ.get('PATH_INFO', '')
@@ -430,6 +669,8 @@ def application(environ, start_response):
         # Only allow POST through as per spec.
         if environ.get('REQUEST_METHOD') != 'POST':
             status = 405
+        elif path == BATCH_PATH:
+            status, body = batch_receipt_check(environ)
         else:
             status, body = receipt_check(environ)
     start_response(status_codes[status], get_headers(len(body)))
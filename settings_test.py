@@ -118,6 +118,16 @@ PAYMENT_PROVIDERS = ['bango']
 
 # When not testing this specific feature, make sure it's off.
 PRE_GENERATE_APKS = False
+FEED_CACHE_TIMEOUT = 0
+SEARCH_CACHE_TIMEOUT = 0
+COLLECTIONS_FEATURED_CACHE_TIMEOUT = 0
+REVIEWER_QUEUE_STATS_TIMEOUT = 0
+MONOLITH_BUFFER_SIZE = 0
+ACTIVITY_LOG_STRING_CACHE_TIMEOUT = 0
+WEBAPPS_RECEIPT_STATUS_CACHE_TIMEOUT = 0
+WEBAPPS_RECEIPT_STATUS_LRU_TIMEOUT = 0
+TRANSLATIONS_CLEAN_QUEUE_TIMEOUT = 0
+TRANSLATIONS_CACHE_TIMEOUT = 0
 # This is a precaution in case something isn't mocked right.
 PRE_GENERATE_APK_URL = 'http://you-should-never-load-this.com/'
 